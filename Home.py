@@ -1,54 +1,24 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
-import inflection
-from PIL import Image
-from pathlib import Path
 from textwrap import dedent
-from modules.cleaning import limpar_dataframe, remover_duplicatas, rename_columns, country_name, create_price_type, color_name, mudar_coluna, converter_usd
-from modules.charts import unicos, restaurants_map
+from modules import perf
+from modules.data import CSV_PADRAO, dataset_version, load_cubo, load_indice_espacial, load_restaurants, load_indice_busca, load_indice_filtros
+from modules.charts import unicos, restaurants_map, busca_lateral
+from modules.cleaning import PRICE_TYPES
+from modules.cuisines import culinarias_disponiveis
+from modules.spatial import buscar_proximos
 
 st.set_page_config(page_title="Home", page_icon="🏡", layout="wide")
+# Instrumentação opcional (?perf=1 na URL ou FOMEZERO_PERF=1): painel na barra lateral
+perf.iniciar('Home')
 #=======================================================================================    
 ### Dataframe e Transformação de dados
 #=======================================================================================
-# Upload do arquivo
-df = pd.read_csv('zomato.csv')
-df1 = df.copy()
-
-# Renomeando colunas para minúsculo e trocando espaços por underlines
-df1 = rename_columns(df1)
-df1 = limpar_dataframe(df1, dropna_mode = 'any')
-df1 = remover_duplicatas(df1, subset='restaurant_id')
-
-# Concertando valor de número incorreto pela mediana
-linha_selecionada = df1['restaurant_id'] == 16608070
-df1.loc[linha_selecionada,'average_cost_for_two']= 45
-
-# Criando a coluna Country Name
-df1['country_name'] = df1['country_code'].apply(country_name)
-
-# Criando a coluna Categoria de Comida
-df1['categoria_de_comida'] = df1['price_range'].apply(create_price_type)
-
-# Criando a coluna Cor
-df1['color'] = df1['rating_color'].apply(color_name)
-
-# Mudando as colunas de lugar 
-df1 = mudar_coluna(df1,'color',-3)
-df1 = mudar_coluna(df1,'categoria_de_comida',-5)
-df1 = mudar_coluna(df1,'country_name',3)
-
-# Separando os nomes da coluna 'cuisines'
-df1["cuisines"]=df1.loc[:,"cuisines"].apply(lambda x: x.split(",")[0])
-
-# Padronizando os valores de 'average_cost_for_two' para USD
-df1 = converter_usd(df1, coluna_valor='average_cost_for_two', coluna_moeda='currency')
+# Dataframe limpo e enriquecido (carregado uma vez e compartilhado entre sessões)
+df1 = load_restaurants()
 #=======================================================================================
 # Barra Lateral
 #=======================================================================================
-image = Image.open("logo_fome_zero.png")
-st.sidebar.image(image, width=120)
+st.sidebar.image('logo_fome_zero.png', width=120)
 st.sidebar.markdown("### Fome Zero")
 st.sidebar.markdown("## A melhor maneira de você matar a sua fome")
 st.sidebar.markdown("---")
@@ -62,12 +32,17 @@ country_options = st.sidebar.multiselect(
        'Canada', 'Singapure',
        'Indonesia', 'New Zeland', 'England', 'Qatar', 'South Africa', 'Turkey'])
 
+st.sidebar.markdown("""---""")
+busca_lateral(load_restaurants(), load_indice_busca())
 st.sidebar.markdown("""---""")
 st.sidebar.markdown('Powered by Júlio Takeichi')
 
-#Filtro de país
-linhas_selecionadas = df1['country_name'].isin(country_options)
-df1= df1.loc[linhas_selecionadas,:]
+#Filtro de país (bitmaps pré-calculados; com todos os países não copia o dataframe)
+indice_filtros = load_indice_filtros()
+df1 = indice_filtros.recorte(df1, indice_filtros.algum('country_name', country_options))
+# métricas gerais lidas das células do cubo (avaliações distintas: estimativa HyperLogLog)
+cubo = load_cubo()
+cubo = cubo.filtrar(cubo['country_name'].isin(country_options))
 
 #=======================================================================================
 # Layout no Streamlit
@@ -81,21 +56,66 @@ with st.container():
     st.subheader('Informações Gerais')
     col1,col2,col3,col4,col5=st.columns(5)
     with col1:
-        col1.metric('Nº Restaurantes reg.',unicos(df1,'restaurant_id'))
+        col1.metric('Nº Restaurantes reg.',unicos(cubo,'restaurant_id'))
     with col2:
-        col2.metric('Nº Países reg.',unicos(df1,'country_name'))
+        col2.metric('Nº Países reg.',unicos(cubo,'country_name'))
     with col3:
-        col3.metric('Nº Cidades reg.',unicos(df1,'city'))
+        col3.metric('Nº Cidades reg.',unicos(cubo,'city'))
     with col4:
-        col4.metric('Nº de aval. feitas',unicos(df1,'votes'))
+        col4.metric('Nº de aval. feitas',unicos(cubo,'votes'))
     with col5:
-        col5.metric('Nº Culinárias reg.',unicos(df1,'cuisines'))
+        col5.metric('Nº Culinárias reg.',unicos(cubo,'cuisines'))
 
 with st.container():
     st.subheader("🌎 Mapa — Restaurantes")
-    cluster_on = st.checkbox("Agrupar marcadores (MarkerCluster)", value=True)
-    restaurants_map(df1, color_col='color', cluster=cluster_on, max_points=4000, use_circle=True, zoom_start=2)
+    backend = st.radio("Renderização", ['folium', 'webgl'], horizontal=True,
+                       format_func={'folium': 'Folium (marcadores)', 'webgl': 'WebGL (todos os pontos)'}.get)
+    grade_on = st.checkbox("Agrupar no servidor por zoom (todos os restaurantes)", value=True,
+                           disabled=backend == 'webgl')
+    cluster_on = st.checkbox("Agrupar marcadores (MarkerCluster)", value=True,
+                             disabled=grade_on or backend == 'webgl')
+    # zoom/centro/limites da última interação com o mapa (o st_folium guarda o retorno na chave)
+    estado_mapa = st.session_state.get('mapa_home') or {}
+    indice = load_indice_espacial()
+    restaurants_map(df1, color_col='color', cluster=cluster_on, max_points=4000, use_circle=True, zoom_start=2,
+                    grade=grade_on, zoom=estado_mapa.get('zoom'), centro=estado_mapa.get('center'), key='mapa_home',
+                    indice=indice, limites=estado_mapa.get('bounds'),
+                    backend=backend, chave_filtros=(dataset_version(CSV_PADRAO), sorted(country_options)))
     
+with st.container():
+    st.subheader("📍 Restaurantes próximos")
+    if df1.empty:
+        st.info("Selecione ao menos um país para buscar restaurantes próximos.")
+    else:
+        c1, c2, c3 = st.columns(3)
+        with c1:
+            origem = st.radio("Ponto de partida", ['Cidade', 'Centro do mapa'], horizontal=True)
+            if origem == 'Centro do mapa' and estado_mapa.get('center'):
+                lat, lon = estado_mapa['center']['lat'], estado_mapa['center']['lng']
+                st.caption(f"Centro do mapa: {lat:.4f}, {lon:.4f}")
+            else:
+                cidade = st.selectbox("Cidade", sorted(df1['city'].unique()))
+                ponto = df1.loc[df1['city'] == cidade, ['latitude', 'longitude']].median()
+                lat, lon = float(ponto['latitude']), float(ponto['longitude'])
+        with c2:
+            modo = st.radio("Busca", ['Mais próximos', 'Dentro de um raio'], horizontal=True)
+            if modo == 'Mais próximos':
+                k, raio = st.slider("Quantidade", 1, 50, 10), None
+            else:
+                k, raio = None, st.slider("Raio (km)", 0.5, 50.0, 5.0, step=0.5)
+        with c3:
+            culinarias = st.multiselect("Culinárias", culinarias_disponiveis(df1))
+            faixas_preco = st.multiselect("Faixa de preço", [1, 2, 3, 4],
+                                          format_func=lambda p: PRICE_TYPES.get(p, 'Gourmet'))
+            nota_minima = st.slider("Nota mínima", 0.0, 5.0, 0.0, step=0.1)
+
+        proximos = buscar_proximos(df1, indice, lat, lon, k=k, raio_km=raio, culinarias=culinarias,
+                                   price_range=faixas_preco, nota_minima=nota_minima or None)
+        st.dataframe(
+            proximos.loc[:, ['restaurant_name', 'cuisines', 'city', 'aggregate_rating',
+                             'categoria_de_comida', 'distancia_km']].round({'distancia_km': 2}),
+            hide_index=True, use_container_width=True)
+
 with st.container():    
     st.markdown(dedent("""
     ### Como usar este Dashboard
@@ -122,3 +142,5 @@ with st.container():
         st.page_link("pages/2_Cidades.py", label="🏙️ Visão Cidades", icon=":material/trending_up:")
     with c3:
         st.page_link("pages/3_Cozinhas.py", label="🍽️ Visão Cozinhas", icon=":material/restaurant:")
+
+perf.painel()
@@ -0,0 +1,134 @@
+"""
+Teste de carga da API local (modules.api): dispara --requisicoes GETs com --concorrencia
+clientes simultâneos e mostra requisições por segundo e latências (p50, p95, p99).
+
+Sem --url, sobe o servidor num processo à parte (para não disputar o GIL com os
+clientes) numa porta livre, espera o carregamento dos dados e o encerra no fim.
+As URLs sorteiam endpoint e filtros (países, culinária) com a --seed; com --cache-mb 0
+o servidor recalcula toda resposta, sem o cache.
+
+Uso: python benchmarks/bench_api.py [--requisicoes 2000] [--concorrencia 16] [--trabalhadores 8]
+                                    [--cache-mb 0] [--url http://127.0.0.1:8502] [--saida api.json]
+"""
+import argparse
+import json
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import urlencode
+
+import numpy as np
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+PAISES = ['Philippines', 'Brazil', 'Australia', 'USA', 'Canada', 'Singapure', 'United Arab Emirates',
+          'India', 'Indonesia', 'New Zeland', 'England', 'Qatar', 'South Africa', 'Sri Lanka', 'Turkey']
+CULINARIAS = ['Italian', 'American', 'Arabian', 'Japanese', 'Brazilian', 'Home-made', 'Chinese', 'Pizza']
+ENDPOINTS = ['ranking_cidades', 'dataframe_paises', 'valores_paises', 'ranking_restaurantes_cuisine']
+
+
+def urls(base, n, seed):
+    ''' n caminhos com endpoint e filtros sorteados (até 3 países; uma culinária quando o endpoint pede). '''
+    rng = np.random.default_rng(seed)
+    caminhos = []
+    for _ in range(n):
+        endpoint = ENDPOINTS[rng.integers(len(ENDPOINTS))]
+        parametros = [('pais', p) for p in rng.choice(PAISES, rng.integers(0, 4), replace=False)]
+        if endpoint == 'ranking_restaurantes_cuisine':
+            parametros.append(('culinaria', CULINARIAS[rng.integers(len(CULINARIAS))]))
+        caminhos.append(f"{base}/{endpoint}?{urlencode(parametros)}")
+    return caminhos
+
+
+def requisitar(url):
+    ''' (status, segundos) de um GET; status 0 em erro de conexão. '''
+    inicio = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=60) as resposta:
+            resposta.read()
+            status = resposta.status
+    except urllib.error.HTTPError as erro:
+        status = erro.code
+    except OSError:
+        status = 0
+    return status, time.perf_counter() - inicio
+
+
+def porta_livre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def subir_servidor(trabalhadores, cache_mb, espera=120):
+    ''' Servidor em outro processo; devolve (processo, url base) quando ele responde. '''
+    porta = porta_livre()
+    processo = subprocess.Popen([sys.executable, '-m', 'modules.api', '--porta', str(porta),
+                                 '--trabalhadores', str(trabalhadores), '--cache-mb', str(cache_mb),
+                                 '--silencioso'], cwd=RAIZ, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base = f"http://127.0.0.1:{porta}"
+    limite = time.monotonic() + espera
+    while time.monotonic() < limite:
+        if processo.poll() is not None:
+            raise RuntimeError("O servidor da API encerrou durante o carregamento.")
+        if requisitar(base + '/')[0] == 200:
+            return processo, base
+        time.sleep(0.2)
+    processo.terminate()
+    raise RuntimeError(f"O servidor da API não respondeu em {espera} s.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requisicoes', type=int, default=2000)
+    parser.add_argument('--concorrencia', type=int, default=16)
+    parser.add_argument('--trabalhadores', type=int, default=8, help="pool do servidor (sem --url)")
+    parser.add_argument('--cache-mb', type=float, default=16, help="cache de respostas do servidor (sem --url)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--url', default=None, help="API já em execução (não sobe servidor)")
+    parser.add_argument('--saida', type=Path, default=None)
+    args = parser.parse_args()
+
+    processo = None
+    if args.url:
+        base = args.url.rstrip('/')
+    else:
+        processo, base = subir_servidor(args.trabalhadores, args.cache_mb)
+    try:
+        caminhos = urls(base, args.requisicoes, args.seed)
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(args.concorrencia) as pool:
+            resultados = list(pool.map(requisitar, caminhos))
+        total = time.perf_counter() - inicio
+    finally:
+        if processo is not None:
+            processo.terminate()
+            processo.wait()
+
+    status = np.array([s for s, _ in resultados])
+    latencias = np.array([t for _, t in resultados]) * 1000
+    p50, p95, p99 = np.percentile(latencias, [50, 95, 99])
+    resumo = {'requisicoes': len(resultados), 'concorrencia': args.concorrencia,
+              'trabalhadores': None if args.url else args.trabalhadores,
+              'cache_mb': None if args.url else args.cache_mb,
+              'erros': int((status != 200).sum()), 'tempo_s': total,
+              'req_por_s': len(resultados) / total, 'p50_ms': p50, 'p95_ms': p95, 'p99_ms': p99}
+    print(f"{resumo['requisicoes']} requisições, {args.concorrencia} clientes: "
+          f"{resumo['req_por_s']:.1f} req/s em {total:.2f} s ({resumo['erros']} erros)")
+    print(f"latência p50 {p50:.1f} ms · p95 {p95:.1f} ms · p99 {p99:.1f} ms")
+
+    if args.saida:
+        relatorio = {'gerado_em': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                     'python': sys.version.split()[0], **resumo}
+        args.saida.write_text(json.dumps(relatorio, indent=2, ensure_ascii=False), encoding='utf-8')
+        print(f"Resultados gravados em {args.saida}")
+
+
+if __name__ == '__main__':
+    main()
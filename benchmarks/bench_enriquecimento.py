@@ -0,0 +1,61 @@
+"""
+Compara o enriquecimento linha a linha (Series.apply) com as versões
+vetorizadas de modules/cleaning.py.
+
+Uso: python benchmarks/bench_enriquecimento.py [n_linhas]
+"""
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from modules.cleaning import (  # noqa: E402
+    color_name, country_name, create_price_type, limpar_dataframe,
+    mapear_categorias_preco, mapear_cores, mapear_paises, primeira_culinaria,
+    rename_columns,
+)
+from modules.synthetic import gerar  # noqa: E402
+
+
+def base_escalada(n, seed=42):
+    ''' Colunas usadas no enriquecimento, em n restaurantes sintéticos (modules.synthetic). '''
+    cols = ['country_code', 'price_range', 'rating_color', 'cuisines']
+    df = limpar_dataframe(rename_columns(gerar(n, seed=seed)), dropna_mode='any')
+    return df.loc[:, cols].reset_index(drop=True)
+
+
+def cronometrar(func, repeticoes=3):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = func()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos), resultado
+
+
+def main(n=1_000_000):
+    df = base_escalada(n)
+    casos = [
+        ('country_name', lambda: df['country_code'].apply(country_name),
+                         lambda: mapear_paises(df['country_code'])),
+        ('price_type',   lambda: df['price_range'].apply(create_price_type),
+                         lambda: mapear_categorias_preco(df['price_range'])),
+        ('color_name',   lambda: df['rating_color'].apply(color_name),
+                         lambda: mapear_cores(df['rating_color'])),
+        ('cuisines',     lambda: df['cuisines'].apply(lambda x: x.split(",")[0]),
+                         lambda: primeira_culinaria(df['cuisines'])),
+    ]
+    print(f"{n:,} linhas")
+    print(f"{'coluna':<14}{'apply (s)':>12}{'vetorizado (s)':>16}{'speedup':>10}")
+    for nome, linha_a_linha, vetorizado in casos:
+        t_apply, esperado = cronometrar(linha_a_linha)
+        t_vet, obtido = cronometrar(vetorizado)
+        pd.testing.assert_series_equal(esperado, obtido, check_names=False)
+        print(f"{nome:<14}{t_apply:>12.3f}{t_vet:>16.3f}{t_apply / t_vet:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
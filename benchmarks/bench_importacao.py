@@ -0,0 +1,81 @@
+"""
+Custo de importação (cold start) de cada página: executa só as importações
+de topo do arquivo num interpretador novo com python -X importtime e soma o
+tempo acumulado dos módulos importados.
+
+Para cada página mostra o total, os pacotes mais caros e quais módulos pesados
+(plotly.express, folium, streamlit_folium, pydeck) foram carregados já na importação.
+O melhor de --repeticoes execuções vai para o JSON de --saida, para acompanhar a evolução.
+
+Uso: python benchmarks/bench_importacao.py [Home.py pages/1_País.py ...] [--repeticoes 5] [--saida importacao.json]
+"""
+import argparse
+import ast
+import json
+import re
+import subprocess
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+PESADOS = ['plotly.express', 'folium', 'folium.plugins', 'streamlit_folium', 'pydeck']
+
+# "import time:  self [us] |  cumulative |  módulo" (o recuo do nome indica a profundidade)
+LINHA = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def importacoes(pagina):
+    ''' Código com só as importações de topo da página. '''
+    arvore = ast.parse(Path(pagina).read_text(encoding='utf-8'))
+    return '\n'.join(ast.unparse(no) for no in arvore.body if isinstance(no, (ast.Import, ast.ImportFrom)))
+
+
+def medir(pagina):
+    ''' Uma execução: {módulo de topo: µs acumulados} e o conjunto de módulos carregados. '''
+    saida = subprocess.run([sys.executable, '-X', 'importtime', '-c', importacoes(pagina)],
+                           cwd=RAIZ, capture_output=True, text=True, check=True).stderr
+    topo, carregados = {}, set()
+    for linha in saida.splitlines():
+        m = LINHA.match(linha)
+        if not m:
+            continue
+        acumulado, recuo, modulo = int(m.group(2)), len(m.group(3)), m.group(4)
+        carregados.add(modulo)
+        if recuo == 1:
+            topo[modulo] = acumulado
+    return topo, carregados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('paginas', nargs='*', type=Path,
+                        default=[RAIZ / 'Home.py', *sorted((RAIZ / 'pages').glob('*.py'))])
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--top', type=int, default=5)
+    parser.add_argument('--saida', type=Path, default=None)
+    args = parser.parse_args()
+
+    resultados = []
+    for pagina in args.paginas:
+        execucoes = [medir(pagina) for _ in range(args.repeticoes)]
+        topo, carregados = min(execucoes, key=lambda e: sum(e[0].values()))
+        total = sum(topo.values()) / 1e6
+        pesados = [m for m in PESADOS if m in carregados]
+        mais_caros = sorted(topo.items(), key=lambda kv: -kv[1])[:args.top]
+        resultados.append({'pagina': Path(pagina).name, 'total_s': total, 'pesados': pesados,
+                           'mais_caros': {m: us / 1e6 for m, us in mais_caros}})
+        print(f"{Path(pagina).name:<18} {total:>7.3f} s   pesados: {', '.join(pesados) or '-'}")
+        for modulo, us in mais_caros:
+            print(f"    {modulo:<30} {us / 1e6:>7.3f} s")
+
+    if args.saida:
+        relatorio = {'gerado_em': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                     'python': sys.version.split()[0], 'repeticoes': args.repeticoes, 'resultados': resultados}
+        args.saida.write_text(json.dumps(relatorio, indent=2, ensure_ascii=False), encoding='utf-8')
+        print(f"\nResultados gravados em {args.saida}")
+
+
+if __name__ == '__main__':
+    main()
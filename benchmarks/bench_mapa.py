@@ -0,0 +1,55 @@
+"""
+Compara o mapa folium (um marcador Leaflet por restaurante) com a camada
+WebGL (pydeck) em tamanho do payload enviado ao navegador e tempo de montagem.
+
+O folium é medido só até --max-folium pontos (acima disso o HTML fica inviável);
+o WebGL roda em todos os tamanhos pedidos.
+
+Uso: python benchmarks/bench_mapa.py [n_linhas ...] [--max-folium N]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from modules.charts import mapa_folium, mapa_webgl, pontos_mapa  # noqa: E402
+from modules.cleaning import preparar_restaurantes  # noqa: E402
+from modules.synthetic import gerar  # noqa: E402
+
+COLUNAS = ['latitude', 'longitude', 'restaurant_name', 'aggregate_rating',
+           'cuisines', 'city', 'country_name', 'color']
+
+
+def base_escalada(n, seed=42):
+    ''' n restaurantes sintéticos (modules.synthetic), já limpos e enriquecidos. '''
+    return pontos_mapa(preparar_restaurantes(gerar(n, seed=seed)), COLUNAS)
+
+
+def medir(montar, serializar):
+    inicio = time.perf_counter()
+    payload = serializar(montar())
+    return time.perf_counter() - inicio, len(payload.encode('utf-8'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('n', nargs='*', type=int, default=[5_000, 50_000, 500_000])
+    parser.add_argument('--max-folium', type=int, default=20_000)
+    args = parser.parse_args()
+
+    print(f"{'backend':<8} {'pontos':>9} {'montagem (s)':>13} {'payload (MB)':>13} {'bytes/ponto':>12}")
+    for n in args.n:
+        data = base_escalada(n)
+        casos = [('webgl', lambda: mapa_webgl(data), lambda d: d.to_json())]
+        if n <= args.max_folium:
+            casos.insert(0, ('folium', lambda: mapa_folium(data, color_col='color', cluster=False, max_points=None),
+                             lambda m: m.get_root().render()))
+        for nome, montar, serializar in casos:
+            segundos, tamanho = medir(montar, serializar)
+            print(f"{nome:<8} {n:>9,} {segundos:>13.2f} {tamanho / 1e6:>13.1f} {tamanho / n:>12.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,196 @@
+"""
+Suíte de benchmarks das funções públicas de limpeza, agregação, gráficos, mapa, busca e filtros
+em datasets escalados (por padrão 10k, 100k e 1M linhas; 10M só com --com-10m, que
+precisa de bem mais memória que a máquina de desenvolvimento costuma ter).
+
+Para cada caso e tamanho mede:
+- tempo_s: melhor tempo de parede entre as repetições (sem tracemalloc ativo)
+- pico_bytes: pico de memória alocada durante a chamada (tracemalloc, execução à parte)
+- blocos_retidos: saldo de blocos de memória alocados pela chamada que continuam vivos ao
+  fim dela, incluindo o resultado (tracemalloc); não é o total de alocações feitas
+
+O resultado vai para um JSON (--saida) e pode ser comparado com uma execução
+anterior (--comparar), marcando casos que ficaram mais lentos que --limiar.
+
+Uso: python benchmarks/bench_suite.py [--tamanhos 10000 100000] [--com-10m] [--casos agrupamento ...]
+                                      [--saida resultados.json] [--comparar anterior.json]
+"""
+import argparse
+import gc
+import inspect
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from modules import charts, cleaning  # noqa: E402
+from modules.cube import construir_cubo  # noqa: E402
+from modules.filters import construir_indice_filtros  # noqa: E402
+from modules.search import buscar_restaurantes, construir_indice_busca  # noqa: E402
+from modules.spatial import buscar_proximos, construir_indice  # noqa: E402
+from modules.synthetic import gerar  # noqa: E402
+
+TAMANHOS_PADRAO = [10_000, 100_000, 1_000_000]
+
+# só com --com-10m: o dataset sintético e seus derivados não cabem em poucos GB de memória
+TAMANHO_GRANDE = 10_000_000
+
+COLUNAS_MAPA = ['latitude', 'longitude', 'restaurant_name', 'aggregate_rating',
+                'cuisines', 'city', 'country_name', 'color']
+
+PAISES_FILTRO = ['India', 'Brazil', 'USA', 'England']
+
+
+def base_bruta(n, seed=42):
+    ''' n restaurantes sintéticos no esquema do zomato.csv (modules.synthetic). '''
+    return gerar(n, seed=seed)
+
+
+def preparar_dados(n, seed=42):
+    ''' Entradas compartilhadas pelos casos: bruto, renomeado, limpo e derivados. '''
+    bruto = base_bruta(n, seed)
+    renomeado = cleaning.rename_columns(bruto.copy())
+    limpo = cleaning.preparar_restaurantes(bruto.copy())
+    return {
+        'bruto': bruto,
+        'renomeado': renomeado,
+        'limpo': limpo,
+        'cubo': construir_cubo(limpo),
+        'indice': construir_indice(limpo),
+        'pontos': charts.pontos_mapa(limpo, COLUNAS_MAPA),
+        'busca': construir_indice_busca(limpo),
+        'filtros': construir_indice_filtros(limpo),
+    }
+
+
+# nome do caso -> função(dados) que executa a chamada medida
+CASOS = {
+    # limpeza
+    'rename_columns': lambda d: cleaning.rename_columns(d['bruto'].copy()),
+    'limpar_dataframe': lambda d: cleaning.limpar_dataframe(d['renomeado'], dropna_mode='any'),
+    'remover_duplicatas': lambda d: cleaning.remover_duplicatas(d['renomeado'], subset='restaurant_id'),
+    'mapear_paises': lambda d: cleaning.mapear_paises(d['renomeado']['country_code']),
+    'mapear_categorias_preco': lambda d: cleaning.mapear_categorias_preco(d['renomeado']['price_range']),
+    'mapear_cores': lambda d: cleaning.mapear_cores(d['renomeado']['rating_color']),
+    'primeira_culinaria': lambda d: cleaning.primeira_culinaria(d['renomeado']['cuisines']),
+    'converter_usd': lambda d: cleaning.converter_usd(d['limpo'].copy()),
+    'aplicar_schema': lambda d: cleaning.aplicar_schema(d['limpo'].astype({'city': object, 'cuisines': object})),
+    'preparar_restaurantes': lambda d: cleaning.preparar_restaurantes(d['bruto'].copy()),
+    # agregação e tabelas
+    'agrupamento': lambda d: charts.agrupamento(d['limpo'], agrupador='country_name',
+                                                alvo='aggregate_rating', operacao='mean'),
+    'lideres_por_grupo': lambda d: charts.lideres_por_grupo(
+        d['limpo'], agrupador='country_name',
+        metricas=[('restaurant_id', 'nunique'), ('aggregate_rating', 'mean')]),
+    'dataframe_paises': lambda d: charts.dataframe_paises(d['limpo']),
+    'ranking_cidades': lambda d: charts.ranking_cidades(d['limpo']),
+    'rankings_cidades': lambda d: charts.rankings_cidades(
+        d['limpo'], {'todas': None, 'nota_4': d['limpo']['aggregate_rating'] > 4}),
+    'ranking_restaurantes_cuisine': lambda d: charts.ranking_restaurantes_cuisine(d['limpo'], 'Italian'),
+    'dataframe_restaurantes': lambda d: charts.dataframe_restaurantes(d['limpo']),
+    'construir_cubo': lambda d: construir_cubo(d['limpo']),
+    'dataframe_paises_cubo': lambda d: charts.dataframe_paises(d['cubo']),
+    'votos_distintos_cubo': lambda d: d['cubo'].agregar('country_name', votos=('votes', 'nunique')),
+    # gráficos (sem o cache de figuras nem a instrumentação)
+    'grafico_avaliacao_maiores': lambda d: inspect.unwrap(charts.grafico_avaliacao_maiores)(d['limpo']),
+    'grafico_notas_culinarias': lambda d: inspect.unwrap(charts.grafico_notas_culinarias)(d['limpo']),
+    # mapa e consultas espaciais
+    'pontos_mapa': lambda d: charts.pontos_mapa(d['limpo'], COLUNAS_MAPA),
+    'agrupar_em_grade': lambda d: charts.agrupar_em_grade(d['pontos'], 5),
+    'construir_indice': lambda d: construir_indice(d['limpo']),
+    'buscar_proximos': lambda d: buscar_proximos(d['limpo'], d['indice'], 28.6, 77.2, k=20),
+    # busca textual
+    'construir_indice_busca': lambda d: construir_indice_busca(d['limpo']),
+    'buscar_restaurantes': lambda d: buscar_restaurantes(d['limpo'], d['busca'], 'new del', 10),
+    # filtros da barra lateral: máscara + cópia contra bitmaps pré-calculados
+    'filtrar_isin': lambda d: d['limpo'].loc[d['limpo']['country_name'].isin(PAISES_FILTRO)
+                                             & (d['limpo']['price_range'] == 4)],
+    'construir_indice_filtros': lambda d: construir_indice_filtros(d['limpo']),
+    'filtrar_bitmaps': lambda d: d['filtros'].recorte(
+        d['limpo'], d['filtros'].algum('country_name', PAISES_FILTRO) & d['filtros'].algum('price_range', [4])),
+}
+
+
+def medir(func, dados, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        gc.collect()
+        inicio = time.perf_counter()
+        func(dados)
+        tempos.append(time.perf_counter() - inicio)
+
+    gc.collect()
+    tracemalloc.start()
+    antes = tracemalloc.take_snapshot()
+    resultado = func(dados)
+    _, pico = tracemalloc.get_traced_memory()
+    depois = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    blocos_retidos = sum(s.count_diff for s in depois.compare_to(antes, 'filename'))
+    del resultado
+    return {'tempo_s': min(tempos), 'pico_bytes': pico, 'blocos_retidos': blocos_retidos}
+
+
+def comparar(resultados, anterior, limiar):
+    ''' Lista os casos que ficaram mais de `limiar` (fração) mais lentos que na execução anterior. '''
+    antes = {(r['caso'], r['linhas']): r for r in anterior['resultados']}
+    regressoes = []
+    for r in resultados:
+        base = antes.get((r['caso'], r['linhas']))
+        if base and base['tempo_s'] > 0 and r['tempo_s'] > base['tempo_s'] * (1 + limiar):
+            regressoes.append((r['caso'], r['linhas'], base['tempo_s'], r['tempo_s']))
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tamanhos', nargs='+', type=int, default=TAMANHOS_PADRAO)
+    parser.add_argument('--com-10m', action='store_true', help=f"inclui {TAMANHO_GRANDE:,} linhas nos tamanhos")
+    parser.add_argument('--casos', nargs='+', choices=sorted(CASOS), default=list(CASOS))
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--saida', type=Path, default=Path('bench_resultados.json'))
+    parser.add_argument('--comparar', type=Path, default=None, help="JSON de uma execução anterior")
+    parser.add_argument('--limiar', type=float, default=0.2, help="fração de piora tolerada (padrão 20%%)")
+    args = parser.parse_args()
+
+    tamanhos = args.tamanhos + ([TAMANHO_GRANDE] if args.com_10m and TAMANHO_GRANDE not in args.tamanhos else [])
+    resultados = []
+    print(f"{'caso':<30} {'linhas':>11} {'tempo (s)':>10} {'pico (MB)':>10} {'retidos':>10}")
+    for n in tamanhos:
+        dados = preparar_dados(n, args.seed)
+        for caso in args.casos:
+            r = {'caso': caso, 'linhas': n, **medir(CASOS[caso], dados, args.repeticoes)}
+            resultados.append(r)
+            print(f"{caso:<30} {n:>11,} {r['tempo_s']:>10.4f} {r['pico_bytes'] / 1e6:>10.1f} {r['blocos_retidos']:>10,}")
+        del dados
+
+    relatorio = {
+        'gerado_em': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'ambiente': {'python': platform.python_version(), 'pandas': pd.__version__,
+                     'numpy': np.__version__, 'plataforma': platform.platform()},
+        'repeticoes': args.repeticoes,
+        'seed': args.seed,
+        'resultados': resultados,
+    }
+    args.saida.write_text(json.dumps(relatorio, indent=2, ensure_ascii=False), encoding='utf-8')
+    print(f"\nResultados gravados em {args.saida}")
+
+    if args.comparar:
+        regressoes = comparar(resultados, json.loads(args.comparar.read_text(encoding='utf-8')), args.limiar)
+        for caso, n, antes, depois in regressoes:
+            print(f"REGRESSÃO {caso} ({n:,} linhas): {antes:.4f}s -> {depois:.4f}s")
+        if regressoes:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,220 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from modules.cache import CacheLRU, chave_cache
+from modules.charts import agrupamento, dataframe_paises, ranking_cidades, ranking_restaurantes_cuisine
+from modules.data import (
+    CSV_PADRAO, dataset_version, load_cubo, load_indice_filtros, load_restaurants,
+    sem_avisos_de_contexto,
+)
+
+HOST_PADRAO = '127.0.0.1'
+PORTA_PADRAO = 8502
+TRABALHADORES_PADRAO = 8
+
+# Respostas JSON já serializadas, por (endpoint, versão do dataset, parâmetros)
+CACHE_RESPOSTAS_BYTES = 16 * 1024 * 1024
+
+
+def _lista(parametros, nome):
+    ''' Valores de um parâmetro repetido ou separado por vírgula (?pais=India&pais=Brazil ou ?pais=India,Brazil). '''
+    return [v.strip() for valor in parametros.get(nome, []) for v in valor.split(',') if v.strip()]
+
+
+def _inteiro(parametros, nome, padrao, minimo=None):
+    valores = parametros.get(nome)
+    if not valores:
+        return padrao
+    try:
+        valor = int(valores[-1])
+    except ValueError:
+        raise ValueError(f"Parâmetro '{nome}' deve ser inteiro.") from None
+    if minimo is not None and valor < minimo:
+        raise ValueError(f"Parâmetro '{nome}' deve ser no mínimo {minimo}.")
+    return valor
+
+
+def _cubo(caminho, paises):
+    cubo = load_cubo(caminho)
+    return cubo.filtrar(cubo['country_name'].isin(paises)) if paises else cubo
+
+
+def _restaurantes(caminho, paises):
+    df = load_restaurants(caminho)
+    if not paises:
+        return df
+    indice = load_indice_filtros(caminho)
+    return indice.recorte(df, indice.algum('country_name', paises))
+
+
+def api_ranking_cidades(caminho, parametros):
+    ''' Cidades com mais restaurantes. Parâmetros: pais (vários), limite (10). '''
+    df = ranking_cidades(_cubo(caminho, _lista(parametros, 'pais'))).drop(columns='index')
+    return df.head(_inteiro(parametros, 'limite', 10, minimo=1))
+
+
+def api_dataframe_paises(caminho, parametros):
+    ''' Restaurantes, culinárias e média de avaliações por país. Parâmetros: pais (vários). '''
+    return dataframe_paises(_cubo(caminho, _lista(parametros, 'pais')))
+
+
+def api_valores_paises(caminho, parametros):
+    ''' Valor médio para duas pessoas (valor_usd) por país. Parâmetros: pais (vários). '''
+    df = agrupamento(_cubo(caminho, _lista(parametros, 'pais')),
+                     agrupador='country_name', alvo='valor_usd', operacao='mean')
+    return df.sort_values('valor_usd', ascending=False).round({'valor_usd': 2}).reset_index(drop=True)
+
+
+def api_ranking_restaurantes_cuisine(caminho, parametros):
+    """
+    Melhores (ou piores) restaurantes de uma culinária. Parâmetros: culinaria (obrigatório),
+    pais (vários), criterio (max | min), min_votes (4), limite (10).
+    """
+    culinarias = _lista(parametros, 'culinaria')
+    if len(culinarias) != 1:
+        raise ValueError("Informe uma culinária: ?culinaria=Italian")
+    criterio = parametros.get('criterio', ['max'])[-1]
+    if criterio not in ('max', 'min'):
+        raise ValueError("Parâmetro 'criterio' deve ser 'max' ou 'min'.")
+    df = ranking_restaurantes_cuisine(_restaurantes(caminho, _lista(parametros, 'pais')), culinarias[0],
+                                      criterio=criterio, min_votes=_inteiro(parametros, 'min_votes', 4, minimo=0))
+    # a coluna help é o texto do tooltip do Streamlit
+    return df.drop(columns='help').head(_inteiro(parametros, 'limite', 10, minimo=1))
+
+
+# caminho da URL -> função(caminho do CSV, parâmetros) que devolve o dataframe da resposta
+ENDPOINTS = {
+    'ranking_cidades': api_ranking_cidades,
+    'dataframe_paises': api_dataframe_paises,
+    'valores_paises': api_valores_paises,
+    'ranking_restaurantes_cuisine': api_ranking_restaurantes_cuisine,
+}
+
+
+class ManipuladorAPI(BaseHTTPRequestHandler):
+    """
+    GET /<endpoint>?parametros -> {"endpoint", "geracao", "parametros", "linhas", "dados"}
+    com dados no formato records. GET / lista os endpoints. Erros de parâmetro
+    respondem 400, endpoints desconhecidos 404 e falhas do endpoint 500, sempre com {"erro": ...}.
+    """
+    server_version = 'FomeZeroAPI/1.0'
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        nome = url.path.strip('/')
+        if not nome:
+            return self._responder(HTTPStatus.OK, json.dumps(
+                {nome: ' '.join(func.__doc__.split()) for nome, func in ENDPOINTS.items()},
+                ensure_ascii=False).encode('utf-8'))
+        if nome not in ENDPOINTS:
+            return self._erro(HTTPStatus.NOT_FOUND, f"Endpoint '{nome}' não existe.")
+        parametros = parse_qs(url.query)
+        try:
+            corpo = self.server.responder(nome, parametros)
+        except ValueError as erro:
+            return self._erro(HTTPStatus.BAD_REQUEST, str(erro))
+        except Exception as erro:
+            # qualquer outra falha do endpoint ainda vira resposta (e não conexão derrubada)
+            self.log_error("Erro em /%s: %r", nome, erro)
+            return self._erro(HTTPStatus.INTERNAL_SERVER_ERROR, f"Erro interno: {type(erro).__name__}: {erro}")
+        self._responder(HTTPStatus.OK, corpo)
+
+    def _erro(self, status, mensagem):
+        self._responder(status, json.dumps({'erro': mensagem}, ensure_ascii=False).encode('utf-8'))
+
+    def _responder(self, status, corpo):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, formato, *args):
+        if not self.server.silencioso:
+            super().log_message(formato, *args)
+
+
+class ServidorAPI(HTTPServer):
+    """
+    Servidor HTTP dos agregados do dashboard. As conexões são atendidas por um
+    pool fixo de `trabalhadores` threads (em vez de uma thread por conexão), e
+    todas compartilham o dataset, o cubo e os índices carregados uma vez por
+    versão (modules.data). As respostas ficam num CacheLRU; um delta aplicado
+    muda a versão e, com ela, a chave.
+    """
+    request_queue_size = 128
+
+    def __init__(self, endereco=(HOST_PADRAO, PORTA_PADRAO), *, trabalhadores=TRABALHADORES_PADRAO,
+                 caminho=CSV_PADRAO, cache_bytes=CACHE_RESPOSTAS_BYTES, silencioso=False):
+        super().__init__(endereco, ManipuladorAPI)
+        self.caminho = caminho
+        self.cache = CacheLRU(cache_bytes)
+        self.silencioso = silencioso
+        self.pool = ThreadPoolExecutor(trabalhadores, thread_name_prefix='api')
+
+    def carregar(self):
+        ''' Carrega dataset, cubo e índice de filtros antes da primeira requisição. '''
+        load_restaurants(self.caminho)
+        load_cubo(self.caminho)
+        load_indice_filtros(self.caminho)
+
+    def responder(self, nome, parametros):
+        ''' Corpo JSON (bytes) da resposta do endpoint, do cache quando possível. '''
+        versao = dataset_version(self.caminho)
+        chave = chave_cache(nome, versao, {k: sorted(v) for k, v in parametros.items()})
+        corpo = self.cache.get(chave)
+        if corpo is None:
+            df = ENDPOINTS[nome](self.caminho, parametros)
+            corpo = json.dumps({
+                'endpoint': nome,
+                'geracao': versao[3],
+                'parametros': parametros,
+                'linhas': len(df),
+                'dados': json.loads(df.to_json(orient='records', force_ascii=False)),
+            }, ensure_ascii=False).encode('utf-8')
+            self.cache.put(chave, corpo)
+        return corpo
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._atender, request, client_address)
+
+    def _atender(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=True)
+
+
+if __name__ == '__main__':
+    # API local: python -m modules.api [--porta 8502] [--trabalhadores 8]
+    import argparse
+    from pathlib import Path
+    sem_avisos_de_contexto()
+    parser = argparse.ArgumentParser(description="Serve os agregados do dashboard como JSON.")
+    parser.add_argument('--host', default=HOST_PADRAO)
+    parser.add_argument('--porta', type=int, default=PORTA_PADRAO)
+    parser.add_argument('--trabalhadores', type=int, default=TRABALHADORES_PADRAO)
+    parser.add_argument('--csv', type=Path, default=CSV_PADRAO)
+    parser.add_argument('--cache-mb', type=float, default=CACHE_RESPOSTAS_BYTES / 2**20,
+                        help="tamanho do cache de respostas (0 desliga)")
+    parser.add_argument('--silencioso', action='store_true', help="não registra cada requisição")
+    args = parser.parse_args()
+    servidor = ServidorAPI((args.host, args.porta), trabalhadores=args.trabalhadores, caminho=args.csv,
+                           cache_bytes=args.cache_mb * 2**20, silencioso=args.silencioso)
+    servidor.carregar()
+    print(f"API em http://{args.host}:{servidor.server_port}/ ({args.trabalhadores} trabalhadores)", flush=True)
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
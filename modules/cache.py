@@ -0,0 +1,99 @@
+import hashlib
+import sys
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+
+def tamanho_em_bytes(valor):
+    ''' Estimativa do tamanho em memória de um valor guardado no cache. '''
+    if isinstance(valor, (bytes, bytearray, memoryview)):
+        return len(valor)
+    if isinstance(valor, str):
+        return len(valor.encode('utf-8'))
+    if isinstance(valor, pd.DataFrame):
+        return int(valor.memory_usage(deep=True).sum())
+    if isinstance(valor, pd.Series):
+        return int(valor.memory_usage(deep=True))
+    if isinstance(valor, dict):
+        return sys.getsizeof(valor) + sum(tamanho_em_bytes(k) + tamanho_em_bytes(v) for k, v in valor.items())
+    if isinstance(valor, (list, tuple)):
+        return sys.getsizeof(valor) + sum(tamanho_em_bytes(v) for v in valor)
+    return sys.getsizeof(valor)
+
+
+def chave_cache(*partes):
+    ''' Hash estável das partes da chave (listas/conjuntos entram ordenados). '''
+    def normalizar(p):
+        if isinstance(p, (set, frozenset)):
+            return tuple(sorted(map(normalizar, p), key=repr))
+        if isinstance(p, (list, tuple)):
+            return tuple(normalizar(x) for x in p)
+        if isinstance(p, dict):
+            return tuple(sorted((str(k), normalizar(v)) for k, v in p.items()))
+        return p
+    return hashlib.blake2b(repr(normalizar(partes)).encode('utf-8'), digest_size=16).hexdigest()
+
+
+def impressao_dataframe(df):
+    ''' Impressão digital do conteúdo (valores e índice) de um dataframe. '''
+    linhas = pd.util.hash_pandas_object(df, index=True).to_numpy()
+    return hashlib.blake2b(linhas.tobytes() + repr(list(df.columns)).encode('utf-8'), digest_size=16).hexdigest()
+
+
+class CacheLRU:
+    """
+    Cache LRU limitado pelo total de bytes dos valores (não pela quantidade de itens).
+    - get(chave): devolve o valor (ou default) e conta hit/miss
+    - put(chave, valor, tamanho=None): guarda e descarta os menos usados até caber
+    Um valor maior que max_bytes não é guardado. Seguro entre threads (sessões do Streamlit).
+    """
+    def __init__(self, max_bytes):
+        self.max_bytes = int(max_bytes)
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._itens)
+
+    def __contains__(self, chave):
+        return chave in self._itens
+
+    def get(self, chave, default=None):
+        with self._lock:
+            if chave in self._itens:
+                self._itens.move_to_end(chave)
+                self.hits += 1
+                return self._itens[chave][0]
+            self.misses += 1
+            return default
+
+    def put(self, chave, valor, tamanho=None):
+        tamanho = tamanho_em_bytes(valor) if tamanho is None else int(tamanho)
+        with self._lock:
+            if chave in self._itens:
+                self.bytes -= self._itens.pop(chave)[1]
+            if tamanho > self.max_bytes:
+                return valor
+            self._itens[chave] = (valor, tamanho)
+            self.bytes += tamanho
+            while self.bytes > self.max_bytes:
+                _, (_, tam) = self._itens.popitem(last=False)
+                self.bytes -= tam
+        return valor
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+            self.bytes = 0
+
+    def estatisticas(self):
+        ''' hits, misses, taxa de acerto, itens e bytes ocupados. '''
+        total = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'itens': len(self._itens), 'bytes': self.bytes, 'max_bytes': self.max_bytes}
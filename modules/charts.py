@@ -1,24 +1,170 @@
 import pandas as pd
 import numpy as np
-import inflection
-import plotly.express as px
+import functools
+import threading
 from typing import Optional
 import streamlit as st
-import folium
-from folium.plugins import MarkerCluster
-from streamlit_folium import st_folium
+from modules.cube import Cubo
+from modules.cuisines import COLUNA_CULINARIAS, agregar_por_culinaria, mascara_culinarias
+from modules.cache import CacheLRU, chave_cache, impressao_dataframe, tamanho_em_bytes
+from modules.perf import anotar_bytes, ativo, medido
 
+# plotly.express, folium, streamlit_folium e pydeck são importados dentro das funções
+# que os usam: uma página só paga a importação do que de fato desenha.
+
+# Figuras já montadas (JSON do plotly), por função + filtros + parâmetros
+CACHE_FIGURAS = CacheLRU(32 * 1024 * 1024)
+_USO_FIGURAS = {}
+
+def _normalizar_argumento(valor):
+    ''' Dataframes, séries, arrays e cubos entram na chave pela impressão digital do conteúdo. '''
+    if isinstance(valor, Cubo):
+        valor = valor.dados
+    if isinstance(valor, pd.Series):
+        valor = valor.to_frame()
+    if isinstance(valor, pd.DataFrame):
+        return impressao_dataframe(valor)
+    if isinstance(valor, np.ndarray):
+        return impressao_dataframe(pd.DataFrame({'v': valor.ravel()}))
+    return valor
+
+def figura_em_cache(func):
+    """
+    Memoiza um gráfico: guarda a figura serializada no CACHE_FIGURAS (LRU em bytes)
+    e devolve uma figura nova a partir do JSON a cada chamada.
+    A chave é (nome da função, chave_filtros, parâmetros). chave_filtros deve identificar
+    a versão do dataset e os filtros da página; sem ela, o gráfico é montado sem cache
+    (calcular a impressão digital do dataframe custaria quase o mesmo que o gráfico).
+    """
+    @functools.wraps(func)
+    def embrulho(df, *args, chave_filtros=None, **kwargs):
+        if chave_filtros is None:
+            return func(df, *args, **kwargs)
+        import plotly.io as pio
+        chave = chave_cache(func.__name__, chave_filtros, [_normalizar_argumento(a) for a in args],
+                            {k: _normalizar_argumento(v) for k, v in kwargs.items()})
+        uso = _USO_FIGURAS.setdefault(func.__name__, {'hits': 0, 'misses': 0})
+        texto = CACHE_FIGURAS.get(chave)
+        if texto is None:
+            uso['misses'] += 1
+            texto = CACHE_FIGURAS.put(chave, func(df, *args, **kwargs).to_json())
+        else:
+            uso['hits'] += 1
+        anotar_bytes(len(texto))   # o JSON já guardado: a figura não é serializada de novo para medir
+        return pio.from_json(texto)
+    return embrulho
+
+def estatisticas_figuras():
+    ''' hits, misses e taxa de acerto de cada gráfico memoizado. '''
+    return {nome: {**uso, 'hit_rate': uso['hits'] / (uso['hits'] + uso['misses'])}
+            for nome, uso in _USO_FIGURAS.items() if uso['hits'] + uso['misses']}
+
+def _agregar(df, chaves, linhas=None, **metricas):
+    """
+    groupby(chaves, as_index=False).agg(**metricas) sobre as linhas do dataframe,
+    ou rollup das células quando df é um Cubo (modules.cube).
+    """
+    if isinstance(df, Cubo):
+        return df.agregar(chaves, linhas=linhas, **metricas)
+    chaves = [chaves] if isinstance(chaves, str) else list(chaves)
+    cols = list(dict.fromkeys(chaves + [coluna for coluna, _ in metricas.values()]))
+    idx = linhas if linhas is not None else slice(None)
+    return df.loc[idx, cols].groupby(chaves, as_index=False, observed=True).agg(**metricas)
+
+@medido
 def agrupamento(df, *, agrupador: str, alvo: str, operacao: str, linhas=None):
     """
     Agrupa e ordena resultados por uma coluna específica.
+    Aceita o dataframe de restaurantes ou o Cubo pré-agregado.
     """
+    if isinstance(df, Cubo):
+        return df.agregar(agrupador, linhas=linhas, **{alvo: (alvo, operacao)})
     idx = linhas if linhas is not None else slice(None)
     df_sel = df.loc[idx, [agrupador, alvo]]
-    gb = df_sel.groupby(agrupador)[alvo]
+    gb = df_sel.groupby(agrupador, observed=True)[alvo]
     if not hasattr(gb, operacao):
         raise ValueError(f"Operação '{operacao}' inválida para GroupBy.")
     return getattr(gb, operacao)().reset_index(name=alvo)
 
+@medido
+def lideres_por_grupo(df, *, agrupador: str, metricas):
+    """
+    Calcula várias métricas por grupo de uma vez e devolve o grupo líder (maior valor) de cada uma.
+    - metricas: lista de (alvo, operacao) ou (alvo, operacao, linhas), onde linhas é uma
+      máscara booleana opcional que restringe só aquela métrica (ex.: df['price_range'] == 4)
+    Todas as métricas saem do mesmo groupby (um único agrupamento das linhas); depois só
+    a tabela pequena de grupos é ordenada, com o mesmo sort_values (e desempate) de antes.
+    Com um Cubo, as métricas saem do rollup das células (linhas: máscara sobre as células,
+    ex.: cubo['price_range'] == 4), um agregar por máscara distinta.
+    Retorna uma lista na mesma ordem de metricas (None quando a métrica não tem dados).
+    """
+    if isinstance(df, Cubo):
+        return _lideres_no_cubo(df, agrupador, metricas)
+    base = {agrupador: df[agrupador]}
+    especificacao, vazias = {}, set()
+    for i, metrica in enumerate(metricas):
+        alvo, operacao = metrica[0], metrica[1]
+        linhas = metrica[2] if len(metrica) > 2 else None
+        # fora da máscara o valor vira nulo e é ignorado pela agregação
+        base[f'm{i}'] = df[alvo] if linhas is None else df[alvo].where(linhas)
+        especificacao[f'm{i}'] = (f'm{i}', operacao)
+        if df.empty or (linhas is not None and not np.any(linhas)):
+            vazias.add(f'm{i}')
+    resultado = pd.DataFrame(base).groupby(agrupador, observed=True).agg(**especificacao)
+
+    lideres = []
+    for col in especificacao:
+        lideres.append(None if col in vazias else resultado[col].sort_values(ascending=False).index[0])
+    return lideres
+
+def _lideres_no_cubo(cubo, agrupador, metricas):
+    por_mascara = {}
+    for i, metrica in enumerate(metricas):
+        linhas = metrica[2] if len(metrica) > 2 else None
+        chave = None if linhas is None else np.asarray(linhas, dtype=bool).tobytes()
+        por_mascara.setdefault(chave, (linhas, {}))[1][f'm{i}'] = (metrica[0], metrica[1])
+    colunas = {}
+    for linhas, especificacao in por_mascara.values():
+        if linhas is not None and not np.any(linhas):
+            continue
+        resultado = cubo.agregar(agrupador, linhas=linhas, **especificacao).set_index(agrupador)
+        colunas.update({col: resultado[col] for col in especificacao})
+    lideres = []
+    for i in range(len(metricas)):
+        serie = colunas.get(f'm{i}')
+        lideres.append(None if serie is None or serie.empty else serie.sort_values(ascending=False).index[0])
+    return lideres
+
+def selecionar_top(df, by, ascending, n, fim='head'):
+    """
+    Mesmo resultado de df.sort_values(by, ascending=ascending).head(n) (ou .tail(n) com fim='tail'),
+    sem ordenar a tabela inteira: np.argpartition na primeira coluna separa os candidatos em O(len(df))
+    e só eles são ordenados. Todos os empates no limite entram como candidatos, então o desempate
+    pelas demais colunas (ex.: id_mais_antigo) sai igual ao da ordenação completa.
+    """
+    by = [by] if isinstance(by, str) else list(by)
+    ascending = [ascending] * len(by) if isinstance(ascending, bool) else list(ascending)
+    ordenar = lambda d: d.sort_values(by, ascending=ascending)
+    cortar = lambda d: d.head(n) if fim == 'head' else d.tail(n)
+    # texto (mesmo que só com dígitos) ordena como texto: só colunas numéricas passam pela partição
+    if n <= 0 or len(df) <= n or not pd.api.types.is_numeric_dtype(df[by[0]]):
+        return cortar(ordenar(df))
+    chave = df[by[0]].to_numpy(dtype=float, na_value=np.nan)
+    # nulos vão para o fim da ordenação; se puderem entrar no corte, ordena tudo
+    nulos = np.isnan(chave)
+    if nulos.any() and (fim == 'tail' or len(chave) - nulos.sum() < n):
+        return cortar(ordenar(df))
+
+    chave = chave if ascending[0] else -chave
+    if fim == 'head':
+        limite = np.partition(np.where(nulos, np.inf, chave), n - 1)[n - 1]
+        candidatos = chave <= limite
+    else:
+        limite = np.partition(chave, len(chave) - n)[len(chave) - n]
+        candidatos = chave >= limite
+    return cortar(ordenar(df.loc[candidatos]))
+
+@medido
 def grafico_agrupamento(
     df,
     *,
@@ -35,6 +181,7 @@ def grafico_agrupamento(
     text: Optional[str] = None,       # <- NOVO: coluna com os rótulos
     text_auto: bool = False           # <- NOVO: exibir texto automático
 ):
+    import plotly.express as px
     g = grafico.lower()  
     # ----------------------------
     # Gráficos baseados em eixo XY
@@ -110,10 +257,16 @@ def grafico_agrupamento(
     
 def unicos(df:pd.DataFrame,coluna:str)->int:
     ''' Função recebe um dataframe e uma coluna indicada e 
-        retorna os números únicos daquela coluna desejada.'''
+        retorna os números únicos daquela coluna desejada.
+        Com um Cubo, lê o total das células (votes: estimativa HyperLogLog).'''
+    if isinstance(df, Cubo):
+        total = df.agregar([], unicos=(coluna, 'nunique'))['unicos']
+        return int(total.iloc[0]) if len(total) else 0
     unicos = df[coluna].nunique()
     return unicos
 
+@medido
+@figura_em_cache
 def grafico_avaliacao_maiores(df):
     df2 = agrupamento(
         df,
@@ -134,6 +287,8 @@ def grafico_avaliacao_maiores(df):
     )
     return fig
 
+@medido
+@figura_em_cache
 def grafico_avaliacao_menores(df):
     df2 = agrupamento(
         df,
@@ -153,19 +308,20 @@ def grafico_avaliacao_menores(df):
     )
     return fig
 
+@medido
 def dataframe_paises(df):
-    cols = ['country_name','restaurant_id','cuisines','votes']
-    df2 = (df.loc[:, cols]
-      .groupby('country_name')
-      .agg({'restaurant_id': 'nunique',
-          'cuisines': 'nunique',       
-          'votes': 'mean'})
+    df2 = (_agregar(df, 'country_name',
+                    restaurant_id=('restaurant_id', 'nunique'),
+                    cuisines=('cuisines', 'nunique'),
+                    votes=('votes', 'mean'))
       .sort_values(['restaurant_id','cuisines','votes'], ascending=False)
-      .reset_index())
+      .reset_index(drop=True))
     df2['votes'] = df2['votes'].round(2)
     df2.columns = ['Nome do país','Número de Restaurantes', 'Culinárias','N° de Avaliações(Média)']
     return df2
 
+@medido
+@figura_em_cache
 def grafico_restaurantes_caros(df):
     df2=(agrupamento(df,agrupador='country_name',alvo='restaurant_id',operacao='nunique',linhas=df['price_range']==4)
      .sort_values('restaurant_id',ascending=False))
@@ -177,6 +333,8 @@ def grafico_restaurantes_caros(df):
                           text='Número de restaurantes')
     return fig
 
+@medido
+@figura_em_cache
 def graficos_valores(df):
     df2 = agrupamento(df,agrupador='country_name',alvo='valor_usd',operacao='mean').sort_values('valor_usd',ascending=False)
     df2['valor_usd']= df2['valor_usd'].round(2)
@@ -188,22 +346,19 @@ def graficos_valores(df):
                           text='Valor para duas pessoas em USD($)')
     return fig
 
+@medido
+@figura_em_cache
 def graficos_paises_cidades(df):
     df2 = agrupamento(df,agrupador='country_name',alvo='city',operacao='nunique').sort_values('city',ascending=False)
     df2.columns =['Nome do país','Cidades registradas']
     fig = grafico_agrupamento(df2,grafico='bar',x='Nome do país',y='Cidades registradas',title='Número de cidades registradas por país',text='Cidades registradas')
     return fig
 
+@medido
 def ranking_cidades(df, linhas_selecionadas=None):
-    cols = ['city', 'restaurant_id','country_name']  
-    # aplica filtro se for passado
-    if linhas_selecionadas is None:
-        base = df.loc[:, cols]
-    else:
-        base = df.loc[linhas_selecionadas, cols] 
     df2 = (
-        base.groupby(['city','country_name'], as_index=False)
-            .agg(num_restaurantes=('restaurant_id', 'nunique'),
+        _agregar(df, ['city','country_name'], linhas_selecionadas,
+                 num_restaurantes=('restaurant_id', 'nunique'),
                  id_mais_antigo=('restaurant_id', 'min'))
             .sort_values(['num_restaurantes', 'id_mais_antigo'], ascending=[False, True])
             .reset_index())
@@ -214,42 +369,54 @@ def ranking_cidades_1(df):
     return cidade
 
 def ranking_cidades_valor(df):
-    cols = ['city','restaurant_id', 'valor_usd'] 
-    df2 = (df.loc[:,cols].groupby('city', as_index=False)
-    .agg(valor_medio=('valor_usd', 'mean'),id_mais_antigo=('restaurant_id', 'min'))
+    df2 = (_agregar(df, 'city', valor_medio=('valor_usd', 'mean'),id_mais_antigo=('restaurant_id', 'min'))
     .sort_values(['valor_medio', 'id_mais_antigo'], ascending=[False, True]).reset_index())
     return df2
 
 def ranking_cidades_cozinhas(df):
-    cols = ['city','restaurant_id', 'cuisines'] 
-    df2 = (df.loc[:,cols].groupby('city', as_index=False)
-           .agg(numero_culinarias=('cuisines', 'nunique'),id_mais_antigo=('restaurant_id', 'min'))
+    df2 = (_agregar(df, 'city', numero_culinarias=('cuisines', 'nunique'),id_mais_antigo=('restaurant_id', 'min'))
            .sort_values(['numero_culinarias', 'id_mais_antigo'], ascending=[False, True]).reset_index()
     )
     return df2
 
-def grafico_ranking_cidades(df, linhas_selecionadas=None, top_n=20, title='Número de Restaurantes por cidade'):
-    cols = ['country_name','city','restaurant_id']
-    
-    # aplica filtro se vier; senão usa tudo
-    if linhas_selecionadas is None:
-        base = df.loc[:, cols]
+@medido
+def rankings_cidades(df, mascaras):
+    """
+    Ranking de cidades (formato de ranking_cidades) para várias máscaras num único agrupamento.
+    - df: dataframe de restaurantes ou Cubo
+    - mascaras: dict nome -> máscara booleana sobre df (None = todas as linhas)
+    Cada máscara vira uma coluna indicadora somada por (city, country_name), junto com o
+    menor restaurant_id dentro da máscara (desempate). Como restaurant_id não se repete
+    no dataset limpo, a soma das indicadoras é o nunique de ranking_cidades.
+    Retorna dict nome -> DataFrame ordenado (city, country_name, num_restaurantes, id_mais_antigo).
+    """
+    if isinstance(df, Cubo):
+        base, peso, ids = df.dados, df['n'].to_numpy(), df['id_min']
     else:
-        base = df.loc[linhas_selecionadas, cols]
-    
-    df2 = (
-        base.groupby(['city','country_name'], as_index=False)
-            .agg(
-                num_restaurantes=('restaurant_id', 'nunique'),
-                id_mais_antigo=('restaurant_id', 'min')
-            )
-            .sort_values(['num_restaurantes', 'id_mais_antigo'], ascending=[False, True])
-            .reset_index(drop=True)
-    )
-    
-    # primeira cidade do ranking
-    cidade = df2.loc[0, 'city'] if not df2.empty else None
+        base, peso, ids = df, 1, df['restaurant_id']
+    colunas = {'city': base['city'], 'country_name': base['country_name']}
+    especificacao = {}
+    for i, linhas in enumerate(mascaras.values()):
+        sel = np.ones(len(base), dtype=bool) if linhas is None else np.asarray(linhas, dtype=bool)
+        colunas[f'n{i}'] = sel * peso
+        colunas[f'id{i}'] = ids.where(sel)
+        especificacao[f'n{i}'] = (f'n{i}', 'sum')
+        especificacao[f'id{i}'] = (f'id{i}', 'min')
+    agregado = (pd.DataFrame(colunas, index=base.index)
+                .groupby(['city','country_name'], as_index=False, observed=True)
+                .agg(**especificacao))
+
+    rankings = {}
+    for i, nome in enumerate(mascaras):
+        df2 = agregado.loc[agregado[f'n{i}'] > 0, ['city', 'country_name', f'n{i}', f'id{i}']]
+        df2.columns = ['city', 'country_name', 'num_restaurantes', 'id_mais_antigo']
+        df2 = df2.astype({'num_restaurantes': 'int64', 'id_mais_antigo': 'int64'})
+        rankings[nome] = (df2.sort_values(['num_restaurantes', 'id_mais_antigo'], ascending=[False, True])
+                             .reset_index(drop=True))
+    return rankings
 
+def _barras_ranking_cidades(df2, top_n, title):
+    import plotly.express as px
     # gráfico de barras: x=cidades, y=nº de restaurantes, cor=país
     fig = px.bar(
         df2.head(top_n),
@@ -265,11 +432,32 @@ def grafico_ranking_cidades(df, linhas_selecionadas=None, top_n=20, title='Núme
     fig.update_traces(textposition='outside')
     return fig
 
+@medido
+@figura_em_cache
+def figura_ranking_cidades(df2, top_n=20, title='Número de Restaurantes por cidade'):
+    ''' Gráfico de barras de um ranking já calculado (ranking_cidades / rankings_cidades). '''
+    return _barras_ranking_cidades(df2, top_n, title)
+
+@medido
+@figura_em_cache
+def grafico_ranking_cidades(df, linhas_selecionadas=None, top_n=20, title='Número de Restaurantes por cidade'):
+    df2 = (
+        _agregar(df, ['city','country_name'], linhas_selecionadas,
+                 num_restaurantes=('restaurant_id', 'nunique'),
+                 id_mais_antigo=('restaurant_id', 'min'))
+            .pipe(selecionar_top, ['num_restaurantes', 'id_mais_antigo'], [False, True], top_n)
+            .reset_index(drop=True)
+    )
+    return _barras_ranking_cidades(df2, top_n, title)
+
+@medido
+@figura_em_cache
 def grafico_cidades_valor(df,linhas_selecionadas=None,top_n=10,title='Valor médio para duas pessoas'):
-    cols = ['city','restaurant_id', 'valor_usd','country_name']
-    df2 = (df.loc[:,cols].groupby(['city','country_name'], as_index=False)
-    .agg(valor_medio=('valor_usd', 'mean'),id_mais_antigo=('restaurant_id', 'min'))
-    .sort_values(['valor_medio', 'id_mais_antigo'], ascending=[False, True]).reset_index())
+    import plotly.express as px
+    # linhas_selecionadas é ignorado, como sempre foi: o gráfico usa todas as linhas de df
+    df2 = (_agregar(df, ['city','country_name'],
+                    valor_medio=('valor_usd', 'mean'),id_mais_antigo=('restaurant_id', 'min'))
+    .pipe(selecionar_top, ['valor_medio', 'id_mais_antigo'], [False, True], top_n).reset_index())
     df2['valor_medio']=df2['valor_medio'].round(2)
     fig = px.bar(
         df2.head(top_n),
@@ -285,11 +473,14 @@ def grafico_cidades_valor(df,linhas_selecionadas=None,top_n=10,title='Valor méd
     fig.update_traces(textposition='outside')
     return fig
 
+@medido
+@figura_em_cache
 def grafico_cidades_valor_menores(df,linhas_selecionadas=None,top_n=10,title='Valor médio para duas pessoas'):
-    cols = ['city','restaurant_id', 'valor_usd','country_name']
-    df2 = (df.loc[:,cols].groupby(['city','country_name'], as_index=False)
-    .agg(valor_medio=('valor_usd', 'mean'),id_mais_antigo=('restaurant_id', 'min'))
-    .sort_values(['valor_medio', 'id_mais_antigo'], ascending=[False, True]).reset_index())
+    import plotly.express as px
+    # linhas_selecionadas é ignorado, como sempre foi: o gráfico usa todas as linhas de df
+    df2 = (_agregar(df, ['city','country_name'],
+                    valor_medio=('valor_usd', 'mean'),id_mais_antigo=('restaurant_id', 'min'))
+    .pipe(selecionar_top, ['valor_medio', 'id_mais_antigo'], [False, True], top_n, fim='tail').reset_index())
     df2['valor_medio']=df2['valor_medio'].round(2)
     fig = px.bar(
         df2.tail(top_n),
@@ -305,10 +496,13 @@ def grafico_cidades_valor_menores(df,linhas_selecionadas=None,top_n=10,title='Va
     fig.update_traces(textposition='outside')
     return fig
 
+@medido
+@figura_em_cache
 def grafico_cidades_cozinhas(df,linhas_selecionadas=None,top_n=10,title='Variedade de culinárias disponíveis por cidade'):
-    cols = ['city','restaurant_id', 'cuisines','country_name']
-    df2 = (df.loc[:,cols].groupby(['city','country_name'], as_index=False)
-    .agg(num_cozinhas=('cuisines', 'nunique'),id_mais_antigo=('restaurant_id', 'min'))
+    import plotly.express as px
+    # linhas_selecionadas é ignorado, como sempre foi: o gráfico usa todas as linhas de df
+    df2 = (_agregar(df, ['city','country_name'],
+                    num_cozinhas=('cuisines', 'nunique'),id_mais_antigo=('restaurant_id', 'min'))
     .sort_values(['num_cozinhas', 'id_mais_antigo'], ascending=[False, True]).reset_index())
     fig = px.bar(
         df2.head(top_n),
@@ -343,6 +537,7 @@ def nota_rest_rtg_max_min(df,cuisine='Italian',operacao='max'):
     nota = df2.loc[0,'media_avaliacao']
     return nota
 
+@medido
 def ranking_restaurantes_cuisine(df, cuisine, criterio='max', min_votes=4):
     """
     df        : DataFrame base
@@ -353,8 +548,8 @@ def ranking_restaurantes_cuisine(df, cuisine, criterio='max', min_votes=4):
     # mantém sua estrutura
     cols = ['restaurant_name','aggregate_rating','restaurant_id',
             'valor_usd','country_name','city','cuisines','votes']
-    # filtro base
-    linhas_selecionadas = (df['cuisines'] == cuisine)
+    # filtro base: a culinária em qualquer posição da lista do restaurante
+    linhas_selecionadas = mascara_culinarias(df, [cuisine])
     if min_votes is not None:
         linhas_selecionadas = linhas_selecionadas & (df['votes'] >= min_votes)
     base = df.loc[linhas_selecionadas, cols]
@@ -405,6 +600,28 @@ def mostrar_metric_cuisine(df, cuisine, *, min_votes=4, criterio='max'):
         value=f"{df2.loc[0, 'media_avaliacao']:.1f}/5.0",
         help=df2.loc[0, 'help'])
     
+def busca_lateral(df, indice, *, limite=10, key='busca_restaurantes'):
+    """
+    Caixa de busca na barra lateral: nome, cidade, bairro ou endereço, sem
+    diferenciar maiúsculas nem acentos. Consulta o índice (modules.search),
+    não o dataframe, então cada busca leva poucos milissegundos.
+    """
+    from modules.search import buscar_restaurantes
+    consulta = st.sidebar.text_input('🔎 Buscar restaurante, cidade ou bairro', key=key,
+                                     placeholder='ex.: pinas, sao paulo, mall road')
+    if not consulta.strip():
+        return
+    resultado = buscar_restaurantes(df, indice, consulta, limite)
+    if resultado.empty:
+        st.sidebar.caption('Nenhum restaurante encontrado.')
+        return
+    st.sidebar.dataframe(
+        resultado.loc[:, ['restaurant_name', 'city', 'country_name', 'aggregate_rating']]
+                 .rename(columns={'restaurant_name': 'Restaurante', 'city': 'Cidade',
+                                  'country_name': 'País', 'aggregate_rating': 'Nota'}),
+        hide_index=True, use_container_width=True)
+
+@medido
 def dataframe_restaurantes(df):    
     cols = ['restaurant_id','restaurant_name','cuisines','city','country_name','aggregate_rating','valor_usd','votes']
     df2 = (
@@ -442,12 +659,15 @@ def dataframe_restaurantes(df):
     })
     return df2
     
+@medido
+@figura_em_cache
 def grafico_valor_restaurantes_menor(df):
+    import plotly.express as px
     cols = ['restaurant_id','valor_usd','restaurant_name','country_name']
     linhas_selecionadas = df['valor_usd'] != 0.0
     df2 = (df.loc[linhas_selecionadas,cols].groupby('restaurant_name', as_index=False)
     .agg(media_valor=('valor_usd', 'mean'),id_mais_antigo=('restaurant_id', 'min'),nome_pais=('country_name','first'))
-    .sort_values(['media_valor', 'id_mais_antigo'], ascending=[True, True]))
+    .pipe(selecionar_top, ['media_valor', 'id_mais_antigo'], [True, True], 15))
     df2.columns = ['Nome do Restaurante','Valor médio para 2 p.($)','ID do Restaurante','País']
     df2.reset_index()
     fig = px.bar(df2.head(15), x='Nome do Restaurante',y='Valor médio para 2 p.($)',text='Valor médio para 2 p.($)',title='Os 15 menores preços para 2 pessoas por restaurante',color='País')
@@ -455,12 +675,15 @@ def grafico_valor_restaurantes_menor(df):
     fig.update_traces(textposition='outside')
     return fig
 
+@medido
+@figura_em_cache
 def grafico_valor_restaurantes_maior(df):
+    import plotly.express as px
     cols = ['restaurant_id','valor_usd','restaurant_name','country_name']
     linhas_selecionadas = df['valor_usd'] != 0.0
     df2 = (df.loc[linhas_selecionadas,cols].groupby('restaurant_name', as_index=False)
     .agg(media_valor=('valor_usd', 'mean'),id_mais_antigo=('restaurant_id', 'min'),nome_pais=('country_name','first'))
-    .sort_values(['media_valor', 'id_mais_antigo'], ascending=[False, True]))
+    .pipe(selecionar_top, ['media_valor', 'id_mais_antigo'], [False, True], 15))
     df2.columns = ['Nome do Restaurante','Valor médio para 2 p.($)','ID do Restaurante','País']
     df2.reset_index()
     fig = px.bar(df2.head(15), x='Nome do Restaurante',y='Valor médio para 2 p.($)',text='Valor médio para 2 p.($)',title='Os 15 maiores preços para 2 pessoas por restaurante',color='País')
@@ -468,12 +691,15 @@ def grafico_valor_restaurantes_maior(df):
     fig.update_traces(textposition='outside')
     return fig
 
+@medido
+@figura_em_cache
 def grafico_nota_restaurantes_menor(df):
+    import plotly.express as px
     cols = ['restaurant_id','aggregate_rating','restaurant_name','country_name']
     linhas_selecionadas = df['aggregate_rating'] != 0.0
     df2 = (df.loc[linhas_selecionadas,cols].groupby('restaurant_name', as_index=False)
     .agg(media_nota=('aggregate_rating', 'mean'),id_mais_antigo=('restaurant_id', 'min'),nome_pais=('country_name','first'))
-    .sort_values(['media_nota', 'id_mais_antigo'], ascending=[True, True]))
+    .pipe(selecionar_top, ['media_nota', 'id_mais_antigo'], [True, True], 15))
     df2.columns = ['Nome do Restaurante','Nota média de avaliação','ID do Restaurante','País']
     df2.reset_index()
     fig = px.bar(df2.head(15), x='Nome do Restaurante',y='Nota média de avaliação',text='Nota média de avaliação',title='Os 15 piores restaurantes avaliados',color='País')
@@ -481,12 +707,15 @@ def grafico_nota_restaurantes_menor(df):
     fig.update_traces(textposition='outside')
     return fig
 
+@medido
+@figura_em_cache
 def grafico_nota_restaurantes_maior(df):
+    import plotly.express as px
     cols = ['restaurant_id','aggregate_rating','restaurant_name','country_name']
     linhas_selecionadas = df['aggregate_rating'] != 0.0
     df2 = (df.loc[linhas_selecionadas,cols].groupby('restaurant_name', as_index=False)
     .agg(media_nota=('aggregate_rating', 'mean'),id_mais_antigo=('restaurant_id', 'min'),nome_pais=('country_name','first'))
-    .sort_values(['media_nota', 'id_mais_antigo'], ascending=[False, True]))
+    .pipe(selecionar_top, ['media_nota', 'id_mais_antigo'], [False, True], 15))
     df2.columns = ['Nome do Restaurante','Nota média de avaliação','ID do Restaurante','País']
     df2.reset_index()
     fig = px.bar(df2.head(15), x='Nome do Restaurante',y='Nota média de avaliação',text='Nota média de avaliação',title='Os 15 melhores restaurantes avaliados',color='País')
@@ -494,10 +723,25 @@ def grafico_nota_restaurantes_maior(df):
     fig.update_traces(textposition='outside')
     return fig
 
-def grafico_notas_culinarias(df):
-    cols =['restaurant_id','aggregate_rating','cuisines']
+@medido
+@figura_em_cache
+def grafico_notas_culinarias(df, culinarias=None):
+    '''
+    Nota média por culinária, com cada restaurante contando em todas as suas culinárias.
+    culinarias: se informada, só essas entram no gráfico.
+    '''
+    import plotly.express as px
     linhas_selecionadas = df['aggregate_rating'] != 0.0
-    df2 = df.loc[linhas_selecionadas,cols].groupby('cuisines').agg(media_nota=('aggregate_rating', 'mean'),id_mais_antigo=('restaurant_id', 'min')).sort_values(['media_nota', 'id_mais_antigo'], ascending=[True, True]).reset_index()
+    if COLUNA_CULINARIAS in df.columns:
+        df2 = agregar_por_culinaria(df.loc[linhas_selecionadas], media_nota=('aggregate_rating', 'mean'),
+                                    id_mais_antigo=('restaurant_id', 'min'))
+    else:
+        cols = ['restaurant_id', 'aggregate_rating', 'cuisines']
+        df2 = df.loc[linhas_selecionadas, cols].groupby('cuisines', observed=True).agg(
+            media_nota=('aggregate_rating', 'mean'), id_mais_antigo=('restaurant_id', 'min'))
+    if culinarias is not None:
+        df2 = df2.loc[df2.index.isin(list(culinarias))]
+    df2 = df2.pipe(selecionar_top, ['media_nota', 'id_mais_antigo'], [True, True], 15).reset_index()
     df2['media_nota']=df2['media_nota'].round(2)
     df2.columns = ['Tipo de Culinária','Nota média de avaliação','ID do Restaurante']
     fig = px.bar(df2.head(15), x='Tipo de Culinária',y='Nota média de avaliação',text='Nota média de avaliação',title='As culinárias mais bem avaliadas')
@@ -505,29 +749,41 @@ def grafico_notas_culinarias(df):
     fig.update_traces(textposition='outside')
     return fig
 
-def restaurants_map(
-    df,
-    *,
-    lat_col='latitude',
-    lon_col='longitude',
-    name_col='restaurant_name',
-    rating_col='aggregate_rating',
-    cuisine_col='cuisines',
-    city_col='city',
-    country_col='country_name',
-    color_col='cor',          # <- cor já presente no df
-    cluster=True,             # agrupa ao afastar o zoom
-    zoom_start=2,
-    max_points=5000,          # limite p/ performance na nuvem
-    use_circle=True           # CircleMarker é mais leve
-):
+# cor do agrupamento pela nota média (mesmas faixas do rating_color do Zomato)
+FAIXAS_COR_NOTA = [(4.5, 'darkgreen'), (4.0, 'green'), (3.5, 'lightgreen'), (3.0, 'orange'), (2.5, 'red')]
+
+@medido
+def agrupar_em_grade(data, zoom, *, lat_col='latitude', lon_col='longitude',
+                     rating_col='aggregate_rating', name_col='restaurant_name', pixels=60):
     """
-    Desenha o mapa de restaurantes com marcadores coloridos via df['cor'].
-    Limita a amostra a max_points para evitar travar (especialmente no Streamlit Cloud).
+    Agrupa os pontos numa grade regular cujo lado equivale a ~`pixels` px no zoom informado
+    (um tile de 256 px cobre 360 / 2^zoom graus). Tudo vetorizado: um groupby pela célula.
+    Retorna uma linha por célula: latitude/longitude médias, n, nota média e o primeiro nome.
     """
+    tamanho = 360.0 / (256 * 2 ** zoom) * pixels
+    colunas_grade = int(np.ceil(360.0 / tamanho)) + 1
+    gx = np.floor((data[lon_col].to_numpy() + 180.0) / tamanho).astype(np.int64)
+    gy = np.floor((data[lat_col].to_numpy() + 90.0) / tamanho).astype(np.int64)
+    celula = gy * colunas_grade + gx
+    grupos = (data.assign(_celula=celula)
+                  .groupby('_celula', sort=False)
+                  .agg(latitude=(lat_col, 'mean'),
+                       longitude=(lon_col, 'mean'),
+                       n=(lat_col, 'size'),
+                       nota=(rating_col, 'mean'),
+                       nome=(name_col, 'first'))
+                  .reset_index(drop=True))
+    cores = np.select([grupos['nota'] >= limite for limite, _ in FAIXAS_COR_NOTA],
+                      [cor for _, cor in FAIXAS_COR_NOTA], default='darkred')
+    return grupos.assign(cor=cores)
 
+@medido
+def pontos_mapa(df, colunas, *, lat_col='latitude', lon_col='longitude', rating_col='aggregate_rating'):
+    """
+    Seleciona as colunas do mapa, garante tipos numéricos e remove coordenadas inválidas.
+    """
     # --- Seleção mínima de colunas e tipagem ---
-    cols = [c for c in [lat_col, lon_col, name_col, rating_col, cuisine_col, city_col, country_col, color_col] if c in df.columns]
+    cols = [c for c in colunas if c in df.columns]
     data = df.loc[:, cols].copy()
 
     # garante numéricos
@@ -536,23 +792,12 @@ def restaurants_map(
             data[c] = pd.to_numeric(data[c], errors='coerce')
 
     # remove coordenadas inválidas
-    data = data.dropna(subset=[lat_col, lon_col])
-    if data.empty:
-        return st_folium(folium.Map(location=[0, 0], zoom_start=zoom_start), width=1024, height=600)
-
-    # --- downsample leve para não travar (se exceder max_points) ---
-    if isinstance(max_points, int) and max_points > 0 and len(data) > max_points:
-        # amostragem estratificada simples por cor (mantém proporção das cores)
-        data = (
-            data.groupby(color_col, group_keys=False)
-                .apply(lambda g: g.sample(frac=min(1.0, max_points / len(data)), random_state=42))
-        )
-
-    # centro do mapa
-    lat_center = float(data[lat_col].mean())
-    lon_center = float(data[lon_col].mean())
-    m = folium.Map(location=[lat_center, lon_center],zoom_start=zoom_start,tiles="CartoDB positron")
+    return data.dropna(subset=[lat_col, lon_col])
 
+def _adicionar_marcadores(data, container, *, lat_col, lon_col, name_col, rating_col, cuisine_col,
+                          city_col, country_col, color_col, use_circle):
+    ''' Um marcador por linha de data, com popup/tooltip, adicionado ao container (mapa ou camada). '''
+    import folium
     # normalização básica de nomes de cores aceitos pelo Folium
     allowed = {
         'red','blue','green','purple','orange','darkred','lightred','beige',
@@ -565,8 +810,6 @@ def restaurants_map(
         c = pt_alias.get(c, c)
         return c if c in allowed else 'blue'
 
-    container = MarkerCluster().add_to(m) if cluster else m
-
     # iteração leve (CircleMarker é mais rápido que Icon)
     for r in data.itertuples(index=False):
         pin_color = norm_color(getattr(r, color_col, 'blue'))
@@ -602,5 +845,279 @@ def restaurants_map(
                 icon=folium.Icon(color=pin_color, icon='info-sign')
             ).add_to(container)
 
-    # render robusto
-    return st_folium(m, width=1024, height=600)
+
+def _amostrar(data, color_col, max_points):
+    ''' Amostra estratificada simples por cor (mantém a proporção das cores) quando excede max_points. '''
+    if isinstance(max_points, int) and max_points > 0 and len(data) > max_points:
+        data = (
+            data.groupby(color_col, group_keys=False, observed=True)
+                .apply(lambda g: g.sample(frac=min(1.0, max_points / len(data)), random_state=42))
+        )
+    return data
+
+@medido
+def mapa_folium(data, *, lat_col='latitude', lon_col='longitude', name_col='restaurant_name',
+                rating_col='aggregate_rating', cuisine_col='cuisines', city_col='city',
+                country_col='country_name', color_col='cor', cluster=True, zoom_start=2,
+                max_points=5000, use_circle=True):
+    """
+    Monta o folium.Map com um marcador por restaurante (saída de pontos_mapa).
+    """
+    import folium
+    from folium.plugins import MarkerCluster
+    # --- downsample leve para não travar (se exceder max_points) ---
+    data = _amostrar(data, color_col, max_points)
+
+    # centro do mapa
+    lat_center = float(data[lat_col].mean())
+    lon_center = float(data[lon_col].mean())
+    m = folium.Map(location=[lat_center, lon_center],zoom_start=zoom_start,tiles="CartoDB positron")
+
+    container = MarkerCluster().add_to(m) if cluster else m
+    _adicionar_marcadores(data, container, lat_col=lat_col, lon_col=lon_col, name_col=name_col,
+                          rating_col=rating_col, cuisine_col=cuisine_col, city_col=city_col,
+                          country_col=country_col, color_col=color_col, use_circle=use_circle)
+    return m
+
+@medido
+def camada_marcadores(data, *, lat_col='latitude', lon_col='longitude', name_col='restaurant_name',
+                      rating_col='aggregate_rating', cuisine_col='cuisines', city_col='city',
+                      country_col='country_name', color_col='cor', cluster=False, use_circle=True):
+    """
+    Camada (FeatureGroup) com um marcador por linha de data, dentro de um MarkerCluster se cluster.
+    """
+    import folium
+    from folium.plugins import MarkerCluster
+    camada = folium.FeatureGroup(name='restaurantes')
+    container = MarkerCluster().add_to(camada) if cluster else camada
+    _adicionar_marcadores(data, container, lat_col=lat_col, lon_col=lon_col, name_col=name_col,
+                          rating_col=rating_col, cuisine_col=cuisine_col, city_col=city_col,
+                          country_col=country_col, color_col=color_col, use_circle=use_circle)
+    return camada
+
+# paleta RGB do mapa WebGL, na ordem de FAIXAS_COR_NOTA + 'darkred' (índice da cor)
+CORES_RGB = [[0, 100, 0], [0, 128, 0], [144, 238, 144], [255, 165, 0], [255, 0, 0], [139, 0, 0]]
+
+def indice_cor_nota(notas):
+    ''' Índice em CORES_RGB pela faixa de nota (mesmas faixas da grade). '''
+    notas = np.asarray(notas, dtype=float)
+    return np.select([notas >= limite for limite, _ in FAIXAS_COR_NOTA],
+                     list(range(len(FAIXAS_COR_NOTA))), default=len(FAIXAS_COR_NOTA)).astype(np.int8)
+
+@medido
+def mapa_webgl(data, *, lat_col='latitude', lon_col='longitude', name_col='restaurant_name',
+               rating_col='aggregate_rating', zoom_start=2):
+    """
+    Monta um pydeck.Deck com os pontos numa ScatterplotLayer (desenhada na GPU).
+    O payload leva só lon, lat, índice da cor, nota e nome, com chaves curtas e
+    coordenadas arredondadas (~1 m); a cor sai da paleta por expressão no navegador.
+    Os dados vão como registros (uma linha por ponto): o st.pydeck_chart envia o
+    deck.to_json(), e o transporte binário (colunar) do pydeck só funciona no Jupyter.
+    """
+    import pydeck as pdk
+    notas = data[rating_col].astype(float)
+    payload = pd.DataFrame({
+        'lon': data[lon_col].astype(float).round(5).to_numpy(),
+        'lat': data[lat_col].astype(float).round(5).to_numpy(),
+        'c': indice_cor_nota(notas),
+        'nota': notas.round(1).to_numpy(),
+        'nome': data[name_col].astype(str).to_numpy(),
+    })
+    cor = ' : '.join(f'c == {i} ? {rgb}' for i, rgb in enumerate(CORES_RGB[:-1])) + f' : {CORES_RGB[-1]}'
+    camada = pdk.Layer(
+        'ScatterplotLayer',
+        data=payload,
+        get_position='[lon, lat]',
+        get_fill_color=cor,
+        get_radius=4,
+        radius_units='pixels',
+        opacity=0.7,
+        pickable=True,
+    )
+    vista = pdk.ViewState(latitude=float(payload['lat'].mean()) if len(payload) else 0.0,
+                          longitude=float(payload['lon'].mean()) if len(payload) else 0.0,
+                          zoom=zoom_start)
+    deck = pdk.Deck(layers=[camada], initial_view_state=vista, map_provider='carto', map_style='light',
+                    tooltip={'text': '{nome} — ⭐ {nota}/5.0'})
+    if ativo():
+        anotar_bytes(_tamanho_deck(deck))
+    return deck
+
+@medido
+def camada_grade(data, zoom, *, lat_col='latitude', lon_col='longitude', name_col='restaurant_name',
+                 rating_col='aggregate_rating'):
+    """
+    Camada (FeatureGroup) com um marcador por célula de agrupar_em_grade.
+    """
+    import folium
+    camada = folium.FeatureGroup(name='restaurantes')
+    for g in agrupar_em_grade(data, zoom, lat_col=lat_col, lon_col=lon_col,
+                              rating_col=rating_col, name_col=name_col).itertuples(index=False):
+        nota_txt = f"{g.nota:.1f}/5.0" if pd.notna(g.nota) else "—/5.0"
+        texto = f"{g.nome} — {nota_txt}" if g.n == 1 else f"{g.n} restaurantes — ⭐ média {nota_txt}"
+        folium.CircleMarker(
+            location=[g.latitude, g.longitude],
+            radius=4 if g.n == 1 else float(6 + 3 * np.log2(g.n)),
+            tooltip=texto,
+            color=g.cor,
+            fill=True,
+            fill_color=g.cor,
+            fill_opacity=0.7
+        ).add_to(camada)
+    return camada
+
+# Camadas de marcadores já montadas (e o centro do mapa) ou o pydeck.Deck, por chave de filtros/parâmetros
+# (ver restaurants_map)
+CACHE_MAPAS = CacheLRU(64 * 1024 * 1024)
+
+# Memória aproximada de um elemento do folium (marcador, popup, tooltip), medida com tracemalloc
+_BYTES_POR_ELEMENTO = 1536
+
+# O st_folium liga a camada ao mapa da vez (add_to) antes de renderizá-la: uma camada
+# do cache é renderizada por uma sessão de cada vez
+_TRAVA_CAMADAS = threading.Lock()
+
+def _tamanho_camada(camada):
+    ''' Estimativa dos bytes de uma camada do folium, pela quantidade de elementos. '''
+    if camada is None:
+        return _BYTES_POR_ELEMENTO
+    pendentes, total = [camada], 0
+    while pendentes:
+        elemento = pendentes.pop()
+        total += 1
+        pendentes.extend(getattr(elemento, '_children', {}).values())
+    return total * _BYTES_POR_ELEMENTO
+
+def _tamanho_deck(deck, amostra=1000):
+    ''' Estimativa dos bytes de um pydeck.Deck: registros das camadas, extrapolados de uma amostra. '''
+    total = 0
+    for camada in deck.layers:
+        registros = camada.data if isinstance(camada.data, list) else []
+        if registros:
+            total += tamanho_em_bytes(registros[:amostra]) * len(registros) // min(len(registros), amostra)
+    return total
+
+def _centro_pontos(df, *, lat_col='latitude', lon_col='longitude'):
+    ''' (lat, lon) médios das coordenadas válidas de df, sem copiar as outras colunas; None sem pontos. '''
+    lat = pd.to_numeric(df[lat_col], errors='coerce')
+    lon = pd.to_numeric(df[lon_col], errors='coerce')
+    validos = (lat.notna() & lon.notna()).to_numpy()
+    if not validos.any():
+        return None
+    return float(lat[validos].mean()), float(lon[validos].mean())
+
+@medido
+def restaurants_map(
+    df,
+    *,
+    lat_col='latitude',
+    lon_col='longitude',
+    name_col='restaurant_name',
+    rating_col='aggregate_rating',
+    cuisine_col='cuisines',
+    city_col='city',
+    country_col='country_name',
+    color_col='cor',          # <- cor já presente no df
+    cluster=True,             # agrupa ao afastar o zoom
+    zoom_start=2,
+    max_points=5000,          # limite p/ performance na nuvem
+    use_circle=True,          # CircleMarker é mais leve
+    grade=False,              # agrupa no servidor numa grade que depende do zoom
+    zoom=None,                # zoom atual do mapa (retornado pelo st_folium)
+    centro=None,              # centro atual do mapa {'lat':..., 'lng':...}
+    zoom_expandir=11,         # a partir deste zoom a grade mostra os restaurantes individuais
+    key=None,                 # chave do componente (mantém o mapa montado entre reruns)
+    chave_filtros=None,       # identifica dados+filtros no cache (None: sem cache)
+    indice=None,              # índice espacial (modules.spatial) do dataframe completo
+    limites=None,             # bounds atuais do mapa (retornados pelo st_folium)
+    max_viewport=2000,        # máximo de marcadores individuais por enquadramento
+    backend='folium'          # 'webgl': todos os pontos numa camada pydeck (GPU), sem amostragem
+):
+    """
+    Desenha o mapa de restaurantes com marcadores coloridos via df['cor'].
+    Limita a amostra a max_points para evitar travar (especialmente no Streamlit Cloud).
+    Com grade=True não há amostragem: abaixo de zoom_expandir cada célula da grade vira um
+    único marcador (quantidade e nota média).
+    Com backend='webgl' os pontos vão para o navegador num único payload (mapa_webgl),
+    coloridos pela nota; grade, cluster e max_points são ignorados.
+    Com grade=True, indice e limites, só os restaurantes dentro do enquadramento atual vão para
+    a camada (no máximo max_viewport marcadores individuais); o mapa base não muda ao mover.
+    Os marcadores vão numa camada (feature_group_to_add do st_folium) sobre um mapa base
+    leve, então mudar zoom ou enquadramento só troca a camada, sem recarregar o mapa.
+    A camada fica no CACHE_MAPAS (LRU em bytes) pela chave de filtros e parâmetros, montada
+    antes de tocar nos dados: num hit os pontos nem são preparados. Sem chave_filtros não há cache.
+    """
+    import folium
+    from streamlit_folium import st_folium
+
+    if backend not in ('folium', 'webgl'):
+        raise ValueError("backend deve ser 'folium' ou 'webgl'.")
+    colunas = [lat_col, lon_col, name_col, rating_col, cuisine_col, city_col, country_col, color_col]
+    zoom_atual = int(zoom) if zoom is not None else zoom_start
+
+    # enquadramento atual (só com grade e índice espacial): entra na chave
+    enquadramento = None
+    if backend == 'folium' and grade and indice is not None and limites and limites['_southWest']['lat'] is not None:
+        enquadramento = tuple(round(float(limites[canto][eixo]), 4)
+                              for canto in ('_southWest', '_northEast') for eixo in ('lat', 'lng'))
+
+    chave = None
+    if chave_filtros is not None:
+        chave = chave_cache(backend, chave_filtros, colunas, cluster, max_points, use_circle, zoom_start,
+                            grade, zoom_expandir, zoom_atual if grade else None, enquadramento, max_viewport)
+    em_cache = CACHE_MAPAS.get(chave) if chave is not None else None
+
+    if backend == 'webgl':
+        deck = em_cache
+        if deck is None:
+            data = pontos_mapa(df, colunas, lat_col=lat_col, lon_col=lon_col, rating_col=rating_col)
+            deck = mapa_webgl(data, lat_col=lat_col, lon_col=lon_col, name_col=name_col,
+                              rating_col=rating_col, zoom_start=zoom_start)
+            if chave is not None:
+                CACHE_MAPAS.put(chave, deck, _tamanho_deck(deck))
+        if ativo():
+            anotar_bytes(_tamanho_deck(deck))   # estimativa por amostra, sem gerar o deck.to_json()
+        return st.pydeck_chart(deck, use_container_width=True)
+
+    if em_cache is None:
+        if enquadramento is not None:
+            # só as linhas que o índice espacial devolve, tiradas por posição do df original
+            posicoes = df.index.get_indexer(indice.limites(limites))
+            posicoes = np.sort(posicoes[posicoes >= 0])
+            if zoom_atual >= zoom_expandir and len(posicoes) > max_viewport:
+                posicoes = posicoes[np.linspace(0, len(posicoes) - 1, max_viewport).astype(np.int64)]
+            data = pontos_mapa(df.take(posicoes), colunas, lat_col=lat_col, lon_col=lon_col, rating_col=rating_col)
+        else:
+            data = pontos_mapa(df, colunas, lat_col=lat_col, lon_col=lon_col, rating_col=rating_col)
+        camada, centro_mapa = None, _centro_pontos(df, lat_col=lat_col, lon_col=lon_col)
+        if centro_mapa is not None:
+            marcadores = dict(lat_col=lat_col, lon_col=lon_col, name_col=name_col, rating_col=rating_col,
+                              cuisine_col=cuisine_col, city_col=city_col, country_col=country_col,
+                              color_col=color_col, use_circle=use_circle)
+            if grade and zoom_atual < zoom_expandir:
+                camada = camada_grade(data, zoom_atual, lat_col=lat_col, lon_col=lon_col,
+                                      name_col=name_col, rating_col=rating_col)
+            elif enquadramento is not None:
+                camada = camada_marcadores(data, **marcadores)
+            else:
+                camada = camada_marcadores(_amostrar(data, color_col, max_points), cluster=cluster, **marcadores)
+        em_cache = (camada, centro_mapa)
+        if chave is not None:
+            CACHE_MAPAS.put(chave, em_cache, _tamanho_camada(camada))
+
+    camada, centro_mapa = em_cache
+    if ativo():
+        anotar_bytes(_tamanho_camada(camada))
+    if camada is None:
+        return st_folium(folium.Map(location=[0, 0], zoom_start=zoom_start), width=1024, height=600, key=key)
+
+    # mapa base novo a cada rerun (barato): o script dele não muda e o componente não é remontado
+    m = folium.Map(location=list(centro_mapa), zoom_start=zoom_start, tiles="CartoDB positron")
+    with _TRAVA_CAMADAS:
+        if grade:
+            # mantém zoom/centro do usuário entre reruns
+            centro_atual = (centro['lat'], centro['lng']) if centro else None
+            return st_folium(m, width=1024, height=600, key=key, feature_group_to_add=camada,
+                             zoom=zoom_atual, center=centro_atual,
+                             returned_objects=['zoom', 'center', 'bounds'])
+        return st_folium(m, width=1024, height=600, key=key, feature_group_to_add=camada)
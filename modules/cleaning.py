@@ -1,7 +1,10 @@
 import pandas as pd
 import numpy as np
 import inflection
+from modules.cuisines import separar
+from modules.perf import medido
 
+@medido
 def limpar_dataframe(df, *, dropna_mode=None, subset=None, lowercase=False):
     """
     dropna_mode: None | 'any' | 'all'
@@ -23,15 +26,79 @@ def limpar_dataframe(df, *, dropna_mode=None, subset=None, lowercase=False):
     # 4) reindexa
     return df.reset_index(drop=True)
 
-def remover_duplicatas(df, *, subset=None, keep='first', report=False):
+class ChavesVistas:
+    """
+    Conjunto das chaves já vistas, para deduplicar um arquivo lido em blocos.
+    - chave inteira de uma coluna (ex.: restaurant_id): o próprio valor em arrays int64
+      ordenados (8 bytes por chave). Cada bloco vira um array ordenado, intercalado com os
+      anteriores enquanto não tiver menos da metade do tamanho deles: no máximo log2(n)
+      arrays, e cada chave é intercalada O(log n) vezes, em vez de reordenar tudo a cada bloco.
+    - demais chaves (texto, várias colunas): os valores exatos num set do Python. Ocupa
+      bem mais memória, mas não há colisão: um hash de 64 bits descartaria em silêncio
+      uma linha nova cujo hash coincidisse com o de uma chave já vista.
+    """
+    def __init__(self):
+        self.ordenadas = []   # arrays int64 ordenados, do maior para o menor
+        self.exatas = set()
+
+    def __len__(self):
+        return sum(len(a) for a in self.ordenadas) + len(self.exatas)
+
+    @staticmethod
+    def codificar(df, subset=None):
+        ''' int64 para uma coluna inteira; senão array de objetos (valor ou tupla, nulos como None). '''
+        cols = [subset] if isinstance(subset, str) else list(subset or df.columns)
+        if len(cols) == 1 and pd.api.types.is_integer_dtype(df[cols[0]]):
+            return df[cols[0]].to_numpy(dtype=np.int64)
+        valores = df[cols].astype(object)
+        valores = valores.where(valores.notna(), None)
+        chaves = np.empty(len(df), dtype=object)
+        chaves[:] = (valores[cols[0]].tolist() if len(cols) == 1
+                     else list(valores.itertuples(index=False, name=None)))
+        return chaves
+
+    def contem(self, chaves):
+        if chaves.dtype == object:
+            return np.fromiter((c in self.exatas for c in chaves), dtype=bool, count=len(chaves))
+        achadas = np.zeros(len(chaves), dtype=bool)
+        for ordenadas in self.ordenadas:
+            pos = np.minimum(np.searchsorted(ordenadas, chaves), len(ordenadas) - 1)
+            achadas |= ordenadas[pos] == chaves
+        return achadas
+
+    def adicionar(self, chaves):
+        if chaves.dtype == object:
+            self.exatas.update(chaves)
+            return
+        if len(chaves) == 0:
+            return
+        self.ordenadas.append(np.sort(chaves))
+        # cada array fica com pelo menos o dobro do seguinte; o timsort do kind='stable'
+        # reconhece as duas sequências já ordenadas e só as intercala
+        while len(self.ordenadas) > 1 and len(self.ordenadas[-2]) < 2 * len(self.ordenadas[-1]):
+            novas = self.ordenadas.pop()
+            self.ordenadas[-1] = np.sort(np.concatenate([self.ordenadas[-1], novas]), kind='stable')
+
+@medido
+def remover_duplicatas(df, *, subset=None, keep='first', report=False, vistas=None):
     """
     Remove duplicatas de forma simples.
     - subset: coluna ou lista de colunas para definir duplicidade (ex.: 'id' ou ['id','data'])
     - keep: 'first', 'last' ou False (False remove TODAS as ocorrências duplicadas)
     - report: se True, retorna também um dicionário com estatísticas
+    - vistas: ChavesVistas compartilhado entre os blocos de um mesmo arquivo; remove também
+      as linhas cujas chaves já apareceram em blocos anteriores (só com keep='first')
     """
     antes = len(df)
-    out = df.drop_duplicates(subset=subset, keep=keep).reset_index(drop=True)
+    if vistas is None:
+        out = df.drop_duplicates(subset=subset, keep=keep).reset_index(drop=True)
+    else:
+        if keep != 'first':
+            raise ValueError("Deduplicação entre blocos só suporta keep='first'.")
+        chaves = vistas.codificar(df, subset)
+        novas = ~vistas.contem(chaves) & ~pd.Series(chaves).duplicated().to_numpy()
+        out = df.loc[novas].reset_index(drop=True)
+        vistas.adicionar(chaves[novas])
     if not report:
         return out
 
@@ -45,6 +112,7 @@ def remover_duplicatas(df, *, subset=None, keep='first', report=False):
     }
     return out, stats
 
+@medido
 def rename_columns(dataframe):
     df = dataframe.copy()
     title = lambda x: inflection.titleize(x)
@@ -57,27 +125,46 @@ def rename_columns(dataframe):
     df.columns = cols_new
     return df
 
+# Código do país -> nome do país
+COUNTRIES = {
+    1: "India",
+    14: "Australia",
+    30: "Brazil",
+    37: "Canada",
+    94: "Indonesia",
+    148: "New Zeland",
+    162: "Philippines",
+    166: "Qatar",
+    184: "Singapure",
+    189: "South Africa",
+    191: "Sri Lanka",
+    208: "Turkey",
+    214: "United Arab Emirates",
+    215: "England",
+    216: "USA",
+}
+
+# price_range -> categoria (qualquer outro valor vira "Gourmet")
+PRICE_TYPES = {
+    1: "Cheap",
+    2: "Normal",
+    3: "Expensive",
+}
+
+# Código hexadecimal de rating_color -> nome da cor
+COLORS = {
+    "3F7E00": "Darkgreen",
+    "5BA829": "Green",
+    "9ACD32": "Lightgreen",
+    "CDD614": "Orange",
+    "FFBA00": "Red",
+    "CBCBC8": "Darkred",
+    "FF7800": "Darkred",
+}
+
 def country_name(country_id):
     ''' Função recebe o código do páis dentro do dicionário 
         indicado e retorna o nome do país correspondente. '''
-
-    COUNTRIES = {
-     1: "India",
-     14: "Australia",
-     30: "Brazil",
-     37: "Canada",
-     94: "Indonesia",
-     148: "New Zeland",
-     162: "Philippines",
-     166: "Qatar",
-     184: "Singapure",
-     189: "South Africa",
-     191: "Sri Lanka",
-     208: "Turkey",
-     214: "United Arab Emirates",
-     215: "England",
-     216: "USA",
-     }
     return COUNTRIES[country_id]
 
 def create_price_type(price_range):
@@ -96,23 +183,72 @@ def color_name(color_code):
     ''' Função pega o codigo do dataframe informado e 
         retorna uma cor correspondente dentro da chave informada
     '''
-    COLORS = {
-         "3F7E00": "Darkgreen",
-         "5BA829": "Green",
-         "9ACD32": "Lightgreen",
-         "CDD614": "Orange",
-         "FFBA00": "Red",
-         "CBCBC8": "Darkred",
-         "FF7800": "Darkred",
-         }
     return COLORS[color_code]
 
+def _por_valores_unicos(serie, func):
+    """
+    Aplica func só sobre os valores distintos da série e espalha o resultado
+    de volta para todas as linhas (nulos continuam nulos).
+    """
+    codigos, unicos = pd.factorize(serie)
+    valores = func(pd.Series(unicos, dtype=serie.dtype)).to_numpy(dtype=object)
+    # código -1 (nulo) aponta para o NaN acrescentado no final
+    valores = np.append(valores, np.nan)
+    return pd.Series(valores.take(codigos), index=serie.index, name=serie.name)
+
+def _mapear(serie, mapa, desconhecido, nome):
+    """
+    Mapeia a série inteira pelo dicionário (sem iterar linha a linha).
+    desconhecido: 'raise' (KeyError listando os códigos) | 'nan' | texto usado no lugar (ex.: 'Unknown')
+    """
+    def mapear_unicos(unicos):
+        mapeados = unicos.map(mapa)
+        faltantes = mapeados.isna()
+        if faltantes.any():
+            if desconhecido == 'raise':
+                codigos = sorted(unicos[faltantes].tolist(), key=str)
+                raise KeyError(f"Códigos sem {nome} definido: {codigos}")
+            if desconhecido != 'nan':
+                mapeados = mapeados.mask(faltantes, desconhecido)
+        return mapeados
+    return _por_valores_unicos(serie, mapear_unicos)
+
+@medido
+def mapear_paises(serie, desconhecido='raise'):
+    ''' Versão vetorizada de country_name para uma coluna inteira. '''
+    return _mapear(serie, COUNTRIES, desconhecido, 'país')
+
+@medido
+def mapear_categorias_preco(serie):
+    ''' Versão vetorizada de create_price_type (1/2/3 nomeados, o resto é "Gourmet"). '''
+    # tabela de consulta: posição 0 = "Gourmet", posições 1..3 = PRICE_TYPES
+    rotulos = np.array(["Gourmet"] + [PRICE_TYPES[k] for k in sorted(PRICE_TYPES)], dtype=object)
+    valores = serie.to_numpy()
+    posicoes = np.where(np.isin(valores, list(PRICE_TYPES)), valores, 0).astype(np.intp)
+    return pd.Series(rotulos[posicoes], index=serie.index, name=serie.name)
+
+@medido
+def mapear_cores(serie, desconhecido='raise'):
+    ''' Versão vetorizada de color_name para uma coluna inteira. '''
+    return _mapear(serie, COLORS, desconhecido, 'cor')
+
+@medido
+def normalizar_culinarias(serie):
+    ''' Lista completa de culinárias padronizada ("Pizza,Italian " -> "Pizza, Italian"), sem repetições. '''
+    return _por_valores_unicos(serie, lambda unicos: unicos.map(lambda t: ', '.join(separar(t)), na_action='ignore'))
+
+@medido
+def primeira_culinaria(serie):
+    ''' Mantém só a primeira culinária de "Pizza, Italian" (equivale a x.split(",")[0]). '''
+    return _por_valores_unicos(serie, lambda unicos: unicos.str.split(",", n=1).str[0])
+
 def mudar_coluna(df:pd.DataFrame,coluna:str,i:int):
     cols = list(df.columns)
     cols.insert(i, cols.pop(cols.index(coluna)))  
     df = df[cols]
     return df
 
+@medido
 def converter_usd(df, coluna_valor='average_cost_for_two', coluna_moeda='currency'):
     """
     Converte valores monetários de diferentes moedas para USD com base em um dicionário fixo de taxas.
@@ -149,4 +285,98 @@ def converter_usd(df, coluna_valor='average_cost_for_two', coluna_moeda='currenc
     # Cria coluna convertida
     df['valor_usd'] = (df[coluna_valor] * df['rate_to_usd']).round(2)
 
-    return df
\ No newline at end of file
+    return df
+
+# Tipos compactos do dataframe final: texto repetido vira category,
+# flags 0/1 viram bool e price_range (1..4) cabe em int8
+SCHEMA = {
+    'country_name':         'category',
+    'city':                 'category',
+    'cuisines':             'category',
+    'culinarias':           'category',
+    'currency':             'category',
+    'categoria_de_comida':  'category',
+    'color':                'category',
+    'rating_color':         'category',
+    'rating_text':          'category',
+    'has_table_booking':    'bool',
+    'has_online_delivery':  'bool',
+    'is_delivering_now':    'bool',
+    'switch_to_order_menu': 'bool',
+    'price_range':          'int8',
+}
+
+@medido
+def aplicar_schema(df, schema=None, *, report=False):
+    """
+    Converte as colunas para os tipos declarados em SCHEMA (ou no schema informado).
+    - colunas ausentes no df são ignoradas
+    - report: se True, retorna também um DataFrame com a memória por coluna antes/depois (bytes)
+    """
+    schema = SCHEMA if schema is None else schema
+    # só converte o que ainda não está no tipo certo (sem copiar o resto)
+    tipos = {col: tipo for col, tipo in schema.items() if col in df.columns and str(df[col].dtype) != tipo}
+    antes = df.memory_usage(index=False, deep=True) if report else None
+    out = df.astype(tipos, copy=False)
+    if not report:
+        return out
+
+    depois = out.memory_usage(index=False, deep=True)
+    relatorio = pd.DataFrame({
+        'dtype_antes': df.dtypes.astype(str),
+        'dtype_depois': out.dtypes.astype(str),
+        'bytes_antes': antes,
+        'bytes_depois': depois,
+    })
+    relatorio['reducao'] = 1 - relatorio['bytes_depois'] / relatorio['bytes_antes']
+    relatorio.loc['TOTAL', ['bytes_antes', 'bytes_depois']] = [antes.sum(), depois.sum()]
+    relatorio.loc['TOTAL', 'reducao'] = 1 - depois.sum() / antes.sum()
+    return out, relatorio
+
+@medido
+def enriquecer_restaurantes(df1):
+    """
+    Etapas de enriquecimento do pipeline (recebe o dataframe já renomeado,
+    limpo e sem duplicatas). Todas trabalham linha a linha, então podem
+    rodar sobre blocos do arquivo de forma independente.
+    """
+    # Concertando valor de número incorreto pela mediana
+    linha_selecionada = df1['restaurant_id'] == 16608070
+    df1.loc[linha_selecionada, 'average_cost_for_two'] = 45
+
+    # Criando as colunas Country Name, Categoria de Comida e Cor
+    df1['country_name'] = mapear_paises(df1['country_code'])
+    df1['categoria_de_comida'] = mapear_categorias_preco(df1['price_range'])
+    df1['color'] = mapear_cores(df1['rating_color'])
+
+    # Mudando as colunas de lugar
+    df1 = mudar_coluna(df1, 'color', -3)
+    df1 = mudar_coluna(df1, 'categoria_de_comida', -5)
+    df1 = mudar_coluna(df1, 'country_name', 3).copy()
+
+    # Lista completa em 'culinarias' (filtros por qualquer/todas as culinárias, modules.cuisines)
+    # e só a primeira em 'cuisines'
+    df1.insert(df1.columns.get_loc('cuisines') + 1, 'culinarias', normalizar_culinarias(df1['cuisines']))
+    df1['cuisines'] = primeira_culinaria(df1['cuisines'])
+
+    # Padronizando os valores de 'average_cost_for_two' para USD
+    df1 = converter_usd(df1, coluna_valor='average_cost_for_two', coluna_moeda='currency')
+
+    # Tipos compactos (category / bool / int8)
+    return aplicar_schema(df1)
+
+@medido
+def preparar_restaurantes(df):
+    """
+    Pipeline completo de limpeza e enriquecimento do zomato.csv.
+    Recebe o dataframe cru (colunas originais do CSV) e retorna o dataframe
+    pronto para os gráficos: colunas renomeadas, sem nulos/duplicatas,
+    country_name, categoria_de_comida, color, primeira culinária (e a lista
+    completa em culinarias) e valor_usd,
+    já com os tipos de SCHEMA.
+    """
+    # Renomeando colunas para minúsculo e trocando espaços por underlines
+    df1 = rename_columns(df)
+    df1 = limpar_dataframe(df1, dropna_mode='any')
+    df1 = remover_duplicatas(df1, subset='restaurant_id')
+    return enriquecer_restaurantes(df1)
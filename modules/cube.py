@@ -0,0 +1,265 @@
+import numpy as np
+import pandas as pd
+
+# Granularidade do cubo: cada célula é uma combinação destas colunas
+DIMENSOES = ['country_name', 'city', 'cuisines', 'price_range', 'faixa_nota', 'has_online_delivery']
+
+# Colunas numéricas resumidas em cada célula (soma e quantidade de não nulos)
+METRICAS = ['valor_usd', 'aggregate_rating', 'votes']
+
+# Faixas de nota alinhadas com os filtros das páginas (nota < 2.5 e nota > 4)
+FAIXAS_NOTA = ['<2.5', '2.5-4', '>4']
+
+# HyperLogLog para contagem distinta de votes: 2^P registradores por grupo
+# (erro padrão ~1.04 / sqrt(2^P), ~0,8%; os registradores ficam esparsos, então
+# o cubo guarda no máximo uma entrada por linha, qualquer que seja P)
+P_HLL = 14
+M_HLL = 1 << P_HLL
+
+# Dimensões categóricas com categorias que variam com os dados
+# (concatenadas como texto ao atualizar o cubo)
+DIMENSOES_CATEGORICAS = ['country_name', 'city', 'cuisines']
+
+# Colunas de cada célula que se atualizam por soma (ver Cubo.atualizar)
+SOMAVEIS = ['n'] + [f'soma_{m}' for m in METRICAS] + [f'n_{m}' for m in METRICAS]
+
+
+def faixa_nota(notas):
+    ''' Classifica aggregate_rating nas faixas de FAIXAS_NOTA. '''
+    valores = np.asarray(notas, dtype=float)
+    codigos = np.where(valores < 2.5, 0, np.where(valores > 4, 2, 1))
+    return pd.Categorical.from_codes(codigos, categories=FAIXAS_NOTA, ordered=True)
+
+
+def _bit_length(valores):
+    """
+    int.bit_length de cada uint64, só com deslocamentos inteiros (busca binária nos bits).
+    Converter para float64 (np.frexp) arredonda os 53 bits da mantissa e pode somar um bit.
+    """
+    restante = valores.astype(np.uint64, copy=True)
+    bits = np.zeros(len(restante), dtype=np.int64)
+    for deslocamento in (32, 16, 8, 4, 2, 1):
+        altos = restante >= (np.uint64(1) << np.uint64(deslocamento))
+        bits[altos] += deslocamento
+        restante[altos] >>= np.uint64(deslocamento)
+    return bits + restante.astype(np.int64)   # sobra 0 ou 1
+
+
+def _hll_registros(valores):
+    ''' Retorna (registrador, rank) de cada valor para o HyperLogLog. '''
+    h = pd.util.hash_array(np.asarray(valores))
+    registrador = (h >> np.uint64(64 - P_HLL)).astype(np.int64)
+    resto = h & np.uint64((1 << (64 - P_HLL)) - 1)
+    # rank = zeros à esquerda nos 64 - P_HLL bits restantes + 1 (resto zero: 64 - P_HLL + 1)
+    rank = (64 - P_HLL) - _bit_length(resto) + 1
+    return registrador, rank.astype(np.uint8)
+
+
+def _hll_estimativa(soma_inversa, zeros):
+    """
+    Estimativa de cardinalidade por grupo, a partir de Σ 2^-registrador (os zerados
+    valem 1) e da quantidade de registradores zerados de cada grupo.
+    """
+    m = M_HLL
+    alpha = 0.7213 / (1 + 1.079 / m)
+    bruta = alpha * m * m / soma_inversa
+    # correção para cardinalidades pequenas (linear counting)
+    pequena = m * np.log(m / np.maximum(zeros, 1))
+    return np.where((bruta <= 2.5 * m) & (zeros > 0), pequena, bruta).round().astype(np.int64)
+
+
+class Cubo:
+    """
+    Agregados pré-calculados dos restaurantes na granularidade de DIMENSOES.
+    - dados: uma linha por célula com n (linhas), id_min (menor restaurant_id),
+      soma_<m> e n_<m> para cada coluna de METRICAS
+    - hll_chaves / hll_ranks: registradores HyperLogLog esparsos de votes
+      (célula * M_HLL + registrador -> maior rank), mescláveis por máximo
+
+    Os gráficos leem o cubo com agregar(), que faz o "rollup" das células no
+    lugar do groupby sobre as linhas. Como o dataset não tem restaurant_id
+    repetido, nunique de restaurant_id é a soma de n.
+    """
+    def __init__(self, dados, hll_chaves, hll_ranks):
+        self.dados = dados
+        self.hll_chaves = hll_chaves
+        self.hll_ranks = hll_ranks
+
+    def __len__(self):
+        return len(self.dados)
+
+    def __getitem__(self, coluna):
+        # permite montar máscaras como no dataframe: cubo['price_range'] == 4
+        return self.dados[coluna]
+
+    @property
+    def empty(self):
+        return self.dados.empty
+
+    def filtrar(self, linhas):
+        ''' Retorna um novo cubo só com as células selecionadas pela máscara. '''
+        linhas = np.asarray(linhas, dtype=bool)
+        novas_posicoes = np.cumsum(linhas) - 1
+        celulas = self.hll_chaves // M_HLL
+        manter = linhas[celulas]
+        chaves = novas_posicoes[celulas[manter]] * M_HLL + self.hll_chaves[manter] % M_HLL
+        return Cubo(self.dados.loc[linhas].reset_index(drop=True), chaves, self.hll_ranks[manter])
+
+    def agregar(self, chaves, linhas=None, **metricas):
+        """
+        Equivalente a df.groupby(chaves, as_index=False).agg(**metricas) sobre as linhas originais.
+        Métricas aceitas (coluna, operação):
+        - (restaurant_id, 'nunique' | 'count' | 'size' | 'min')
+        - (dimensão, 'nunique'), ex.: ('city', 'nunique')
+        - (valor_usd | aggregate_rating | votes, 'sum' | 'count' | 'mean')
+        - ('votes', 'nunique')  -> estimativa HyperLogLog
+        linhas: máscara sobre as células (ex.: cubo['faixa_nota'] == '>4')
+        chaves=[]: uma única linha com o total das células (vazia se não houver células)
+        """
+        cubo = self if linhas is None else self.filtrar(linhas)
+        chaves = [chaves] if isinstance(chaves, str) else list(chaves)
+        brutos, plano = {}, {}
+        for nome, (coluna, operacao) in metricas.items():
+            if coluna == 'restaurant_id' and operacao in ('nunique', 'count', 'size'):
+                brutos['n'] = ('n', 'sum')
+                plano[nome] = ('n',)
+            elif coluna == 'restaurant_id' and operacao == 'min':
+                brutos['id_min'] = ('id_min', 'min')
+                plano[nome] = ('id_min',)
+            elif coluna in DIMENSOES and operacao == 'nunique':
+                brutos[f'nunique_{coluna}'] = (coluna, 'nunique')
+                plano[nome] = (f'nunique_{coluna}',)
+            elif coluna in METRICAS and operacao in ('sum', 'count', 'mean'):
+                brutos[f'soma_{coluna}'] = (f'soma_{coluna}', 'sum')
+                brutos[f'n_{coluna}'] = (f'n_{coluna}', 'sum')
+                plano[nome] = {'sum': (f'soma_{coluna}',), 'count': (f'n_{coluna}',),
+                               'mean': (f'soma_{coluna}', f'n_{coluna}')}[operacao]
+            elif coluna == 'votes' and operacao == 'nunique':
+                plano[nome] = None
+            else:
+                raise ValueError(f"Operação '{operacao}' em '{coluna}' não disponível no cubo.")
+
+        if chaves:
+            gb = cubo.dados.groupby(chaves, as_index=False, observed=True)
+        else:
+            # um grupo só, por uma chave constante que não vira coluna
+            gb = cubo.dados.groupby(np.zeros(len(cubo.dados), dtype=np.int8))
+        brutos.setdefault('n', ('n', 'sum'))
+        agregado = gb.agg(**brutos).reset_index(drop=True)
+        out = agregado.loc[:, chaves].copy()
+        for nome, origem in plano.items():
+            if origem is None:
+                out[nome] = cubo._distintos_por_grupo(gb.ngroup().to_numpy(), len(agregado))
+            elif len(origem) == 1:
+                out[nome] = agregado[origem[0]]
+            else:
+                out[nome] = agregado[origem[0]] / agregado[origem[1]].replace(0, np.nan)
+        return out
+
+    def atualizar(self, removidas, inseridas, atuais):
+        """
+        Aplica um upsert de restaurantes ao cubo sem reagrupar o dataset inteiro.
+        - removidas: versões antigas das linhas que saíram ou foram substituídas
+        - inseridas: linhas novas (incluindo as versões novas das substituídas)
+        - atuais: linhas já atualizadas que cubram todas as células que perderam
+          linhas (pode conter outras, ex.: todas as linhas das cidades afetadas)
+        n, somas e contagens são ajustados por soma/subtração; id_min e o HLL não
+        aceitam remoção, então são mesclados nas células que só ganharam linhas e
+        recalculados a partir de `atuais` nas que perderam. Retorna um novo Cubo.
+        """
+        def contribuicoes(df, sinal):
+            base = _linhas_do_cubo(df)
+            out = base.loc[:, DIMENSOES].astype({d: object for d in DIMENSOES_CATEGORICAS})
+            out['n'] = sinal
+            for m in METRICAS:
+                out[f'soma_{m}'] = sinal * base[m].fillna(0)
+                out[f'n_{m}'] = sinal * base[m].notna().astype(np.int64)
+            out['id_min'] = base['restaurant_id'] if sinal > 0 else np.nan
+            return out, base
+
+        antigas = self.dados.astype({d: object for d in DIMENSOES_CATEGORICAS})
+        menos, _ = contribuicoes(removidas, -1)
+        mais, base_mais = contribuicoes(inseridas, 1)
+        todas = pd.concat([antigas, menos, mais], ignore_index=True)
+        gb = todas.groupby(DIMENSOES, sort=True, observed=True, dropna=False)
+        grupo = gb.ngroup().to_numpy().astype(np.int64)
+        dados = gb[SOMAVEIS].sum()
+        dados['id_min'] = gb['id_min'].min()
+        dados = dados.reset_index()
+
+        fim_antigas, fim_menos = len(antigas), len(antigas) + len(menos)
+        recalcular = np.zeros(len(dados), dtype=bool)
+        recalcular[grupo[fim_antigas:fim_menos]] = True
+
+        # HLL: registradores antigos (reposicionados) + os das linhas inseridas
+        celulas = grupo[:fim_antigas][self.hll_chaves // M_HLL]
+        registrador, rank = _hll_registros(base_mais['votes'].to_numpy())
+        chaves = [celulas * M_HLL + self.hll_chaves % M_HLL, grupo[fim_menos:] * M_HLL + registrador]
+        ranks = [self.hll_ranks, rank]
+
+        # células que perderam linhas: id_min e HLL recalculados a partir de `atuais`
+        if recalcular.any():
+            manter = ~recalcular[chaves[0] // M_HLL]
+            chaves[0], ranks[0] = chaves[0][manter], ranks[0][manter]
+            manter = ~recalcular[chaves[1] // M_HLL]
+            chaves[1], ranks[1] = chaves[1][manter], ranks[1][manter]
+
+            base_atuais = _linhas_do_cubo(atuais)
+            alvo = base_atuais.loc[:, DIMENSOES].astype({d: object for d in DIMENSOES_CATEGORICAS})
+            posicao = pd.MultiIndex.from_frame(dados[DIMENSOES]).get_indexer(pd.MultiIndex.from_frame(alvo))
+            sel = posicao >= 0
+            sel[sel] = recalcular[posicao[sel]]
+            posicao = posicao[sel]
+            contagem = np.bincount(posicao, minlength=len(dados))
+            if (contagem[recalcular] != dados['n'].to_numpy()[recalcular]).any():
+                raise ValueError("`atuais` não cobre todas as linhas das células que perderam restaurantes.")
+            ids = base_atuais['restaurant_id'].to_numpy()[sel]
+            minimos = pd.Series(ids).groupby(posicao).min()
+            dados.loc[minimos.index, 'id_min'] = minimos.to_numpy()
+            registrador, rank = _hll_registros(base_atuais['votes'].to_numpy()[sel])
+            chaves.append(posicao * M_HLL + registrador)
+            ranks.append(rank)
+
+        maiores = pd.Series(np.concatenate(ranks)).groupby(np.concatenate(chaves)).max()
+        dados = dados.astype({d: 'category' for d in DIMENSOES_CATEGORICAS})
+        dados['id_min'] = dados['id_min'].astype(np.int64)
+        cubo = Cubo(dados.loc[:, self.dados.columns], maiores.index.to_numpy(dtype=np.int64),
+                    maiores.to_numpy(dtype=np.uint8))
+        return cubo.filtrar(dados['n'].to_numpy() > 0)
+
+    def _distintos_por_grupo(self, grupo_da_celula, n_grupos):
+        # mescla esparsa: maior rank por (grupo, registrador), sem a matriz grupos x M_HLL
+        grupos = grupo_da_celula[self.hll_chaves // M_HLL]
+        maiores = pd.Series(self.hll_ranks).groupby(grupos * M_HLL + self.hll_chaves % M_HLL).max()
+        grupo = maiores.index.to_numpy() // M_HLL
+        zeros = M_HLL - np.bincount(grupo, minlength=n_grupos)
+        inversos = np.bincount(grupo, weights=np.power(2.0, -maiores.to_numpy(dtype=np.float64)), minlength=n_grupos)
+        return _hll_estimativa(zeros + inversos, zeros)
+
+
+def _linhas_do_cubo(df):
+    ''' Colunas de df usadas pelo cubo, com a faixa de nota calculada. '''
+    base = df.loc[:, [c for c in DIMENSOES if c != 'faixa_nota'] + ['restaurant_id'] + METRICAS]
+    base['faixa_nota'] = faixa_nota(base['aggregate_rating'])
+    return base
+
+
+def construir_cubo(df):
+    """
+    Monta o Cubo a partir do dataframe limpo (saída de load_restaurants).
+    Uma passada de groupby sobre as linhas; depois disso os gráficos só leem o cubo.
+    """
+    base = _linhas_do_cubo(df)
+
+    brutos = {'n': ('restaurant_id', 'size'), 'id_min': ('restaurant_id', 'min')}
+    for coluna in METRICAS:
+        brutos[f'soma_{coluna}'] = (coluna, 'sum')
+        brutos[f'n_{coluna}'] = (coluna, 'count')
+    gb = base.groupby(DIMENSOES, as_index=False, observed=True)
+    dados = gb.agg(**brutos)
+
+    # HLL esparso: para cada (célula, registrador) guarda só o maior rank
+    registrador, rank = _hll_registros(base['votes'].to_numpy())
+    chave = gb.ngroup().to_numpy().astype(np.int64) * M_HLL + registrador
+    maiores = pd.Series(rank).groupby(chave).max()
+    return Cubo(dados, maiores.index.to_numpy(dtype=np.int64), maiores.to_numpy(dtype=np.uint8))
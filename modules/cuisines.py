@@ -0,0 +1,159 @@
+import functools
+
+import numpy as np
+import pandas as pd
+
+# Coluna com a lista completa de culinárias ("Pizza, Italian"), categórica
+COLUNA_CULINARIAS = 'culinarias'
+
+BITS_POR_PALAVRA = 64
+
+
+def separar(texto):
+    ''' "Pizza,  Italian, Pizza" -> ['Pizza', 'Italian'] (sem vazios nem repetições, na ordem original). '''
+    return list(dict.fromkeys(c.strip() for c in str(texto).split(',') if c.strip()))
+
+
+class IndiceCulinarias:
+    """
+    Bitset combinação × culinária. Cada combinação distinta de culinárias (uma
+    categoria da coluna culinarias) vira uma linha de bits em palavras uint64,
+    uma culinária por bit, na ordem do vocabulário. Um restaurante chega à sua
+    linha pelo código da categoria, então filtrar o dataframe custa o mesmo
+    que um isin na coluna categórica: a consulta roda sobre as combinações
+    (alguns milhares) e o resultado é espalhado pelos códigos.
+    """
+    def __init__(self, combinacoes):
+        listas = [separar(c) for c in combinacoes]
+        self.vocabulario = np.array(sorted({c for lista in listas for c in lista}), dtype=object)
+        self.posicao = {c: i for i, c in enumerate(self.vocabulario)}
+        self.n_palavras = max(1, -(-len(self.vocabulario) // BITS_POR_PALAVRA))
+        linhas = np.repeat(np.arange(len(listas)), [len(lista) for lista in listas])
+        colunas = np.array([self.posicao[c] for lista in listas for c in lista], dtype=np.int64)
+        self.incidencia = np.zeros((len(listas), len(self.vocabulario)), dtype=bool)
+        self.incidencia[linhas, colunas] = True
+        self.bits = self._empacotar(self.incidencia)
+
+    def _empacotar(self, matriz):
+        ''' Matriz booleana (linhas × vocabulário) -> palavras uint64 (bit i da palavra j = culinária 64*j + i). '''
+        largura = self.n_palavras * BITS_POR_PALAVRA
+        completa = np.zeros((len(matriz), largura), dtype=bool)
+        completa[:, :matriz.shape[1]] = matriz
+        return np.packbits(completa, axis=1, bitorder='little').view(np.uint64)
+
+    def consulta(self, culinarias):
+        ''' Palavras de bits das culinárias pedidas e se todas existem no vocabulário. '''
+        presentes = [self.posicao[c] for c in culinarias if c in self.posicao]
+        marcadas = np.zeros((1, len(self.vocabulario)), dtype=bool)
+        marcadas[0, presentes] = True
+        return self._empacotar(marcadas)[0], len(presentes) == len(set(culinarias))
+
+    def combinacoes(self, culinarias, modo='any'):
+        """
+        Máscara sobre as combinações:
+        - modo='any': tem ao menos uma das culinárias
+        - modo='all': tem todas (uma culinária fora do vocabulário não casa com nada)
+        Sem culinárias pedidas, nenhum modo seleciona nada (como um isin vazio).
+        """
+        if not len(culinarias):
+            return np.zeros(len(self.bits), dtype=bool)
+        bits, completas = self.consulta(culinarias)
+        comum = self.bits & bits
+        if modo == 'any':
+            return (comum != 0).any(axis=1)
+        if modo == 'all':
+            if not completas:
+                return np.zeros(len(self.bits), dtype=bool)
+            return (comum == bits).all(axis=1)
+        raise ValueError(f"Modo '{modo}' inválido: use 'any' ou 'all'.")
+
+
+@functools.lru_cache(maxsize=8)
+def _indice_por_categorias(dtype):
+    return IndiceCulinarias(dtype.categories)
+
+
+def indice_culinarias(serie):
+    ''' IndiceCulinarias das categorias de `serie` (reaproveitado entre recortes do mesmo dataframe). '''
+    return _indice_por_categorias(serie.dtype)
+
+
+def _codigos(df, coluna):
+    serie = df[coluna]
+    if not isinstance(serie.dtype, pd.CategoricalDtype):
+        serie = serie.astype('category')
+    return serie, serie.cat.codes.to_numpy()
+
+
+def culinarias_disponiveis(df, *, coluna=COLUNA_CULINARIAS):
+    """
+    Todas as culinárias que aparecem em df (vocabulário do IndiceCulinarias, em ordem
+    alfabética), inclusive as que nunca são a primeira do restaurante: as opções dos filtros.
+    Sem a coluna culinarias, os valores distintos de 'cuisines'.
+    """
+    if coluna not in df.columns:
+        return sorted(df['cuisines'].dropna().unique())
+    serie, _ = _codigos(df, coluna)
+    return list(indice_culinarias(serie).vocabulario)
+
+
+def mascara_culinarias(df, culinarias, modo='any', *, coluna=COLUNA_CULINARIAS):
+    """
+    Linhas de df com as culinárias pedidas (modo 'any' ou 'all', ver IndiceCulinarias.combinacoes),
+    considerando todas as culinárias de cada restaurante. Sem a coluna culinarias
+    (dataframes antigos), cai para a primeira culinária em 'cuisines'.
+    """
+    culinarias = list(culinarias)
+    if coluna not in df.columns:
+        if modo == 'all' and len(set(culinarias)) > 1:
+            return pd.Series(False, index=df.index)
+        return df['cuisines'].isin(culinarias)
+    serie, codigos = _codigos(df, coluna)
+    # o -1 (sem culinária) cai no False do fim
+    por_combinacao = np.append(indice_culinarias(serie).combinacoes(culinarias, modo), False)
+    return pd.Series(por_combinacao[codigos], index=df.index)
+
+
+def agregar_por_culinaria(df, *, coluna=COLUNA_CULINARIAS, **metricas):
+    """
+    Agrega contando cada restaurante em todas as suas culinárias, sem explodir o dataframe:
+    agrega por combinação (groupby nos códigos) e distribui pela matriz de incidência.
+    metricas: nome=(coluna, operação), operação em 'mean', 'sum', 'count', 'min', 'max'.
+    Retorna um dataframe indexado pela culinária (só as que aparecem em df).
+    """
+    serie, codigos = _codigos(df, coluna)
+    indice = indice_culinarias(serie)
+    validos = codigos >= 0
+    grupos = pd.Series(codigos[validos])
+    por_combinacao = {}
+    for nome, (alvo, operacao) in metricas.items():
+        valores = pd.Series(df[alvo].to_numpy()[validos])
+        gb = valores.groupby(grupos)
+        if operacao in ('mean', 'sum', 'count'):
+            por_combinacao[nome] = (gb.sum(), gb.count())
+        elif operacao in ('min', 'max'):
+            por_combinacao[nome] = getattr(gb, operacao)()
+        else:
+            raise ValueError(f"Operação '{operacao}' inválida.")
+
+    presentes = np.unique(codigos[validos])
+    incidencia = indice.incidencia[presentes]
+    quantidade = incidencia.sum(axis=0)
+    usadas = quantidade > 0
+    out = pd.DataFrame(index=pd.Index(indice.vocabulario[usadas], name='culinaria'))
+    for nome, (alvo, operacao) in metricas.items():
+        if operacao in ('mean', 'sum', 'count'):
+            somas, contagens = (s.reindex(presentes).to_numpy(dtype=float) for s in por_combinacao[nome])
+            soma, contagem = somas @ incidencia, contagens @ incidencia
+            valores = {'sum': soma, 'count': contagem, 'mean': soma / np.where(contagem, contagem, np.nan)}[operacao]
+        else:
+            extremos = por_combinacao[nome].reindex(presentes).to_numpy(dtype=float)
+            vazio = np.inf if operacao == 'min' else -np.inf
+            matriz = np.where(incidencia, extremos[:, None], vazio)
+            # initial: sem combinações (df vazio) a redução não tem identidade
+            valores = matriz.min(axis=0, initial=vazio) if operacao == 'min' else matriz.max(axis=0, initial=vazio)
+        valores = valores[usadas]
+        if operacao == 'count' or (operacao in ('min', 'max') and pd.api.types.is_integer_dtype(df[alvo])):
+            valores = valores.astype(np.int64)
+        out[nome] = valores
+    return out
@@ -0,0 +1,400 @@
+import functools
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import streamlit as st
+
+from modules.cleaning import (
+    ChavesVistas, SCHEMA, aplicar_schema, enriquecer_restaurantes, limpar_dataframe,
+    preparar_restaurantes, remover_duplicatas, rename_columns,
+)
+from modules.cube import Cubo, construir_cubo
+from modules.filters import construir_indice_filtros
+from modules.perf import medido
+from modules.search import construir_indice_busca
+from modules.spatial import construir_indice
+
+# zomato.csv fica na raiz do projeto (independe do diretório de execução)
+CSV_PADRAO = Path(__file__).resolve().parent.parent / 'zomato.csv'
+
+# chaves, nos metadados do snapshot, com o hash do CSV que o originou
+# e a versão do pipeline que o gerou
+CHAVE_HASH = b'fome_zero.fonte_sha256'
+CHAVE_VERSAO = b'fome_zero.versao_pipeline'
+
+# geração do snapshot (0 no build, +1 a cada delta aplicado por modules.ingest)
+# e o histórico dos deltas (JSON)
+CHAVE_GERACAO = b'fome_zero.geracao'
+CHAVE_DELTAS = b'fome_zero.deltas'
+
+# no arquivo do cubo: registradores HLL, identidade do snapshot de origem e versão do formato
+CHAVE_HLL_CHAVES = b'fome_zero.hll_chaves'
+CHAVE_HLL_RANKS = b'fome_zero.hll_ranks'
+CHAVE_ORIGEM = b'fome_zero.origem'
+CHAVE_VERSAO_CUBO = b'fome_zero.versao_cubo'
+
+# incrementar sempre que preparar_restaurantes mudar o dataframe gerado
+# (colunas, tipos ou regras), para invalidar snapshots antigos
+VERSAO_PIPELINE = b'3'
+
+# incrementar sempre que o formato do cubo persistido mudar (colunas, registradores HLL)
+VERSAO_CUBO = b'2'
+
+
+def dataset_version(caminho=CSV_PADRAO):
+    ''' Retorna a assinatura (caminho, tamanho, mtime, geração do snapshot) dos dados.
+        Qualquer alteração no CSV ou delta aplicado gera uma assinatura nova. '''
+    info = os.stat(caminho)
+    return (str(Path(caminho).resolve()), info.st_size, info.st_mtime_ns,
+            geracao_snapshot(caminho_snapshot(caminho)))
+
+
+def sem_avisos_de_contexto():
+    ''' Fora de uma página (API, relatórios), os caches do Streamlit avisam a cada chamada; silencia esse aviso. '''
+    logging.getLogger('streamlit.runtime.scriptrunner_utils.script_run_context').addFilter(
+        lambda registro: 'ScriptRunContext' not in registro.getMessage())
+
+
+def caminho_snapshot(caminho=CSV_PADRAO):
+    ''' Snapshot colunar fica ao lado do CSV: zomato.csv -> zomato.arrow '''
+    return Path(caminho).with_suffix('.arrow')
+
+
+def caminho_cubo(caminho=CSV_PADRAO):
+    ''' Cubo de agregados persistido ao lado do snapshot: zomato.csv -> zomato.cubo.arrow '''
+    return Path(caminho).with_suffix('.cubo.arrow')
+
+
+def _metadados(destino):
+    ''' Metadados do schema de um arquivo Arrow IPC (só o rodapé é lido), ou None. '''
+    try:
+        with pa.memory_map(str(destino), 'r') as origem:
+            return pa.ipc.open_file(origem).schema.metadata or {}
+    except (OSError, pa.ArrowInvalid):
+        return None
+
+
+def geracao_snapshot(destino):
+    ''' Quantos deltas já foram aplicados ao snapshot (0 se não existir). '''
+    try:
+        info = os.stat(destino)
+    except OSError:
+        return 0
+    return _geracao(str(Path(destino).resolve()), info.st_size, info.st_mtime_ns)
+
+
+@functools.lru_cache(maxsize=16)
+def _geracao(destino, tamanho, mtime_ns):
+    # tamanho e mtime_ns só entram na chave: o rodapé é lido uma vez por versão do arquivo
+    # (dataset_version roda a cada rerun e a cada requisição da API)
+    metadados = _metadados(destino)
+    return int(metadados.get(CHAVE_GERACAO, b'0')) if metadados else 0
+
+
+def identidade_snapshot(destino, fonte_sha256):
+    """
+    Identifica o conteúdo do snapshot (hash do CSV, versão do pipeline e geração),
+    ou None se ele não existir ou não corresponder ao CSV atual.
+    """
+    metadados = _metadados(destino) if Path(destino).exists() else None
+    if not metadados or metadados.get(CHAVE_HASH) != fonte_sha256.encode() \
+            or metadados.get(CHAVE_VERSAO) != VERSAO_PIPELINE:
+        return None
+    return b':'.join([metadados[CHAVE_HASH], VERSAO_PIPELINE, metadados.get(CHAVE_GERACAO, b'0')])
+
+
+def hash_arquivo(caminho, bloco=1 << 20):
+    ''' SHA-256 do conteúdo do arquivo, lido em blocos. '''
+    h = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for parte in iter(lambda: f.read(bloco), b''):
+            h.update(parte)
+    return h.hexdigest()
+
+
+def _somente_leitura(df):
+    """
+    Reconstrói o dataframe sobre arrays numpy marcados como não graváveis,
+    para que nenhuma página altere o objeto compartilhado pelo cache.
+    Usa views (sem cópia), então colunas vindas do snapshot continuam mapeadas.
+    """
+    dados = {}
+    for col in df.columns:
+        valores = df[col].array
+        if isinstance(df[col].dtype, np.dtype):
+            valores = np.asarray(valores).view()
+            valores.flags.writeable = False
+        dados[col] = valores
+    return pd.DataFrame(dados, index=df.index, copy=False)
+
+
+def build_snapshot(caminho=CSV_PADRAO, destino=None, *, fonte_sha256=None):
+    """
+    Roda o pipeline completo sobre o CSV e grava o resultado em formato
+    Arrow IPC (sem compressão, para permitir memory-map na leitura).
+    O hash do CSV vai nos metadados do schema. Retorna o dataframe gravado.
+    """
+    destino = Path(destino) if destino else caminho_snapshot(caminho)
+    fonte_sha256 = fonte_sha256 or hash_arquivo(caminho)
+    df = preparar_restaurantes(pd.read_csv(caminho))
+
+    gravar_arrow(tabela_com_metadados(pa.Table.from_pandas(df, preserve_index=False), fonte_sha256), destino)
+    return df
+
+
+def tabela_com_metadados(tabela, fonte_sha256, geracao=0, deltas=()):
+    metadados = dict(tabela.schema.metadata or {})
+    metadados[CHAVE_HASH] = fonte_sha256.encode()
+    metadados[CHAVE_VERSAO] = VERSAO_PIPELINE
+    metadados[CHAVE_GERACAO] = str(geracao).encode()
+    metadados[CHAVE_DELTAS] = json.dumps(list(deltas)).encode()
+    return tabela.replace_schema_metadata(metadados)
+
+
+def gravar_arrow(tabela, destino):
+    ''' Grava a tabela em Arrow IPC num temporário e troca de uma vez (leitores nunca veem arquivo pela metade). '''
+    destino = Path(destino)
+    temporario = destino.with_name(destino.name + '.tmp')
+    with pa.OSFile(str(temporario), 'wb') as saida:
+        with pa.ipc.new_file(saida, tabela.schema) as escritor:
+            escritor.write_table(tabela)
+    os.replace(temporario, destino)
+
+
+def gravar_cubo(cubo, destino, origem):
+    ''' Persiste o cubo (células + HLL) com a identidade do snapshot que o originou. '''
+    tabela = pa.Table.from_pandas(cubo.dados, preserve_index=False)
+    tabela = tabela.replace_schema_metadata({
+        **(tabela.schema.metadata or {}),
+        CHAVE_HLL_CHAVES: cubo.hll_chaves.astype(np.int64).tobytes(),
+        CHAVE_HLL_RANKS: cubo.hll_ranks.astype(np.uint8).tobytes(),
+        CHAVE_ORIGEM: origem,
+        CHAVE_VERSAO_CUBO: VERSAO_CUBO,
+    })
+    gravar_arrow(tabela, destino)
+
+
+def ler_cubo(destino, origem):
+    ''' Lê o cubo persistido se ele tiver sido gerado do snapshot com a identidade informada; senão None. '''
+    destino = Path(destino)
+    if not destino.exists():
+        return None
+    try:
+        leitor = pa.ipc.open_file(pa.memory_map(str(destino), 'r'))
+    except (OSError, pa.ArrowInvalid):
+        return None
+    metadados = leitor.schema.metadata or {}
+    if metadados.get(CHAVE_ORIGEM) != origem or metadados.get(CHAVE_VERSAO_CUBO) != VERSAO_CUBO:
+        return None
+    return Cubo(leitor.read_all().to_pandas(),
+                np.frombuffer(metadados[CHAVE_HLL_CHAVES], dtype=np.int64),
+                np.frombuffer(metadados[CHAVE_HLL_RANKS], dtype=np.uint8))
+
+
+def build_snapshot_em_blocos(caminho=CSV_PADRAO, destino=None, *, chunksize=100_000,
+                             fonte_sha256=None, report=False):
+    """
+    Versão em streaming de build_snapshot para arquivos que não cabem na memória.
+    Lê o CSV em blocos de `chunksize` linhas, limpa cada bloco, remove duplicatas de
+    restaurant_id entre blocos (ChavesVistas) e grava cada bloco no snapshot assim que
+    fica pronto. O pico de memória do build depende do tamanho do bloco, não do arquivo;
+    quem depois carrega o snapshot (load_restaurants) ainda traz o dataframe inteiro para a memória.
+    Retorna o número de linhas gravadas (e as estatísticas de duplicatas se report=True).
+    """
+    destino = Path(destino) if destino else caminho_snapshot(caminho)
+    fonte_sha256 = fonte_sha256 or hash_arquivo(caminho)
+    vistas = ChavesVistas()
+    stats = {"rows_before": 0, "rows_after": 0}
+    escritor = esquema = None
+    # categorias variam de bloco para bloco: no arquivo vão como texto e
+    # ler_snapshot reaplica o SCHEMA
+    como_texto = {col: 'object' for col, tipo in SCHEMA.items() if tipo == 'category'}
+
+    temporario = destino.with_name(destino.name + '.tmp')
+    with pa.OSFile(str(temporario), 'wb') as saida:
+        for bloco in pd.read_csv(caminho, chunksize=chunksize):
+            bloco = limpar_dataframe(rename_columns(bloco), dropna_mode='any')
+            bloco, parcial = remover_duplicatas(bloco, subset='restaurant_id', report=True, vistas=vistas)
+            stats["rows_before"] += parcial["rows_before"]
+            stats["rows_after"] += parcial["rows_after"]
+            if bloco.empty:
+                continue
+            bloco = enriquecer_restaurantes(bloco)
+            bloco = bloco.astype({c: t for c, t in como_texto.items() if c in bloco.columns})
+            if escritor is None:
+                tabela = tabela_com_metadados(pa.Table.from_pandas(bloco, preserve_index=False), fonte_sha256)
+                esquema = tabela.schema
+                escritor = pa.ipc.new_file(saida, esquema)
+            else:
+                tabela = pa.Table.from_pandas(bloco, schema=esquema, preserve_index=False)
+            escritor.write_table(tabela)
+        if escritor is None:
+            raise ValueError(f"Nenhuma linha válida em {caminho}.")
+        escritor.close()
+    os.replace(temporario, destino)
+
+    if not report:
+        return stats["rows_after"]
+    antes, depois = stats["rows_before"], stats["rows_after"]
+    stats.update({
+        "removed": antes - depois,
+        "pct_removed": (antes - depois) / antes if antes else 0.0,
+        "subset": ['restaurant_id'],
+        "keep": 'first',
+    })
+    return depois, stats
+
+
+def ler_snapshot(destino, fonte_sha256):
+    """
+    Abre o snapshot via memory-map se ele existir e tiver sido gerado a partir
+    de um CSV com o hash informado e pela versão atual do pipeline.
+    Caso contrário retorna None.
+    """
+    destino = Path(destino)
+    if not destino.exists():
+        return None
+    try:
+        leitor = pa.ipc.open_file(pa.memory_map(str(destino), 'r'))
+    except (OSError, pa.ArrowInvalid):
+        return None
+    metadados = leitor.schema.metadata or {}
+    if metadados.get(CHAVE_HASH) != fonte_sha256.encode() or metadados.get(CHAVE_VERSAO) != VERSAO_PIPELINE:
+        return None
+    # split_blocks evita consolidar colunas (e copiar os buffers mapeados);
+    # aplicar_schema só converte o que veio como texto (snapshot em blocos)
+    return aplicar_schema(leitor.read_all().to_pandas(split_blocks=True))
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _hash_fonte(caminho, tamanho, mtime_ns):
+    # um hash do CSV por versão do arquivo, compartilhado por dataframe e cubo
+    return hash_arquivo(caminho)
+
+
+@st.cache_resource(show_spinner="Carregando restaurantes...", max_entries=4)
+def _carregar(caminho, tamanho, mtime_ns, geracao=0, chunksize=None):
+    # tamanho, mtime_ns e geracao entram só na chave do cache
+    fonte_sha256 = _hash_fonte(caminho, tamanho, mtime_ns)
+    destino = caminho_snapshot(caminho)
+    df = ler_snapshot(destino, fonte_sha256)
+    if df is None:
+        try:
+            if chunksize:
+                # os blocos só limitam a memória do build: o dashboard usa o dataframe inteiro,
+                # e o to_pandas materializa texto/categorias e junta os blocos de cada coluna
+                build_snapshot_em_blocos(caminho, destino, chunksize=chunksize, fonte_sha256=fonte_sha256)
+                df = ler_snapshot(destino, fonte_sha256)
+            else:
+                df = build_snapshot(caminho, destino, fonte_sha256=fonte_sha256)
+        except OSError:
+            # diretório somente leitura: segue sem snapshot
+            df = preparar_restaurantes(pd.read_csv(caminho))
+    return _somente_leitura(df)
+
+
+@medido
+def load_restaurants(caminho=CSV_PADRAO, *, chunksize=None):
+    """
+    Carrega o zomato.csv já limpo e enriquecido.
+    O pipeline roda uma única vez por processo e o resultado é compartilhado
+    entre sessões; a chave do cache é (caminho, tamanho, mtime) do arquivo.
+    Em processos novos, o snapshot Arrow (zomato.arrow) é aberto via
+    memory-map quando o hash do CSV confere; senão é reconstruído
+    (em blocos de `chunksize` linhas, se informado). Deltas aplicados ao
+    snapshot (modules.ingest) mudam a geração e, com ela, a chave do cache.
+    O dataframe retornado é somente leitura: filtre com .loc antes de alterar.
+    """
+    return _carregar(*dataset_version(caminho), chunksize)
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _carregar_cubo(caminho, tamanho, mtime_ns, geracao=0, chunksize=None):
+    df = _carregar(caminho, tamanho, mtime_ns, geracao, chunksize)
+    origem = identidade_snapshot(caminho_snapshot(caminho), _hash_fonte(caminho, tamanho, mtime_ns))
+    destino = caminho_cubo(caminho)
+    cubo = ler_cubo(destino, origem) if origem else None
+    if cubo is None:
+        cubo = construir_cubo(df)
+        if origem:
+            try:
+                gravar_cubo(cubo, destino, origem)
+            except OSError:
+                pass
+    return cubo
+
+
+@medido
+def load_cubo(caminho=CSV_PADRAO, *, chunksize=None):
+    """
+    Cubo de agregados (modules.cube) do mesmo dataset de load_restaurants,
+    montado uma vez por versão do arquivo e compartilhado entre sessões.
+    Fica persistido em zomato.cubo.arrow junto com a identidade do snapshot,
+    para ser reaproveitado por processos novos e atualizado pelos deltas.
+    """
+    return _carregar_cubo(*dataset_version(caminho), chunksize)
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _carregar_indice(caminho, tamanho, mtime_ns, geracao=0, chunksize=None):
+    return construir_indice(_carregar(caminho, tamanho, mtime_ns, geracao, chunksize))
+
+
+@medido
+def load_indice_espacial(caminho=CSV_PADRAO, *, chunksize=None):
+    """
+    Índice espacial (modules.spatial) sobre latitude/longitude do dataset de
+    load_restaurants; as consultas devolvem rótulos do índice do dataframe.
+    """
+    return _carregar_indice(*dataset_version(caminho), chunksize)
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _carregar_busca(caminho, tamanho, mtime_ns, geracao=0, chunksize=None):
+    return construir_indice_busca(_carregar(caminho, tamanho, mtime_ns, geracao, chunksize))
+
+
+@medido
+def load_indice_busca(caminho=CSV_PADRAO, *, chunksize=None):
+    """
+    Índice de busca textual (modules.search) sobre nome, cidade, bairro e
+    endereço do dataset de load_restaurants, montado uma vez por versão.
+    """
+    return _carregar_busca(*dataset_version(caminho), chunksize)
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _carregar_filtros(caminho, tamanho, mtime_ns, geracao=0, chunksize=None):
+    return construir_indice_filtros(_carregar(caminho, tamanho, mtime_ns, geracao, chunksize))
+
+
+@medido
+def load_indice_filtros(caminho=CSV_PADRAO, *, chunksize=None):
+    """
+    Bitmaps dos filtros da barra lateral (modules.filters) sobre o dataset de
+    load_restaurants, montados uma vez por versão; os filtros devolvem
+    posições nesse dataframe.
+    """
+    return _carregar_filtros(*dataset_version(caminho), chunksize)
+
+
+if __name__ == '__main__':
+    # Etapa de build: python -m modules.data [caminho_csv] [--chunksize N]
+    import argparse
+    parser = argparse.ArgumentParser(description="Gera o snapshot Arrow do dataset limpo.")
+    parser.add_argument('csv', nargs='?', type=Path, default=CSV_PADRAO)
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help="lê o CSV em blocos de N linhas (memória limitada pelo bloco)")
+    args = parser.parse_args()
+    if args.chunksize:
+        linhas, stats = build_snapshot_em_blocos(args.csv, chunksize=args.chunksize, report=True)
+        print(f"Duplicatas removidas: {stats['removed']} ({stats['pct_removed']:.1%})")
+    else:
+        linhas = len(build_snapshot(args.csv))
+    print(f"Snapshot gravado em {caminho_snapshot(args.csv)} ({linhas} linhas)")
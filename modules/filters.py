@@ -0,0 +1,142 @@
+import numpy as np
+import pandas as pd
+
+from modules.cube import faixa_nota
+from modules.cuisines import COLUNA_CULINARIAS, indice_culinarias
+
+# Colunas com um bitmap por valor distinto (faixa_nota é derivada de aggregate_rating)
+DIMENSOES_FILTRO = ['country_name', 'cuisines', 'price_range', 'faixa_nota']
+
+# Flags booleanas: um bitmap para True e outro para False
+FLAGS_FILTRO = ['has_table_booking', 'has_online_delivery', 'is_delivering_now', 'switch_to_order_menu']
+
+# Quantidade de bits ligados em cada byte
+_BITS_POR_BYTE = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def _empacotar(mascara):
+    return np.packbits(np.asarray(mascara, dtype=bool), bitorder='little')
+
+
+class Filtro:
+    """
+    Conjunto de linhas do dataframe indexado, como bitmap empacotado (1 bit por
+    linha, np.packbits). Combina com & (e), | (ou) e ~ (não) byte a byte, sem
+    tocar no dataframe; só posicoes()/mascara() expandem o resultado.
+    """
+    __slots__ = ('bits', 'n')
+
+    def __init__(self, bits, n):
+        self.bits = bits
+        self.n = n
+
+    def __and__(self, outro):
+        return Filtro(self.bits & outro.bits, self.n)
+
+    def __or__(self, outro):
+        return Filtro(self.bits | outro.bits, self.n)
+
+    def __invert__(self):
+        bits = ~self.bits
+        if self.n % 8:
+            bits[-1] &= (1 << (self.n % 8)) - 1   # bits de preenchimento continuam desligados
+        return Filtro(bits, self.n)
+
+    def contar(self):
+        return int(_BITS_POR_BYTE[self.bits].sum(dtype=np.int64))
+
+    def mascara(self, posicoes=None):
+        ''' Booleano por linha; com posicoes, só nessas linhas (ex.: as de um recorte). '''
+        mascara = np.unpackbits(self.bits, count=self.n, bitorder='little').view(bool)
+        return mascara if posicoes is None else mascara[posicoes]
+
+    def posicoes(self):
+        ''' Posições (iloc) das linhas selecionadas, em ordem crescente. '''
+        return np.flatnonzero(self.mascara())
+
+
+class IndiceFiltros:
+    """
+    Bitmaps pré-calculados para os filtros da barra lateral: um por valor de
+    DIMENSOES_FILTRO, por culinária (todas as de cada restaurante, coluna
+    culinarias) e por flag. Montado uma vez por versão do dataset; cada filtro
+    das páginas vira um OR/AND de bitmaps prontos em vez de uma comparação
+    sobre a coluna inteira seguida de cópia.
+    - algum(dimensao, valores): linhas com qualquer um dos valores
+    - todos(dimensao, valores): linhas com todos (só faz sentido em culinarias)
+    """
+    def __init__(self, df):
+        self.n = len(df)
+        self.rotulos = df.index
+        self.bitmaps = {}
+        colunas = {c: df[c] for c in DIMENSOES_FILTRO + FLAGS_FILTRO if c in df.columns}
+        if 'faixa_nota' not in colunas and 'aggregate_rating' in df.columns:
+            colunas['faixa_nota'] = pd.Series(faixa_nota(df['aggregate_rating']), index=df.index)
+        for coluna, serie in colunas.items():
+            codigos, valores = pd.factorize(serie, sort=True)
+            self.bitmaps[coluna] = {self._chave(v): _empacotar(codigos == i) for i, v in enumerate(valores)}
+        if COLUNA_CULINARIAS in df.columns:
+            serie = df[COLUNA_CULINARIAS]
+            indice = indice_culinarias(serie)
+            # combinação -> culinária, com uma linha a mais (só False) para o código -1
+            incidencia = np.vstack([indice.incidencia, np.zeros((1, len(indice.vocabulario)), dtype=bool)])
+            codigos = serie.cat.codes.to_numpy()
+            self.bitmaps[COLUNA_CULINARIAS] = {c: _empacotar(incidencia[codigos, j])
+                                               for j, c in enumerate(indice.vocabulario)}
+
+    @staticmethod
+    def _chave(valor):
+        # numpy.bool_/int64 -> bool/int, para casar com os valores vindos dos widgets
+        return valor.item() if isinstance(valor, np.generic) else valor
+
+    def _bitmap(self, dimensao, valor):
+        if dimensao not in self.bitmaps:
+            raise KeyError(f"Dimensão '{dimensao}' não indexada.")
+        return self.bitmaps[dimensao].get(valor)
+
+    def vazio(self):
+        return Filtro(np.zeros(-(-self.n // 8), dtype=np.uint8), self.n)
+
+    def tudo(self):
+        return ~self.vazio()
+
+    def algum(self, dimensao, valores):
+        ''' OR dos bitmaps de `valores` na dimensão (valor inexistente não seleciona nada). '''
+        bits = self.vazio().bits
+        for valor in dict.fromkeys(valores):
+            bitmap = self._bitmap(dimensao, valor)
+            if bitmap is not None:
+                bits |= bitmap
+        return Filtro(bits, self.n)
+
+    def todos(self, dimensao, valores):
+        """
+        AND dos bitmaps de `valores` na dimensão (valor inexistente não seleciona nada).
+        Sem valores não seleciona nada, como algum: a seleção vazia dá o mesmo resultado nos dois modos.
+        """
+        valores = list(valores)
+        if not valores:
+            return self.vazio()
+        bits = self.tudo().bits
+        for valor in dict.fromkeys(valores):
+            bitmap = self._bitmap(dimensao, valor)
+            if bitmap is None:
+                return self.vazio()
+            bits &= bitmap
+        return Filtro(bits, self.n)
+
+    def recorte(self, df, filtro):
+        """
+        Linhas de df (o dataframe indexado) selecionadas pelo filtro. Quando o filtro
+        seleciona tudo, devolve o próprio df, sem cópia (continua somente leitura).
+        """
+        if len(df) != self.n:
+            raise ValueError("O dataframe não é o mesmo que foi indexado.")
+        if filtro.contar() == self.n:
+            return df
+        return df.take(filtro.posicoes())
+
+
+def construir_indice_filtros(df):
+    ''' IndiceFiltros do dataframe de restaurantes (o de load_restaurants, não um recorte). '''
+    return IndiceFiltros(df)
@@ -0,0 +1,120 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from modules.cleaning import (
+    SCHEMA, aplicar_schema, enriquecer_restaurantes, limpar_dataframe, remover_duplicatas, rename_columns,
+)
+from modules.cube import construir_cubo
+from modules.data import (
+    CHAVE_DELTAS, CHAVE_GERACAO, CSV_PADRAO, build_snapshot, caminho_cubo, caminho_snapshot, gravar_arrow,
+    gravar_cubo, hash_arquivo, identidade_snapshot, ler_cubo, tabela_com_metadados,
+)
+
+
+def preparar_delta(bruto):
+    """
+    Mesmo pipeline de preparar_restaurantes, aplicado só às linhas do delta.
+    Num upsert a versão mais recente vence: entre ids repetidos fica a última.
+    """
+    df = limpar_dataframe(rename_columns(bruto), dropna_mode='any')
+    df = remover_duplicatas(df, subset='restaurant_id', keep='last')
+    return enriquecer_restaurantes(df)
+
+
+def _como_texto(tabela):
+    ''' Colunas dictionary viram o tipo dos valores (tabelas com dicionários diferentes podem ser concatenadas). '''
+    colunas = [pc.cast(col, col.type.value_type) if pa.types.is_dictionary(col.type) else col
+               for col in tabela.columns]
+    return pa.table(colunas, names=tabela.column_names)
+
+
+def _com_dicionarios(tabela):
+    ''' Recodifica as colunas categóricas do SCHEMA como dictionary, com um único dicionário por coluna. '''
+    colunas = [pc.dictionary_encode(col.combine_chunks()) if SCHEMA.get(nome) == 'category' else col
+               for nome, col in zip(tabela.column_names, tabela.columns)]
+    return pa.table(colunas, names=tabela.column_names)
+
+
+def aplicar_delta(arquivo_delta, caminho=CSV_PADRAO, *, report=False):
+    """
+    Upsert por restaurant_id das linhas de `arquivo_delta` (CSV no formato do
+    zomato.csv) no snapshot do dataset de `caminho`.
+    - limpeza e enriquecimento rodam só no delta (preparar_delta)
+    - ids já existentes são substituídos na mesma posição; os demais vão para o fim
+    - o cubo persistido é atualizado com Cubo.atualizar, sem reagrupar o dataset
+    O snapshot continua associado ao hash do CSV original, com a geração
+    incrementada e o delta registrado no histórico. Se o CSV original mudar,
+    o snapshot é reconstruído a partir dele e os deltas anteriores deixam de valer.
+    Retorna o total de linhas (e as estatísticas se report=True).
+    """
+    caminho = Path(caminho)
+    fonte_sha256 = hash_arquivo(caminho)
+    destino = caminho_snapshot(caminho)
+    origem = identidade_snapshot(destino, fonte_sha256)
+    if origem is None:
+        build_snapshot(caminho, destino, fonte_sha256=fonte_sha256)
+        origem = identidade_snapshot(destino, fonte_sha256)
+    tabela = pa.ipc.open_file(pa.memory_map(str(destino), 'r')).read_all()
+    metadados = tabela.schema.metadata or {}
+
+    delta = preparar_delta(pd.read_csv(arquivo_delta))
+    ids_delta = pa.array(delta['restaurant_id'].to_numpy())
+    # posição no delta da nova versão de cada linha do snapshot (nulo: a linha fica como está)
+    no_delta = pc.index_in(tabela['restaurant_id'], value_set=ids_delta)
+    substituir = pc.is_valid(no_delta)
+    removidas = aplicar_schema(tabela.filter(substituir).to_pandas())
+
+    # snapshot + delta, com as categorias como texto até a recodificação final; as linhas
+    # substituídas voltam na posição original e só os ids novos vão para o fim
+    atuais = _como_texto(tabela.replace_schema_metadata(None))
+    como_texto = {col: 'object' for col, tipo in SCHEMA.items() if tipo == 'category' and col in delta.columns}
+    novas = pa.Table.from_pandas(delta.astype(como_texto), schema=atuais.schema, preserve_index=False)
+    n = tabela.num_rows
+    posicoes = np.where(substituir.to_numpy(zero_copy_only=False),
+                        n + no_delta.fill_null(0).to_numpy(), np.arange(n))
+    inseridas = n + np.flatnonzero(~pc.is_in(ids_delta, value_set=tabela['restaurant_id']).to_numpy(zero_copy_only=False))
+    combinada = pa.concat_tables([atuais, novas]).take(np.concatenate([posicoes, inseridas]))
+
+    geracao = int(metadados.get(CHAVE_GERACAO, b'0')) + 1
+    stats = {
+        'linhas_delta': len(delta),
+        'inseridos': len(delta) - len(removidas),
+        'atualizados': len(removidas),
+        'linhas_total': combinada.num_rows,
+        'geracao': geracao,
+    }
+    historico = json.loads(metadados.get(CHAVE_DELTAS, b'[]'))
+    historico.append({'arquivo': Path(arquivo_delta).name, 'sha256': hash_arquivo(arquivo_delta),
+                      **{k: stats[k] for k in ('linhas_delta', 'inseridos', 'atualizados')}})
+
+    cubo = ler_cubo(caminho_cubo(caminho), origem)
+    gravar_arrow(tabela_com_metadados(_com_dicionarios(combinada), fonte_sha256, geracao, historico), destino)
+
+    if cubo is None:
+        # ainda não havia cubo persistido: monta uma vez a partir do snapshot
+        cubo = construir_cubo(aplicar_schema(combinada.to_pandas()))
+    else:
+        # só as cidades que perderam linhas precisam ser relidas (id_min/HLL dessas células)
+        cidades = pa.array(removidas['city'].astype(str).unique(), type=pa.string())
+        afetadas = combinada.filter(pc.is_in(combinada['city'], value_set=cidades))
+        cubo = cubo.atualizar(removidas, delta, aplicar_schema(afetadas.to_pandas()))
+    gravar_cubo(cubo, caminho_cubo(caminho), identidade_snapshot(destino, fonte_sha256))
+
+    return (stats['linhas_total'], stats) if report else stats['linhas_total']
+
+
+if __name__ == '__main__':
+    # Atualização incremental: python -m modules.ingest delta.csv [--csv zomato.csv]
+    import argparse
+    parser = argparse.ArgumentParser(description="Aplica um CSV de delta (upsert por restaurant_id) ao snapshot.")
+    parser.add_argument('delta', type=Path)
+    parser.add_argument('--csv', type=Path, default=CSV_PADRAO)
+    args = parser.parse_args()
+    total, stats = aplicar_delta(args.delta, args.csv, report=True)
+    print(f"{stats['inseridos']} inseridos, {stats['atualizados']} atualizados "
+          f"(geração {stats['geracao']}, {total} linhas no snapshot)")
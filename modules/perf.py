@@ -0,0 +1,163 @@
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+# Liga a instrumentação em todas as execuções (a página também aceita ?perf=1)
+VARIAVEL_ATIVACAO = 'FOMEZERO_PERF'
+# Arquivo JSON lines onde cada rerun instrumentado é acrescentado
+VARIAVEL_ARQUIVO = 'FOMEZERO_PERF_ARQUIVO'
+ARQUIVO_PADRAO = 'perf.jsonl'
+
+# Estado por thread: o Streamlit roda o script de cada sessão na sua própria thread
+_estado = threading.local()
+
+
+def _linhas(valor):
+    if isinstance(valor, tuple) and valor:
+        valor = valor[0]   # funções com report=True devolvem (resultado, estatísticas)
+    if isinstance(valor, (pd.DataFrame, pd.Series, pd.Index, np.ndarray)):
+        return len(valor)
+    if hasattr(valor, 'dados') and isinstance(valor.dados, pd.DataFrame):
+        return len(valor.dados)   # Cubo
+    return None
+
+
+def _bytes(valor):
+    """
+    Tamanho do que a chamada devolve: memória do dataframe (rasa: sem medir cada
+    string, que custaria uma passada pelos dados). Figuras, decks e mapas não são
+    serializados só para medir (o JSON do deck com todos os pontos passa de 70 MB):
+    quem os monta informa o tamanho do payload já em cache com anotar_bytes.
+    """
+    if isinstance(valor, tuple) and valor:
+        valor = valor[0]
+    if isinstance(valor, (pd.DataFrame, pd.Series)):
+        return int(np.sum(valor.memory_usage(deep=False)))
+    if isinstance(valor, (dict, list, str, bytes)):
+        from modules.cache import tamanho_em_bytes
+        return tamanho_em_bytes(valor)
+    return None
+
+
+def ativo():
+    return getattr(_estado, 'registros', None) is not None
+
+
+def anotar_bytes(tamanho):
+    """
+    Informa o tamanho da saída da chamada medida em andamento (a mais interna), no lugar
+    da estimativa de _bytes. Desligado, não faz nada.
+    """
+    abertos = getattr(_estado, 'abertos', None)
+    if getattr(_estado, 'registros', None) is not None and abertos:
+        abertos[-1]['bytes_saida'] = int(tamanho)
+
+
+def medido(func):
+    """
+    Registra tempo de parede, linhas de entrada/saída e tamanho da saída de cada
+    chamada de `func` no rerun corrente (ver iniciar). Desligado, custa só um getattr.
+    """
+    @functools.wraps(func)
+    def embrulho(*args, **kwargs):
+        registros = getattr(_estado, 'registros', None)
+        if registros is None:
+            return func(*args, **kwargs)
+        entrada = next((a for a in args if _linhas(a) is not None), None)
+        registro = {'funcao': func.__qualname__, 'modulo': func.__module__,
+                    'profundidade': _estado.profundidade, 'linhas_entrada': _linhas(entrada)}
+        registros.append(registro)
+        _estado.abertos.append(registro)
+        _estado.profundidade += 1
+        inicio = time.perf_counter()
+        try:
+            resultado = func(*args, **kwargs)
+        finally:
+            registro['tempo_s'] = time.perf_counter() - inicio
+            _estado.profundidade -= 1
+            _estado.abertos.pop()
+        try:
+            registro['linhas_saida'] = _linhas(resultado)
+            if 'bytes_saida' not in registro:
+                registro['bytes_saida'] = _bytes(resultado)
+        except Exception:
+            pass   # a medição nunca derruba a chamada medida
+        return resultado
+    return embrulho
+
+
+def habilitado_na_pagina():
+    ''' Variável de ambiente FOMEZERO_PERF=1 ou parâmetro ?perf=1 na URL. '''
+    if os.environ.get(VARIAVEL_ATIVACAO, '').lower() in ('1', 'true', 'sim'):
+        return True
+    try:
+        import streamlit as st
+        return st.query_params.get('perf', '') in ('1', 'true')
+    except Exception:
+        return False
+
+
+def iniciar(pagina, ativar=None):
+    """
+    Começa a registrar as chamadas medidas deste rerun (chamar no topo da página).
+    ativar=None decide por habilitado_na_pagina(); desligado, nada é registrado.
+    """
+    if ativar is None:
+        ativar = habilitado_na_pagina()
+    _estado.registros = [] if ativar else None
+    _estado.profundidade = 0
+    _estado.abertos = []
+    _estado.pagina = pagina
+    _estado.rerun = uuid.uuid4().hex[:12]
+    _estado.inicio = time.perf_counter()
+
+
+def finalizar(arquivo=None):
+    """
+    Encerra o rerun corrente: acrescenta os registros (um JSON por linha) em `arquivo`
+    (padrão: $FOMEZERO_PERF_ARQUIVO ou perf.jsonl) e os devolve com o tempo total.
+    """
+    registros = getattr(_estado, 'registros', None)
+    if registros is None:
+        return None, None
+    _estado.registros = None
+    total = time.perf_counter() - _estado.inicio
+    arquivo = arquivo or os.environ.get(VARIAVEL_ARQUIVO, ARQUIVO_PADRAO)
+    comum = {'ts': datetime.now(timezone.utc).isoformat(timespec='milliseconds'),
+             'rerun': _estado.rerun, 'pagina': _estado.pagina}
+    linhas = [json.dumps({**comum, **r}, ensure_ascii=False) for r in registros]
+    linhas.append(json.dumps({**comum, 'funcao': '<rerun>', 'tempo_s': total}, ensure_ascii=False))
+    try:
+        with open(arquivo, 'a', encoding='utf-8') as f:
+            f.write('\n'.join(linhas) + '\n')
+    except OSError:
+        pass
+    return registros, total
+
+
+def painel():
+    ''' Expander "Desempenho" na barra lateral com o detalhamento do rerun (chamar no fim da página). '''
+    registros, total = finalizar()
+    if registros is None:
+        return
+    import streamlit as st
+    from modules.charts import CACHE_FIGURAS, CACHE_MAPAS
+
+    with st.sidebar.expander('⏱️ Desempenho', expanded=False):
+        st.markdown(f"**Rerun:** {total:.3f} s · {len(registros)} chamadas medidas")
+        if registros:
+            tabela = pd.DataFrame(registros)
+            tabela['funcao'] = ['· ' * p + f for p, f in zip(tabela['profundidade'], tabela['funcao'])]
+            st.dataframe(tabela.loc[:, ['funcao', 'tempo_s', 'linhas_entrada', 'linhas_saida', 'bytes_saida']]
+                         .round({'tempo_s': 4}), hide_index=True, use_container_width=True)
+        for nome, cache in (('figuras', CACHE_FIGURAS), ('mapas', CACHE_MAPAS)):
+            e = cache.estatisticas()
+            st.caption(f"Cache de {nome}: {e['hits']} hits / {e['misses']} misses "
+                       f"({e['hit_rate']:.0%}), {e['bytes'] / 1e6:.2f} MB")
@@ -0,0 +1,289 @@
+import functools
+import html
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from modules.charts import (
+    dataframe_paises, dataframe_restaurantes, grafico_avaliacao_maiores, grafico_cidades_cozinhas,
+    grafico_cidades_valor, grafico_cidades_valor_menores, grafico_nota_restaurantes_maior,
+    grafico_nota_restaurantes_menor, grafico_notas_culinarias, grafico_ranking_cidades,
+    grafico_restaurantes_caros, grafico_valor_restaurantes_maior, grafico_valor_restaurantes_menor,
+    graficos_paises_cidades, graficos_valores, lideres_por_grupo, ranking_cidades, ranking_cidades_cozinhas,
+    ranking_cidades_valor, ranking_restaurantes_cuisine,
+)
+from modules.data import (
+    CSV_PADRAO, dataset_version, load_cubo, load_indice_filtros, load_restaurants, sem_avisos_de_contexto,
+)
+
+# Filtro de culinárias padrão da página Cozinhas e as culinárias das suas métricas
+CULINARIAS_RELATORIO = ['Italian', 'Brazilian', 'American', 'Arabian', 'Japanese', 'BBQ', 'Home-made']
+CULINARIAS_METRICAS = ['Italian', 'American', 'Arabian', 'Japanese', 'Brazilian', 'Home-made']
+
+# Visões do relatório, na ordem em que aparecem
+VISOES = ['País', 'Cidades', 'Cozinhas']
+
+# Dados carregados uma vez por processo trabalhador (ver _iniciar_trabalhador)
+_trabalhador = {}
+
+
+def _metricas_paises(f):
+    lideres = lideres_por_grupo(f['df'], agrupador='country_name', metricas=[
+        ('city', 'nunique'),
+        ('restaurant_id', 'nunique'),
+        ('restaurant_id', 'nunique', f['df']['price_range'] == 4),
+        ('cuisines', 'nunique'),
+        ('votes', 'nunique'),
+        ('votes', 'mean'),
+    ])
+    nomes = ['País +Cidades reg.', 'País +Rest. reg.', 'País +Rest PR=4', 'País +Culinárias.',
+             'País +Avaliações.', 'País Maior Med.Aval.']
+    return pd.DataFrame({'Métrica': nomes, 'País': lideres})
+
+
+def _primeira_cidade(df2):
+    return df2.loc[0, 'city'] if not df2.empty else None
+
+
+def _metricas_cidades(f):
+    cubo = f['cubo']
+    cidades = [
+        _primeira_cidade(ranking_cidades(cubo)),
+        _primeira_cidade(ranking_cidades(cubo, cubo['faixa_nota'] == '>4')),
+        _primeira_cidade(ranking_cidades(cubo, cubo['faixa_nota'] == '<2.5')),
+        _primeira_cidade(ranking_cidades_valor(cubo)),
+        _primeira_cidade(ranking_cidades_cozinhas(cubo)),
+        _primeira_cidade(ranking_cidades(cubo, cubo['has_online_delivery'])),
+    ]
+    nomes = ['Cidade +Rest', 'Cidade +Rest N4', 'Cidade +Rest N2.5', 'Cid. maior valor med.',
+             'Cid. maior nº cozinhas', 'Cid.+Rest Delivery']
+    return pd.DataFrame({'Métrica': nomes, 'Cidade': cidades})
+
+
+def _metricas_culinarias(f):
+    linhas = []
+    for culinaria in CULINARIAS_METRICAS:
+        df2 = ranking_restaurantes_cuisine(f['cozinhas'], culinaria, criterio='max', min_votes=4)
+        if df2.empty or pd.isna(df2.loc[0, 'media_avaliacao']):
+            linhas.append({'Culinária': culinaria, 'Restaurante': None, 'Nota': None, 'Detalhes': None})
+        else:
+            linhas.append({'Culinária': culinaria, 'Restaurante': df2.loc[0, 'restaurant_name'],
+                           'Nota': df2.loc[0, 'media_avaliacao'], 'Detalhes': df2.loc[0, 'help']})
+    return pd.DataFrame(linhas)
+
+
+# nome -> (visão, título, função(fontes) que devolve uma figura plotly ou um dataframe).
+# fontes: df (restaurantes do recorte), cubo (células do recorte), cozinhas (df com o
+# filtro padrão de culinárias) e chave (versão do dataset + recorte, para figura_em_cache)
+ITENS = {
+    'metricas_paises': ('País', 'Overall Metrics', _metricas_paises),
+    'avaliacao_paises': ('País', 'Avaliação por países',
+                         lambda f: grafico_avaliacao_maiores(f['cubo'], chave_filtros=f['chave'])),
+    'dados_paises': ('País', 'Dados dos países', lambda f: dataframe_paises(f['cubo'])),
+    'restaurantes_caros': ('País', 'Restaurantes na categoria 4 ou maior',
+                           lambda f: grafico_restaurantes_caros(f['cubo'], chave_filtros=f['chave'])),
+    'valores_paises': ('País', 'Valor médio para duas pessoas',
+                       lambda f: graficos_valores(f['cubo'], chave_filtros=f['chave'])),
+    'cidades_por_pais': ('País', 'Cidades registradas por país',
+                         lambda f: graficos_paises_cidades(f['cubo'], chave_filtros=f['chave'])),
+    'metricas_cidades': ('Cidades', 'Overall Metrics', _metricas_cidades),
+    'ranking_cidades': ('Cidades', 'Número de restaurantes registrados por cidade',
+                        lambda f: grafico_ranking_cidades(f['cubo'], chave_filtros=f['chave'], top_n=45,
+                                                          title='Número de restaurantes registrados por cidade')),
+    'ranking_cidades_nota_4': ('Cidades', 'Top 10 cidades com mais restaurantes (Gourmet)',
+                               lambda f: grafico_ranking_cidades(
+                                   f['cubo'], f['cubo']['faixa_nota'] == '>4', chave_filtros=f['chave'], top_n=10,
+                                   title='Top 10 Cidades com mais restaurantes(Gourmet)')),
+    'ranking_cidades_nota_2_5': ('Cidades', 'Top 10 cidades com mais restaurantes com nota 2.5 ou menor',
+                                 lambda f: grafico_ranking_cidades(
+                                     f['cubo'], f['cubo']['faixa_nota'] == '<2.5', chave_filtros=f['chave'],
+                                     top_n=10, title='Top 10 Cidades com mais restaurantes com nota 2.5 ou menor')),
+    'cidades_valor': ('Cidades', 'Maiores valores médios para 2 pessoas por cidade',
+                      lambda f: grafico_cidades_valor(f['cubo'], chave_filtros=f['chave'], top_n=10,
+                                                      title='Maiores valores médios para 2 pessoas por cidade')),
+    'cidades_valor_menores': ('Cidades', 'Menores valores médios para 2 pessoas por cidade',
+                              lambda f: grafico_cidades_valor_menores(
+                                  f['cubo'], chave_filtros=f['chave'], top_n=10,
+                                  title='Menores valores médios para 2 pessoas por cidade')),
+    'cidades_cozinhas': ('Cidades', 'Variedade de culinárias disponíveis por cidade',
+                         lambda f: grafico_cidades_cozinhas(f['cubo'], chave_filtros=f['chave'], top_n=10)),
+    'metricas_culinarias': ('Cozinhas', 'Overall Metrics - Melhores Restaurantes', _metricas_culinarias),
+    'top_restaurantes': ('Cozinhas', 'Top 20 melhores restaurantes',
+                         lambda f: dataframe_restaurantes(f['cozinhas']).head(20)),
+    'valor_restaurantes_menor': ('Cozinhas', 'Restaurantes com menor valor para duas pessoas',
+                                 lambda f: grafico_valor_restaurantes_menor(f['cozinhas'], chave_filtros=f['chave'])),
+    'valor_restaurantes_maior': ('Cozinhas', 'Restaurantes com maior valor para duas pessoas',
+                                 lambda f: grafico_valor_restaurantes_maior(f['cozinhas'], chave_filtros=f['chave'])),
+    'nota_restaurantes_menor': ('Cozinhas', 'Restaurantes com menor nota',
+                                lambda f: grafico_nota_restaurantes_menor(f['cozinhas'], chave_filtros=f['chave'])),
+    'nota_restaurantes_maior': ('Cozinhas', 'Restaurantes com maior nota',
+                                lambda f: grafico_nota_restaurantes_maior(f['cozinhas'], chave_filtros=f['chave'])),
+    'notas_culinarias': ('Cozinhas', 'Nota média por culinária',
+                         lambda f: grafico_notas_culinarias(f['cozinhas'], CULINARIAS_RELATORIO,
+                                                            chave_filtros=f['chave'])),
+}
+
+
+def _iniciar_trabalhador(caminho):
+    """
+    Initializer do pool: cada processo abre o dataset, o cubo e o índice de filtros
+    uma vez (com fork, herdados já carregados do processo principal; com spawn,
+    lidos do snapshot via memory-map) e os reaproveita em todos os recortes.
+    """
+    sem_avisos_de_contexto()
+    _trabalhador.update(caminho=caminho, df=load_restaurants(caminho), cubo=load_cubo(caminho),
+                        indice=load_indice_filtros(caminho), versao=dataset_version(caminho))
+
+
+@functools.lru_cache(maxsize=4)
+def _fontes(pais):
+    ''' Recorte de um país (None = todos) nos dados do trabalhador. '''
+    df, cubo, indice = _trabalhador['df'], _trabalhador['cubo'], _trabalhador['indice']
+    paises = indice.tudo() if pais is None else indice.algum('country_name', [pais])
+    if pais is not None:
+        cubo = cubo.filtrar(cubo['country_name'] == pais)
+    return {
+        'df': indice.recorte(df, paises),
+        'cubo': cubo,
+        'cozinhas': indice.recorte(df, paises & indice.algum('culinarias', CULINARIAS_RELATORIO)),
+        'chave': (_trabalhador['versao'], 'relatorio', pais),
+    }
+
+
+def montar_item(pais, nome):
+    """
+    Monta um item do relatório num trabalhador: ('figura', div HTML sem o plotly.js),
+    ('tabela', dataframe) ou ('erro', mensagem) quando o recorte não tem dados para ele.
+    """
+    try:
+        resultado = ITENS[nome][2](_fontes(pais))
+    except Exception as erro:
+        return pais, nome, 'erro', f"{type(erro).__name__}: {erro}"
+    if isinstance(resultado, pd.DataFrame):
+        return pais, nome, 'tabela', resultado
+    return pais, nome, 'figura', resultado.to_html(full_html=False, include_plotlyjs=False)
+
+
+def nome_arquivo(pais):
+    ''' 'geral' para o relatório de todos os países, senão o país em minúsculas ("New Zeland" -> new-zeland). '''
+    return 'geral' if pais is None else re.sub(r'[^0-9a-z]+', '-', pais.lower()).strip('-')
+
+
+_PAGINA = """<!DOCTYPE html>
+<html lang="pt-BR">
+<head>
+<meta charset="utf-8">
+<title>{titulo}</title>
+{plotlyjs}
+<style>
+body {{ font-family: sans-serif; margin: 2rem auto; max-width: 1200px; color: #262730; }}
+h2 {{ border-bottom: 1px solid #ddd; padding-bottom: .3rem; margin-top: 2.5rem; }}
+table {{ border-collapse: collapse; font-size: .9rem; }}
+th, td {{ border: 1px solid #ddd; padding: .3rem .6rem; text-align: left; }}
+th {{ background: #f0f2f6; }}
+.erro {{ color: #a33; }}
+</style>
+</head>
+<body>
+<h1>{titulo}</h1>
+<p>Gerado em {gerado_em} · <a href="tabelas/">tabelas em CSV</a></p>
+{corpo}
+</body>
+</html>
+"""
+
+
+def _plotlyjs(modo):
+    from plotly.offline import get_plotlyjs, get_plotlyjs_version
+    if modo == 'cdn':
+        # mesma versão do plotly.js embutido no pacote plotly instalado
+        return f'<script src="https://cdn.plot.ly/plotly-{get_plotlyjs_version()}.min.js" charset="utf-8"></script>'
+    return f'<script type="text/javascript">{get_plotlyjs()}</script>'
+
+
+def gravar_relatorio(destino, pais, resultados, plotlyjs):
+    """
+    Grava destino/<nome_arquivo(pais)>/index.html (visões na ordem de ITENS) e as
+    tabelas em tabelas/<item>.csv. resultados: nome do item -> (tipo, conteúdo).
+    """
+    pasta = Path(destino) / nome_arquivo(pais)
+    (pasta / 'tabelas').mkdir(parents=True, exist_ok=True)
+    partes = []
+    for visao in VISOES:
+        partes.append(f'<h2>{html.escape(visao)}</h2>')
+        for nome, (visao_item, titulo, _) in ITENS.items():
+            if visao_item != visao:
+                continue
+            tipo, conteudo = resultados[nome]
+            partes.append(f'<h3>{html.escape(titulo)}</h3>')
+            if tipo == 'figura':
+                partes.append(conteudo)
+            elif tipo == 'tabela':
+                conteudo.to_csv(pasta / 'tabelas' / f'{nome}.csv', index=False)
+                partes.append(conteudo.to_html(index=False, na_rep='—', border=0))
+            else:
+                partes.append(f'<p class="erro">Sem dados para este recorte ({html.escape(conteudo)}).</p>')
+    titulo = 'Fome Zero — ' + ('todos os países' if pais is None else pais)
+    arquivo = pasta / 'index.html'
+    arquivo.write_text(_PAGINA.format(titulo=html.escape(titulo), plotlyjs=_plotlyjs(plotlyjs),
+                                      gerado_em=datetime.now().strftime('%d/%m/%Y %H:%M'),
+                                      corpo='\n'.join(partes)), encoding='utf-8')
+    return arquivo
+
+
+def exportar(destino, paises=(None,), *, caminho=CSV_PADRAO, processos=None, plotlyjs='inline'):
+    """
+    Exporta um relatório por item de `paises` (None = todos os países) para `destino`.
+    O processo principal carrega o dataset uma vez (gerando snapshot e cubo, se
+    preciso) antes de abrir o pool; cada trabalhador recebe os dados no initializer
+    e monta itens (país, gráfico) independentes, sem recarregar nada entre países.
+    Retorna {país: caminho do index.html}.
+    """
+    sem_avisos_de_contexto()
+    load_restaurants(caminho)
+    load_cubo(caminho)
+    load_indice_filtros(caminho)
+    tarefas = [(pais, nome) for pais in paises for nome in ITENS]
+    resultados = {pais: {} for pais in paises}
+    with ProcessPoolExecutor(processos, initializer=_iniciar_trabalhador, initargs=(caminho,)) as pool:
+        for pais, nome, tipo, conteudo in pool.map(montar_item, *zip(*tarefas), chunksize=4):
+            resultados[pais][nome] = (tipo, conteudo)
+            if tipo == 'erro':
+                print(f"  aviso: {nome} ({pais or 'geral'}): {conteudo}")
+    return {pais: gravar_relatorio(destino, pais, resultados[pais], plotlyjs) for pais in paises}
+
+
+if __name__ == '__main__':
+    # Relatório estático: python -m modules.report [destino] [--por-pais | --paises Brazil India] [--processos N]
+    import argparse
+    parser = argparse.ArgumentParser(description="Exporta as visões País, Cidades e Cozinhas em HTML + CSV.")
+    parser.add_argument('destino', nargs='?', type=Path, default=Path('relatorio'))
+    grupo = parser.add_mutually_exclusive_group()
+    grupo.add_argument('--paises', nargs='+', default=None, help="um relatório para cada país informado")
+    grupo.add_argument('--por-pais', action='store_true', help="um relatório para cada país do dataset")
+    parser.add_argument('--sem-geral', action='store_true', help="não gera o relatório de todos os países")
+    parser.add_argument('--processos', type=int, default=None, help="tamanho do pool (padrão: nº de CPUs)")
+    parser.add_argument('--plotlyjs', choices=['inline', 'cdn'], default='inline',
+                        help="plotly.js embutido (abre offline) ou carregado da CDN (arquivo menor)")
+    parser.add_argument('--csv', type=Path, default=CSV_PADRAO)
+    args = parser.parse_args()
+
+    paises = [] if args.sem_geral else [None]
+    if args.por_pais:
+        sem_avisos_de_contexto()
+        paises += sorted(load_restaurants(args.csv)['country_name'].unique())
+    elif args.paises:
+        paises += args.paises
+    if not paises:
+        parser.error("nada a exportar: use --paises ou --por-pais com --sem-geral")
+    inicio = time.perf_counter()
+    arquivos = exportar(args.destino, paises, caminho=args.csv, processos=args.processos, plotlyjs=args.plotlyjs)
+    print(f"{len(arquivos)} relatório(s), {len(arquivos) * len(ITENS)} itens, "
+          f"em {time.perf_counter() - inicio:.1f} s ({args.processos or os.cpu_count()} processos):")
+    for pais, arquivo in arquivos.items():
+        print(f"  {pais or 'geral':<22} {arquivo}")
@@ -0,0 +1,157 @@
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+# Campos indexados e o peso de um termo encontrado em cada um
+CAMPOS_BUSCA = {
+    'restaurant_name': 4.0,
+    'city': 3.0,
+    'locality': 2.0,
+    'locality_verbose': 1.5,
+    'address': 1.0,
+}
+
+# Termo idêntico ao digitado vale mais que um termo que só começa com ele
+BONUS_EXATO = 1.25
+
+_SEPARADORES = re.compile(r'[^0-9a-z]+')
+
+
+def normalizar(texto):
+    ''' Minúsculas, sem acentos e só com letras/dígitos separados por espaço ("Las Piñas City" -> "las pinas city"). '''
+    texto = unicodedata.normalize('NFKD', str(texto)).encode('ascii', 'ignore').decode('ascii')
+    return _SEPARADORES.sub(' ', texto.casefold()).strip()
+
+
+def tokenizar(texto):
+    return normalizar(texto).split()
+
+
+class IndiceBusca:
+    """
+    Índice invertido (termo -> restaurantes) sobre os CAMPOS_BUSCA, com busca por prefixo.
+    Os termos ficam ordenados e as listas de restaurantes de cada termo ficam
+    concatenadas nessa mesma ordem: todos os termos com um prefixo formam um
+    intervalo achado com bisect, e as ocorrências deles, uma fatia contígua.
+    Cada termo da consulta é tratado como prefixo; um restaurante precisa casar
+    com todos. O placar soma, por termo da consulta, o maior peso de campo em
+    que ele apareceu (com BONUS_EXATO se o termo for idêntico); empates saem
+    por votos e, depois, pela nota.
+    - rotulos: df.index, devolvido por buscar_restaurantes para ler as linhas
+    """
+    def __init__(self, df, campos=None):
+        campos = CAMPOS_BUSCA if campos is None else campos
+        vocabulario = {}
+        termos_docs, docs, pesos = [], [], []
+        for coluna, peso in campos.items():
+            # cada valor distinto é tokenizado uma vez (cidades e bairros se repetem muito);
+            # os termos viram códigos do vocabulário e cada documento herda os do seu valor
+            codigos, unicos = pd.factorize(df[coluna].astype(object))
+            por_valor = [[vocabulario.setdefault(t, len(vocabulario)) for t in dict.fromkeys(tokenizar(v))]
+                         for v in unicos]
+            tamanhos = np.array([len(t) for t in por_valor] + [0], dtype=np.int64)
+            planos = np.array([t for termos in por_valor for t in termos], dtype=np.int64)
+            inicios = np.concatenate([[0], np.cumsum(tamanhos[:-1])])
+            repeticoes = tamanhos[codigos]   # código -1 (valor ausente) cai no 0 do fim
+            doc = np.repeat(np.arange(len(df), dtype=np.int64), repeticoes)
+            deslocamento = np.arange(len(doc)) - np.repeat(np.cumsum(repeticoes) - repeticoes, repeticoes)
+            termos_docs.append(planos[np.repeat(inicios[codigos], repeticoes) + deslocamento])
+            docs.append(doc)
+            pesos.append(np.full(len(doc), peso))
+
+        # vocabulário em ordem alfabética: termos com o mesmo prefixo ficam contíguos
+        palavras = np.array(list(vocabulario), dtype=str)
+        ordem_alfabetica = np.argsort(palavras, kind='stable')
+        posto = np.empty(len(palavras), dtype=np.int64)
+        posto[ordem_alfabetica] = np.arange(len(palavras))
+        termo = posto[np.concatenate(termos_docs)]
+        doc = np.concatenate(docs)
+        peso = np.concatenate(pesos)
+        # ordena por (termo, doc, maior peso) e fica com a primeira ocorrência de cada par
+        ordem = np.lexsort((-peso, doc, termo))
+        termo, doc, peso = termo[ordem], doc[ordem], peso[ordem]
+        primeiro = np.r_[True, (termo[1:] != termo[:-1]) | (doc[1:] != doc[:-1])]
+
+        self.termos = palavras[ordem_alfabetica]
+        self.docs = doc[primeiro]
+        self.pesos = peso[primeiro]
+        self.inicios = np.searchsorted(termo[primeiro], np.arange(len(palavras) + 1), 'left')
+        # valores possíveis de peso numa consulta (campo, com ou sem BONUS_EXATO), em ordem crescente
+        self.valores_peso = np.unique([p * b for p in campos.values() for b in (1.0, BONUS_EXATO)])
+
+        self.ids = df['restaurant_id'].to_numpy()
+        self.rotulos = df.index.to_numpy()
+        # desempate: mais votos, depois maior nota
+        desempate = np.lexsort((-df['aggregate_rating'].to_numpy(), -df['votes'].to_numpy()))
+        self.ordem_desempate = np.empty(len(df), dtype=np.int64)
+        self.ordem_desempate[desempate] = np.arange(len(df))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _termo(self, prefixo):
+        ''' (docs, placar) dos restaurantes com algum termo começando por `prefixo`, sem repetição. '''
+        inicio = np.searchsorted(self.termos, prefixo, 'left')
+        fim = np.searchsorted(self.termos, prefixo + '\uffff', 'left')
+        a, b = self.inicios[inicio], self.inicios[fim]
+        docs, pesos = self.docs[a:b], self.pesos[a:b].copy()
+        if inicio < fim and self.termos[inicio] == prefixo:
+            pesos[:self.inicios[inicio + 1] - a] *= BONUS_EXATO
+        if len(docs) > len(self.ids) // 16:
+            # prefixo curto cobre boa parte dos restaurantes: vetor denso em vez de ordenar.
+            # Os pesos são poucos valores distintos; atribuídos do menor ao maior, o maior prevalece.
+            placar = np.zeros(len(self.ids))
+            for peso in self.valores_peso:
+                placar[docs[pesos == peso]] = peso
+            docs = np.flatnonzero(placar)
+            return docs, placar[docs]
+        ordem = np.argsort(docs, kind='stable')
+        docs, pesos = docs[ordem], pesos[ordem]
+        if len(docs) == 0:
+            return docs, pesos
+        novos = np.flatnonzero(np.r_[True, docs[1:] != docs[:-1]])
+        return docs[novos], np.maximum.reduceat(pesos, novos)
+
+    def posicoes(self, consulta, limite=10):
+        ''' Posições (no dataframe indexado) dos melhores resultados, do maior placar ao menor. '''
+        termos = list(dict.fromkeys(tokenizar(consulta)))
+        if not termos:
+            return np.empty(0, dtype=np.int64)
+        # termos mais longos primeiro: listas menores, interseção encolhe mais cedo
+        termos.sort(key=len, reverse=True)
+        docs, placar = self._termo(termos[0])
+        for termo in termos[1:]:
+            if len(docs) == 0:
+                break
+            outros, pesos = self._termo(termo)
+            docs, em_docs, em_outros = np.intersect1d(docs, outros, assume_unique=True, return_indices=True)
+            placar = placar[em_docs] + pesos[em_outros]
+        if len(docs) > limite > 0:
+            # seleção parcial antes de ordenar: quem tem placar acima do corte entra
+            # direto; entre os empatados no corte, os primeiros pelo desempate
+            corte = np.partition(-placar, limite - 1)[limite - 1]
+            acima = np.flatnonzero(-placar < corte)
+            empatados = np.flatnonzero(-placar == corte)
+            faltam = limite - len(acima)
+            if faltam < len(empatados):
+                empatados = empatados[np.argpartition(self.ordem_desempate[docs[empatados]], faltam - 1)[:faltam]]
+            escolhidos = np.concatenate([acima, empatados])
+            docs, placar = docs[escolhidos], placar[escolhidos]
+        ordem = np.lexsort((self.ordem_desempate[docs], -placar))[:limite]
+        return docs[ordem]
+
+    def buscar(self, consulta, limite=10):
+        ''' restaurant_ids que casam com a consulta, do mais relevante ao menos. '''
+        return self.ids[self.posicoes(consulta, limite)]
+
+
+def construir_indice_busca(df, campos=None):
+    ''' IndiceBusca do dataframe (restaurant_id, aggregate_rating, votes e os campos de texto). '''
+    return IndiceBusca(df, campos)
+
+
+def buscar_restaurantes(df, indice, consulta, limite=10):
+    ''' Linhas de df dos melhores resultados da consulta (índice montado sobre o mesmo df). '''
+    return df.loc[indice.rotulos[indice.posicoes(consulta, limite)]]
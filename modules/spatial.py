@@ -0,0 +1,175 @@
+import numpy as np
+
+from modules.cuisines import mascara_culinarias
+
+# Lado padrão da célula da grade, em graus (~55 km no equador)
+TAMANHO_CELULA = 0.5
+
+# Raio médio da Terra e comprimento de 1 grau de latitude, em km
+RAIO_TERRA_KM = 6371.0088
+KM_POR_GRAU = np.pi * RAIO_TERRA_KM / 180.0
+
+# Metade da circunferência: nenhum ponto está mais longe que isso
+DISTANCIA_MAXIMA_KM = np.pi * RAIO_TERRA_KM
+
+
+def haversine_km(lat, lon, latitudes, longitudes):
+    ''' Distância de grande círculo (km) de um ponto a arrays de pontos. '''
+    lat, lon = np.radians(lat), np.radians(lon)
+    latitudes, longitudes = np.radians(latitudes), np.radians(longitudes)
+    a = (np.sin((latitudes - lat) / 2) ** 2
+         + np.cos(lat) * np.cos(latitudes) * np.sin((longitudes - lon) / 2) ** 2)
+    return 2 * RAIO_TERRA_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+class IndiceGrade:
+    """
+    Índice espacial em grade uniforme sobre latitude/longitude.
+    Os pontos ficam ordenados pela chave da célula (linha * n_colunas + coluna), então
+    numa consulta por retângulo cada linha de células vira um único intervalo contíguo,
+    achado com searchsorted; só os pontos desses intervalos passam pelo filtro exato.
+    - rotulos: identificação devolvida pelas consultas (ex.: df.index); padrão: posições
+    """
+    def __init__(self, latitudes, longitudes, rotulos=None, *, tamanho=TAMANHO_CELULA):
+        lat = np.asarray(latitudes, dtype=float)
+        lon = np.asarray(longitudes, dtype=float)
+        rotulos = np.arange(len(lat)) if rotulos is None else np.asarray(rotulos)
+        validos = np.isfinite(lat) & np.isfinite(lon)
+        self.tamanho = float(tamanho)
+        self.n_linhas = int(np.ceil(180.0 / self.tamanho))
+        self.n_colunas = int(np.ceil(360.0 / self.tamanho))
+        chaves = self._linha(lat[validos]) * self.n_colunas + self._coluna(lon[validos])
+        ordem = np.argsort(chaves, kind='stable')
+        self.chaves = chaves[ordem]
+        self.lat = lat[validos][ordem]
+        self.lon = lon[validos][ordem]
+        self.rotulos = rotulos[validos][ordem]
+
+    def __len__(self):
+        return len(self.chaves)
+
+    def _linha(self, lat):
+        return np.clip(np.floor((np.asarray(lat) + 90.0) / self.tamanho), 0, self.n_linhas - 1).astype(np.int64)
+
+    def _coluna(self, lon):
+        return np.clip(np.floor((np.asarray(lon) + 180.0) / self.tamanho), 0, self.n_colunas - 1).astype(np.int64)
+
+    def _posicoes(self, sul, norte, faixas):
+        ''' Posições (na ordem do índice) dos pontos no retângulo, para faixas de longitude já normalizadas. '''
+        linhas = np.arange(self._linha(sul), self._linha(norte) + 1)
+        partes = []
+        for oeste, leste in faixas:
+            inicio = np.searchsorted(self.chaves, linhas * self.n_colunas + self._coluna(oeste), 'left')
+            fim = np.searchsorted(self.chaves, linhas * self.n_colunas + self._coluna(leste), 'right')
+            candidatos = np.concatenate([np.arange(a, b) for a, b in zip(inicio, fim) if b > a] or
+                                        [np.empty(0, dtype=np.int64)])
+            lat, lon = self.lat[candidatos], self.lon[candidatos]
+            dentro = (lat >= sul) & (lat <= norte) & (lon >= oeste) & (lon <= leste)
+            partes.append(candidatos[dentro])
+        return np.sort(np.concatenate(partes))
+
+    def bbox(self, sul, oeste, norte, leste, *, limite=None):
+        """
+        Rótulos dos pontos dentro do retângulo. oeste > leste cruza o antimeridiano e
+        longitudes fora de [-180, 180] (mapa "dando a volta") são normalizadas.
+        limite: no máximo esse número de pontos, amostrados de forma uniforme na grade.
+        """
+        sul, norte = max(float(sul), -90.0), min(float(norte), 90.0)
+        if sul > norte:
+            return self.rotulos[:0]
+        if leste - oeste >= 360:
+            faixas = [(-180.0, 180.0)]
+        else:
+            oeste = (oeste + 180.0) % 360.0 - 180.0
+            leste = (leste + 180.0) % 360.0 - 180.0
+            faixas = [(oeste, leste)] if oeste <= leste else [(oeste, 180.0), (-180.0, leste)]
+        posicoes = self._posicoes(sul, norte, faixas)
+        if limite is not None and len(posicoes) > limite:
+            posicoes = posicoes[np.linspace(0, len(posicoes) - 1, int(limite)).astype(np.int64)]
+        return self.rotulos[posicoes]
+
+    def raio(self, lat, lon, km, *, aceitar=None):
+        """
+        Pontos a até km quilômetros de (lat, lon): (rótulos, distâncias), do mais próximo ao mais distante.
+        Só o retângulo que envolve o círculo é lido do índice; a distância exata é haversine.
+        aceitar: função rótulos -> máscara booleana, aplicada só aos candidatos (filtros extras).
+        """
+        dlat = km / KM_POR_GRAU
+        if abs(lat) + dlat >= 90:
+            faixas = [(-180.0, 180.0)]   # o círculo passa por um polo
+        else:
+            # meia largura exata em longitude: o círculo é mais largo fora da latitude do centro
+            dlon = np.degrees(np.arcsin(min(np.sin(km / RAIO_TERRA_KM) / np.cos(np.radians(lat)), 1.0)))
+            oeste = (lon - dlon + 180.0) % 360.0 - 180.0
+            leste = (lon + dlon + 180.0) % 360.0 - 180.0
+            faixas = [(oeste, leste)] if oeste <= leste else [(oeste, 180.0), (-180.0, leste)]
+        posicoes = self._posicoes(max(lat - dlat, -90.0), min(lat + dlat, 90.0), faixas)
+        distancias = haversine_km(lat, lon, self.lat[posicoes], self.lon[posicoes])
+        dentro = distancias <= km
+        posicoes, distancias = posicoes[dentro], distancias[dentro]
+        if aceitar is not None:
+            aceitos = np.asarray(aceitar(self.rotulos[posicoes]), dtype=bool)
+            posicoes, distancias = posicoes[aceitos], distancias[aceitos]
+        ordem = np.argsort(distancias, kind='stable')
+        return self.rotulos[posicoes[ordem]], distancias[ordem]
+
+    def vizinhos(self, lat, lon, k, *, aceitar=None, raio_max=None):
+        """
+        Os k pontos mais próximos de (lat, lon): (rótulos, distâncias).
+        O raio de busca começa em uma célula e quadruplica até achar k pontos
+        (ou até raio_max / o globo inteiro), então só os anéis próximos são lidos.
+        """
+        limite = DISTANCIA_MAXIMA_KM if raio_max is None else float(raio_max)
+        km = min(self.tamanho * KM_POR_GRAU, limite)
+        while True:
+            rotulos, distancias = self.raio(lat, lon, km, aceitar=aceitar)
+            if len(rotulos) >= k or km >= limite:
+                return rotulos[:k], distancias[:k]
+            km = min(km * 4, limite)
+
+    def limites(self, bounds, *, limite=None):
+        ''' bbox a partir dos bounds do st_folium ({'_southWest': {...}, '_northEast': {...}}). '''
+        so, ne = bounds['_southWest'], bounds['_northEast']
+        return self.bbox(so['lat'], so['lng'], ne['lat'], ne['lng'], limite=limite)
+
+
+def construir_indice(df, *, lat_col='latitude', lon_col='longitude', tamanho=TAMANHO_CELULA):
+    ''' IndiceGrade do dataframe, com df.index como rótulos. '''
+    return IndiceGrade(df[lat_col].to_numpy(), df[lon_col].to_numpy(), df.index.to_numpy(), tamanho=tamanho)
+
+
+def buscar_proximos(df, indice, lat, lon, *, k=None, raio_km=None, culinarias=None,
+                    price_range=None, nota_minima=None):
+    """
+    Restaurantes de df perto de (lat, lon): os k mais próximos ou todos a até raio_km
+    (com os dois, os k mais próximos dentro do raio). Filtros opcionais:
+    culinarias (ao menos uma das culinárias do restaurante, ver mascara_culinarias),
+    price_range (lista de valores aceitos) e nota_minima.
+    O índice pode ter sido montado sobre o dataframe completo: rótulos fora de df são ignorados.
+    Retorna as linhas de df, da mais próxima à mais distante, com a coluna distancia_km.
+    """
+    if k is None and raio_km is None:
+        raise ValueError("Informe k, raio_km ou ambos.")
+    # filtros avaliados só nas linhas candidatas (nunca no dataframe inteiro)
+    filtros = []
+    if culinarias:
+        # todas as culinárias do restaurante (coluna culinarias), não só a primeira
+        coluna = 'culinarias' if 'culinarias' in df.columns else 'cuisines'
+        filtros.append((coluna, lambda v: mascara_culinarias(v.to_frame(), culinarias)))
+    if price_range:
+        filtros.append(('price_range', lambda v: v.isin(list(price_range))))
+    if nota_minima is not None:
+        filtros.append(('aggregate_rating', lambda v: v >= nota_minima))
+
+    def aceitar(rotulos):
+        posicoes = df.index.get_indexer(rotulos)
+        aceitos = posicoes >= 0
+        for coluna, filtro in filtros:
+            aceitos[aceitos] = filtro(df[coluna].iloc[posicoes[aceitos]]).to_numpy()
+        return aceitos
+
+    if k is None:
+        rotulos, distancias = indice.raio(lat, lon, raio_km, aceitar=aceitar)
+    else:
+        rotulos, distancias = indice.vizinhos(lat, lon, k, aceitar=aceitar, raio_max=raio_km)
+    return df.loc[rotulos].assign(distancia_km=distancias)
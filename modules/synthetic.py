@@ -0,0 +1,176 @@
+import numpy as np
+import pandas as pd
+
+from modules.data import CSV_PADRAO
+
+# Desvio padrão (graus, ~1 km) do ruído somado às coordenadas de restaurantes reais da cidade
+RUIDO_COORDENADAS = 0.01
+
+FLAGS = ['Has Table booking', 'Has Online delivery', 'Is delivering now', 'Switch to order menu']
+
+
+class _Empirica:
+    """
+    Distribuição empírica de `valores` condicionada a uma chave inteira.
+    amostrar(chaves) sorteia, para cada chave, um dos valores observados com ela
+    (com reposição, na frequência observada). Toda chave pedida precisa ter sido observada.
+    """
+    def __init__(self, chaves, valores):
+        chaves = np.asarray(chaves, dtype=np.int64)
+        ordem = np.argsort(chaves, kind='stable')
+        self.chaves, self.inicios, self.tamanhos = np.unique(chaves[ordem], return_index=True,
+                                                             return_counts=True)
+        self.valores = np.asarray(valores)[ordem]
+
+    def amostrar(self, chaves, rng):
+        grupos = np.searchsorted(self.chaves, chaves)
+        sorteio = (rng.random(len(grupos)) * self.tamanhos[grupos]).astype(np.int64)
+        return self.valores[self.inicios[grupos] + sorteio]
+
+
+class ModeloSintetico:
+    """
+    Distribuições aprendidas do zomato.csv (um registro por restaurant_id) para gerar
+    restaurantes sintéticos no esquema original do CSV:
+    - país -> cidade -> culinárias (combinação completa do campo Cuisines)
+    - moeda por país
+    - price_range por cidade, custo para dois por (país, price_range)
+    - nota por (país, price_range); cor por nota; texto e votos por (país, nota)
+    - flags (reserva, entrega, ...) em conjunto por (país, price_range)
+    - nome: redes (nomes que se repetem no CSV) sorteadas como estão, na proporção do país;
+      os demais juntam o início de um nome real do país com o fim de outro, então a
+      quantidade de nomes distintos cresce com n em vez de parar nos ~6 mil do CSV
+    - coordenadas de um restaurante real da cidade + ruído, com o endereço dele
+    """
+    def __init__(self, bruto):
+        base = bruto.drop_duplicates('Restaurant ID').reset_index(drop=True)
+        self.colunas = list(bruto.columns)
+        self.base = base
+
+        self.codigo_cidade, self.cidades = pd.factorize(base['City'])
+        self.pais_da_cidade = (pd.Series(base['Country Code'].to_numpy(), index=self.codigo_cidade)
+                               .groupby(level=0).first().sort_index().to_numpy())
+        self.codigo_nota, self.notas = pd.factorize(base['Aggregate rating'], sort=True)
+        self.n_notas = len(self.notas)
+        self.moeda = base.groupby('Country Code')['Currency'].agg(lambda s: s.mode().iloc[0])
+
+        pais = base['Country Code'].to_numpy()
+        preco = base['Price range'].to_numpy()
+        linhas = np.arange(len(base))
+        self.pais = _Empirica(np.zeros(len(base)), pais)
+        self.cidade = _Empirica(pais, self.codigo_cidade)
+        self.linha_da_cidade = _Empirica(self.codigo_cidade, linhas)
+        self.culinarias = _Empirica(self.codigo_cidade, linhas)
+        self.preco = _Empirica(self.codigo_cidade, preco)
+        self.custo = _Empirica(self._chave(pais, preco), base['Average Cost for two'].to_numpy())
+        self.nota = _Empirica(self._chave(pais, preco), self.codigo_nota)
+        self.cor = _Empirica(self.codigo_nota, linhas)
+        self.texto = _Empirica(self._chave_nota(pais, self.codigo_nota), linhas)
+        self.votos = _Empirica(self._chave_nota(pais, self.codigo_nota), base['Votes'].to_numpy())
+        self.flags = _Empirica(self._chave(pais, preco), linhas)
+        self.nome = _Empirica(pais, linhas)
+        nomes = base['Restaurant Name'].astype(str)
+        rede = nomes.map(nomes.value_counts()).to_numpy() > 1
+        self.p_rede = pd.Series(rede).groupby(pais).mean()
+        self.rede = _Empirica(pais[rede], linhas[rede])
+        # primeira palavra e o resto do nome (o próprio nome quando tem uma palavra só)
+        partes = nomes.str.split(n=1)
+        self.inicio_nome = partes.str[0].to_numpy()
+        self.fim_nome = partes.str[-1].to_numpy()
+
+    @staticmethod
+    def _chave(pais, preco):
+        return np.asarray(pais, dtype=np.int64) * 10 + np.asarray(preco, dtype=np.int64)
+
+    def _chave_nota(self, pais, codigo_nota):
+        return np.asarray(pais, dtype=np.int64) * self.n_notas + np.asarray(codigo_nota, dtype=np.int64)
+
+    def _coluna(self, nome, linhas):
+        return self.base[nome].to_numpy()[linhas]
+
+    def _nomes(self, pais, rng):
+        ''' Nome de rede (como está) ou composto de início + fim de dois nomes reais do país. '''
+        nomes = (pd.Series(self.inicio_nome[self.nome.amostrar(pais, rng)]) + ' '
+                 + self.fim_nome[self.nome.amostrar(pais, rng)]).to_numpy(dtype=object)
+        rede = rng.random(len(pais)) < self.p_rede.reindex(pais).to_numpy()
+        if rede.any():
+            nomes[rede] = self._coluna('Restaurant Name', self.rede.amostrar(pais[rede], rng))
+        return nomes
+
+    def amostrar(self, n, rng, id_inicial=1):
+        ''' n restaurantes sintéticos (dataframe no esquema do CSV), com ids id_inicial, id_inicial+1, ... '''
+        pais = self.pais.amostrar(np.zeros(n, dtype=np.int64), rng)
+        cidade = self.cidade.amostrar(pais, rng)
+        preco = self.preco.amostrar(cidade, rng)
+        nota = self.nota.amostrar(self._chave(pais, preco), rng)
+        local = self.linha_da_cidade.amostrar(cidade, rng)
+        flags = self.flags.amostrar(self._chave(pais, preco), rng)
+
+        df = pd.DataFrame({
+            'Restaurant ID': np.arange(id_inicial, id_inicial + n, dtype=np.int64),
+            'Restaurant Name': self._nomes(pais, rng),
+            'Country Code': pais,
+            'City': self.cidades.to_numpy()[cidade],
+            'Address': self._coluna('Address', local),
+            'Locality': self._coluna('Locality', local),
+            'Locality Verbose': self._coluna('Locality Verbose', local),
+            'Longitude': self._coluna('Longitude', local) + rng.normal(0, RUIDO_COORDENADAS, n),
+            'Latitude': self._coluna('Latitude', local) + rng.normal(0, RUIDO_COORDENADAS, n),
+            'Cuisines': self._coluna('Cuisines', self.culinarias.amostrar(cidade, rng)),
+            'Average Cost for two': self.custo.amostrar(self._chave(pais, preco), rng),
+            'Currency': self.moeda.reindex(pais).to_numpy(),
+            **{flag: self._coluna(flag, flags) for flag in FLAGS},
+            'Price range': preco,
+            'Aggregate rating': self.notas.to_numpy()[nota],
+            'Rating color': self._coluna('Rating color', self.cor.amostrar(nota, rng)),
+            'Rating text': self._coluna('Rating text', self.texto.amostrar(self._chave_nota(pais, nota), rng)),
+            'Votes': self.votos.amostrar(self._chave_nota(pais, nota), rng),
+        })
+        df['Latitude'] = df['Latitude'].clip(-90, 90)
+        df['Longitude'] = (df['Longitude'] + 180) % 360 - 180
+        return df[self.colunas]
+
+
+def aprender(caminho=CSV_PADRAO):
+    ''' ModeloSintetico a partir do CSV de `caminho`. '''
+    return ModeloSintetico(pd.read_csv(caminho))
+
+
+def gerar_blocos(n, *, seed=42, chunksize=100_000, caminho=CSV_PADRAO, modelo=None):
+    ''' Gera n restaurantes sintéticos em dataframes de até chunksize linhas (mesma seed e chunksize -> mesmas linhas). '''
+    modelo = aprender(caminho) if modelo is None else modelo
+    rng = np.random.default_rng(seed)
+    for inicio in range(0, n, chunksize):
+        yield modelo.amostrar(min(chunksize, n - inicio), rng, id_inicial=inicio + 1)
+
+
+def gerar(n, *, seed=42, chunksize=100_000, caminho=CSV_PADRAO, modelo=None):
+    ''' n restaurantes sintéticos num único dataframe. '''
+    return pd.concat(list(gerar_blocos(n, seed=seed, chunksize=chunksize, caminho=caminho, modelo=modelo)),
+                     ignore_index=True)
+
+
+def gerar_csv(destino, n, *, seed=42, chunksize=100_000, caminho=CSV_PADRAO):
+    """
+    Grava n restaurantes sintéticos em `destino` no formato do zomato.csv, bloco a bloco
+    (a memória usada não depende de n). Os restaurant_id são únicos (1..n).
+    """
+    with open(destino, 'w', encoding='utf-8', newline='') as f:
+        for i, bloco in enumerate(gerar_blocos(n, seed=seed, chunksize=chunksize, caminho=caminho)):
+            bloco.to_csv(f, header=(i == 0), index=False)
+    return destino
+
+
+if __name__ == '__main__':
+    # Dataset sintético: python -m modules.synthetic destino.csv 1000000 [--seed 42]
+    import argparse
+    from pathlib import Path
+    parser = argparse.ArgumentParser(description="Gera um CSV sintético no formato do zomato.csv.")
+    parser.add_argument('destino', type=Path)
+    parser.add_argument('linhas', type=int)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--chunksize', type=int, default=100_000)
+    parser.add_argument('--csv', type=Path, default=CSV_PADRAO, help="CSV de onde as distribuições são aprendidas")
+    args = parser.parse_args()
+    gerar_csv(args.destino, args.linhas, seed=args.seed, chunksize=args.chunksize, caminho=args.csv)
+    print(f"{args.linhas} linhas gravadas em {args.destino}")
@@ -0,0 +1,11 @@
+import pandas as pd
+import pytest
+
+from modules.cleaning import preparar_restaurantes
+from modules.data import CSV_PADRAO
+
+
+@pytest.fixture(scope='session')
+def restaurantes():
+    ''' zomato.csv limpo e enriquecido (o mesmo dataframe das páginas, sem o snapshot). '''
+    return preparar_restaurantes(pd.read_csv(CSV_PADRAO))
@@ -0,0 +1,82 @@
+import json
+import shutil
+import threading
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+import pytest
+
+from modules import api
+from modules.data import CSV_PADRAO, sem_avisos_de_contexto
+
+
+@pytest.fixture(scope='module')
+def servidor(tmp_path_factory):
+    sem_avisos_de_contexto()
+    csv = tmp_path_factory.mktemp('api') / 'zomato.csv'
+    shutil.copy(CSV_PADRAO, csv)
+    servidor = api.ServidorAPI(('127.0.0.1', 0), trabalhadores=2, caminho=csv, silencioso=True)
+    servidor.carregar()
+    thread = threading.Thread(target=servidor.serve_forever, daemon=True)
+    thread.start()
+    yield servidor
+    servidor.shutdown()
+    servidor.server_close()
+
+
+def _get(servidor, caminho):
+    ''' (status, corpo JSON) de um GET no servidor de teste. '''
+    try:
+        with urlopen(f'http://127.0.0.1:{servidor.server_port}{caminho}', timeout=30) as resposta:
+            return resposta.status, json.loads(resposta.read())
+    except HTTPError as erro:
+        return erro.code, json.loads(erro.read())
+
+
+def test_lista_endpoints(servidor):
+    status, corpo = _get(servidor, '/')
+    assert status == 200 and set(corpo) == set(api.ENDPOINTS)
+
+
+@pytest.mark.parametrize('caminho, linhas', [
+    ('/ranking_cidades', 10),
+    ('/ranking_cidades?limite=3&pais=India,Brazil', 3),
+    ('/ranking_restaurantes_cuisine?culinaria=Italian&limite=5&min_votes=0', 5),
+    ('/dataframe_paises?pais=India&pais=Brazil', 2),
+])
+def test_respostas(servidor, caminho, linhas):
+    status, corpo = _get(servidor, caminho)
+    assert status == 200
+    assert corpo['linhas'] == len(corpo['dados']) == linhas
+
+
+def test_ranking_cidades_filtra_paises(servidor):
+    _, corpo = _get(servidor, '/ranking_cidades?pais=Brazil&limite=100')
+    assert corpo['dados'] and {d['country_name'] for d in corpo['dados']} == {'Brazil'}
+
+
+@pytest.mark.parametrize('caminho', [
+    '/ranking_cidades?limite=-3',
+    '/ranking_cidades?limite=0',
+    '/ranking_cidades?limite=dez',
+    '/ranking_restaurantes_cuisine?culinaria=Italian&limite=-1',
+    '/ranking_restaurantes_cuisine?culinaria=Italian&min_votes=-5',
+    '/ranking_restaurantes_cuisine?culinaria=Italian&criterio=media',
+    '/ranking_restaurantes_cuisine',
+])
+def test_parametros_invalidos_respondem_400(servidor, caminho):
+    status, corpo = _get(servidor, caminho)
+    assert status == 400 and 'erro' in corpo
+
+
+def test_endpoint_desconhecido_responde_404(servidor):
+    status, corpo = _get(servidor, '/nada')
+    assert status == 404 and 'erro' in corpo
+
+
+def test_falha_do_endpoint_responde_500(servidor, monkeypatch):
+    def quebrado(caminho, parametros):
+        raise KeyError('coluna')
+    monkeypatch.setitem(api.ENDPOINTS, 'quebrado', quebrado)
+    status, corpo = _get(servidor, '/quebrado')
+    assert status == 500 and 'KeyError' in corpo['erro']
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules.cleaning import ChavesVistas, remover_duplicatas
+
+
+def _em_blocos(df, subset, tamanho):
+    vistas = ChavesVistas()
+    partes = [remover_duplicatas(df.iloc[i:i + tamanho].reset_index(drop=True), subset=subset, vistas=vistas)
+              for i in range(0, len(df), tamanho)]
+    return pd.concat(partes, ignore_index=True), vistas
+
+
+@pytest.mark.parametrize('subset', ['id', 'texto', ['texto', 'numero']])
+def test_blocos_igual_a_drop_duplicates(subset):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({'id': rng.integers(0, 5_000, 40_000),
+                       'texto': rng.choice(['a', 'b', 'c', None], 40_000),
+                       'numero': rng.integers(0, 30, 40_000)})
+    out, vistas = _em_blocos(df, subset, 3_000)
+    esperado = df.drop_duplicates(subset=subset).reset_index(drop=True)
+    pd.testing.assert_frame_equal(out, esperado)
+    assert len(vistas) == len(esperado)
+
+
+def test_chaves_inteiras_ficam_em_poucos_arrays():
+    vistas = ChavesVistas()
+    for i in range(1_000):
+        vistas.adicionar(np.arange(i * 100, (i + 1) * 100, dtype=np.int64))
+    assert len(vistas) == 100_000
+    assert len(vistas.ordenadas) <= np.log2(100_000)
+    for ordenadas in vistas.ordenadas:
+        assert np.all(np.diff(ordenadas) > 0)
+    assert vistas.contem(np.array([0, 99_999, 100_000], dtype=np.int64)).tolist() == [True, True, False]
+
+
+def test_chaves_exatas_nao_colidem():
+    # chaves diferentes nunca são tomadas como já vistas (não há hash no caminho)
+    vistas = ChavesVistas()
+    vistas.adicionar(ChavesVistas.codificar(pd.DataFrame({'k': ['x', 'y']}), 'k'))
+    novas = ChavesVistas.codificar(pd.DataFrame({'k': ['x', 'z', None]}), 'k')
+    assert vistas.contem(novas).tolist() == [True, False, False]
@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules.cuisines import (
+    IndiceCulinarias, agregar_por_culinaria, culinarias_disponiveis, mascara_culinarias, separar,
+)
+
+
+def _explodido(df):
+    ''' Uma linha por (restaurante, culinária): a referência em pandas puro. '''
+    listas = df['culinarias'].astype(object).map(separar)
+    return df.assign(culinaria=listas).explode('culinaria').dropna(subset=['culinaria'])
+
+
+def _mascara_referencia(df, culinarias, modo):
+    listas = df['culinarias'].astype(object).map(lambda t: set(separar(t)))
+    if not culinarias:
+        return np.zeros(len(df), dtype=bool)
+    teste = (lambda s: bool(s & set(culinarias))) if modo == 'any' else (lambda s: set(culinarias) <= s)
+    return listas.map(teste).to_numpy(dtype=bool)
+
+
+def test_separar():
+    assert separar('Pizza,  Italian, Pizza') == ['Pizza', 'Italian']
+    assert separar('') == []
+
+
+def test_indice_bits_e_incidencia():
+    indice = IndiceCulinarias(['Pizza, Italian', 'Cafe', 'Italian'])
+    assert list(indice.vocabulario) == ['Cafe', 'Italian', 'Pizza']
+    assert indice.incidencia.tolist() == [[False, True, True], [True, False, False], [False, True, False]]
+    assert indice.combinacoes(['Italian']).tolist() == [True, False, True]
+    assert indice.combinacoes(['Italian', 'Pizza'], 'all').tolist() == [True, False, False]
+    assert not indice.combinacoes(['Italian', 'Sushi'], 'all').any()
+    with pytest.raises(ValueError):
+        indice.combinacoes(['Cafe'], 'algum')
+
+
+@pytest.mark.parametrize('modo', ['any', 'all'])
+@pytest.mark.parametrize('culinarias', [[], ['Italian'], ['Italian', 'Pizza'], ['Japanese', 'Sushi', 'Zzz'],
+                                        ['Brazilian', 'BBQ', 'Home-made']])
+def test_mascara_igual_a_referencia(restaurantes, culinarias, modo):
+    mascara = mascara_culinarias(restaurantes, culinarias, modo)
+    np.testing.assert_array_equal(mascara.to_numpy(), _mascara_referencia(restaurantes, culinarias, modo))
+
+
+def test_mascara_vazia_igual_nos_dois_modos(restaurantes):
+    assert not mascara_culinarias(restaurantes, [], 'any').any()
+    assert not mascara_culinarias(restaurantes, [], 'all').any()
+
+
+def test_agregar_igual_a_referencia(restaurantes):
+    metricas = dict(media=('aggregate_rating', 'mean'), soma=('votes', 'sum'), n=('votes', 'count'),
+                    menor=('restaurant_id', 'min'), maior=('aggregate_rating', 'max'))
+    obtido = agregar_por_culinaria(restaurantes, **metricas).sort_index()
+    esperado = _explodido(restaurantes).groupby('culinaria').agg(**metricas).sort_index()
+    assert list(obtido.index) == list(esperado.index)
+    for coluna in metricas:
+        np.testing.assert_allclose(obtido[coluna].to_numpy(dtype=float), esperado[coluna].to_numpy(dtype=float))
+    assert obtido['menor'].dtype == np.int64
+
+
+def test_agregar_recorte_so_com_culinarias_presentes(restaurantes):
+    recorte = restaurantes.loc[restaurantes['country_name'] == 'Brazil']
+    obtido = agregar_por_culinaria(recorte, media=('aggregate_rating', 'mean'))
+    esperado = _explodido(recorte).groupby('culinaria')['aggregate_rating'].mean()
+    pd.testing.assert_series_equal(obtido['media'].sort_index(), esperado.sort_index(),
+                                   check_names=False, check_index_type=False)
+
+
+def test_agregar_dataframe_vazio(restaurantes):
+    vazio = restaurantes.iloc[:0]
+    obtido = agregar_por_culinaria(vazio, media_nota=('aggregate_rating', 'mean'),
+                                   id_mais_antigo=('restaurant_id', 'min'), maior=('votes', 'max'))
+    assert obtido.empty
+    assert list(obtido.columns) == ['media_nota', 'id_mais_antigo', 'maior']
+
+
+def test_grafico_notas_culinarias_sem_linhas(restaurantes):
+    import inspect
+    from modules.charts import grafico_notas_culinarias
+    vazio = restaurantes.loc[mascara_culinarias(restaurantes, [], 'any')]
+    fig = inspect.unwrap(grafico_notas_culinarias)(vazio, [])
+    assert len(fig.data) == 1 and len(fig.data[0].x) == 0
+
+
+def test_culinarias_disponiveis_inclui_as_secundarias(restaurantes):
+    opcoes = culinarias_disponiveis(restaurantes)
+    assert opcoes == sorted(_explodido(restaurantes)['culinaria'].unique())
+    assert set(restaurantes['cuisines'].dropna()) < set(opcoes)
+    assert culinarias_disponiveis(restaurantes.drop(columns='culinarias')) == sorted(restaurantes['cuisines'].unique())
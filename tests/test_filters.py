@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from modules.cube import faixa_nota
+from modules.cuisines import mascara_culinarias
+from modules.filters import Filtro, IndiceFiltros
+
+
+@pytest.fixture(scope='module')
+def indice(restaurantes):
+    return IndiceFiltros(restaurantes)
+
+
+@pytest.mark.parametrize('paises', [[], ['Brazil'], ['India', 'USA', 'England'], ['Brazil', 'Nada']])
+def test_paises_igual_a_isin(restaurantes, indice, paises):
+    esperado = restaurantes['country_name'].isin(paises).to_numpy()
+    np.testing.assert_array_equal(indice.algum('country_name', paises).mascara(), esperado)
+    assert indice.algum('country_name', paises).contar() == esperado.sum()
+
+
+def test_preco_faixas_e_flags(restaurantes, indice):
+    np.testing.assert_array_equal(indice.algum('price_range', [4]).mascara(),
+                                  (restaurantes['price_range'] == 4).to_numpy())
+    np.testing.assert_array_equal(indice.algum('faixa_nota', ['>4']).mascara(),
+                                  (restaurantes['aggregate_rating'] > 4).to_numpy())
+    np.testing.assert_array_equal(indice.algum('faixa_nota', ['<2.5']).mascara(),
+                                  (restaurantes['aggregate_rating'] < 2.5).to_numpy())
+    np.testing.assert_array_equal(indice.algum('faixa_nota', ['2.5-4']).mascara(),
+                                  np.asarray(faixa_nota(restaurantes['aggregate_rating'])) == '2.5-4')
+    np.testing.assert_array_equal(indice.algum('has_online_delivery', [True]).mascara(),
+                                  restaurantes['has_online_delivery'].to_numpy())
+
+
+@pytest.mark.parametrize('modo', ['any', 'all'])
+@pytest.mark.parametrize('culinarias', [[], ['Italian'], ['Italian', 'Pizza'], ['Brazilian', 'Zzz']])
+def test_culinarias_igual_a_mascara_culinarias(restaurantes, indice, culinarias, modo):
+    filtro = (indice.algum if modo == 'any' else indice.todos)('culinarias', culinarias)
+    np.testing.assert_array_equal(filtro.mascara(), mascara_culinarias(restaurantes, culinarias, modo).to_numpy())
+
+
+def test_combinacoes(restaurantes, indice):
+    paises = indice.algum('country_name', ['India', 'Brazil'])
+    caros = indice.algum('price_range', [4])
+    m_paises = restaurantes['country_name'].isin(['India', 'Brazil']).to_numpy()
+    m_caros = (restaurantes['price_range'] == 4).to_numpy()
+    np.testing.assert_array_equal((paises & caros).mascara(), m_paises & m_caros)
+    np.testing.assert_array_equal((paises | caros).mascara(), m_paises | m_caros)
+    np.testing.assert_array_equal((~paises).mascara(), ~m_paises)
+    assert (~paises).contar() == (~m_paises).sum()
+    np.testing.assert_array_equal((paises & caros).posicoes(), np.flatnonzero(m_paises & m_caros))
+
+
+def test_negacao_nao_liga_bits_de_preenchimento():
+    filtro = ~Filtro(np.zeros(2, dtype=np.uint8), 11)
+    assert filtro.contar() == 11
+    assert filtro.mascara().all() and len(filtro.mascara()) == 11
+
+
+def test_recorte(restaurantes, indice):
+    assert indice.recorte(restaurantes, indice.tudo()) is restaurantes
+    filtro = indice.algum('country_name', ['Qatar'])
+    recorte = indice.recorte(restaurantes, filtro)
+    esperado = restaurantes.loc[restaurantes['country_name'] == 'Qatar']
+    assert recorte.index.equals(esperado.index)
+    assert indice.recorte(restaurantes, indice.vazio()).empty
+    with pytest.raises(ValueError):
+        indice.recorte(restaurantes.iloc[:10], filtro)
+
+
+def test_mascara_restrita_a_posicoes(restaurantes, indice):
+    paises = indice.algum('country_name', ['Brazil'])
+    caros = indice.algum('price_range', [4])
+    recorte = indice.recorte(restaurantes, paises)
+    np.testing.assert_array_equal(caros.mascara(paises.posicoes()), (recorte['price_range'] == 4).to_numpy())
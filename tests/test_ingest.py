@@ -0,0 +1,73 @@
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules.cube import construir_cubo
+from modules.data import (
+    CSV_PADRAO, build_snapshot, caminho_cubo, caminho_snapshot, dataset_version, gravar_cubo, hash_arquivo,
+    identidade_snapshot, ler_cubo, ler_snapshot,
+)
+from modules.ingest import aplicar_delta, preparar_delta
+
+def _texto(df):
+    ''' Categorias como texto: snapshot e referência têm dicionários diferentes. '''
+    return df.astype({c: str for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)})
+
+
+def _celulas(cubo):
+    ''' Células do cubo em ordem fixa (a ordem das categorias depende de como o dataframe foi montado). '''
+    dimensoes = ['country_name', 'city', 'cuisines', 'price_range', 'faixa_nota', 'has_online_delivery']
+    return _texto(cubo.dados).sort_values(dimensoes).reset_index(drop=True)
+
+
+def _upsert_pandas(base, delta):
+    ''' Referência: cada id do delta substitui a linha na mesma posição; ids novos vão para o fim. '''
+    n = len(base)
+    linha_delta = {i: n + j for j, i in enumerate(delta['restaurant_id'])}
+    existentes = set(base['restaurant_id'])
+    ordem = ([linha_delta.get(i, k) for k, i in enumerate(base['restaurant_id'])]
+             + [n + j for j, i in enumerate(delta['restaurant_id']) if i not in existentes])
+    return pd.concat([_texto(base), _texto(delta)], ignore_index=True).iloc[ordem].reset_index(drop=True)
+
+
+@pytest.fixture
+def csv(tmp_path):
+    destino = tmp_path / 'zomato.csv'
+    shutil.copy(CSV_PADRAO, destino)
+    return destino
+
+
+def test_delta_substitui_no_lugar_e_acrescenta_novos(csv, tmp_path):
+    bruto = pd.read_csv(csv)
+    fonte = hash_arquivo(csv)
+    base = build_snapshot(csv, caminho_snapshot(csv), fonte_sha256=fonte)
+    gravar_cubo(construir_cubo(base), caminho_cubo(csv), identidade_snapshot(caminho_snapshot(csv), fonte))
+
+    rng = np.random.default_rng(0)
+    atualizadas = bruto.sample(300, random_state=1)
+    atualizadas['Aggregate rating'] = rng.uniform(1, 5, 300).round(1)
+    atualizadas.iloc[:50, atualizadas.columns.get_loc('City')] = bruto['City'].sample(50, random_state=3).to_numpy()
+    novas = bruto.sample(200, random_state=2)
+    novas['Restaurant ID'] += 10**9
+    bruto_delta = pd.concat([novas.iloc[:100], atualizadas, novas.iloc[100:]])
+    bruto_delta.to_csv(tmp_path / 'delta.csv', index=False)
+
+    versao = dataset_version(csv)
+    total, stats = aplicar_delta(tmp_path / 'delta.csv', csv, report=True)
+    assert dataset_version(csv) != versao
+    assert dataset_version(csv)[3] == stats['geracao'] == 1
+
+    esperado = _upsert_pandas(base, preparar_delta(bruto_delta))
+    obtido = ler_snapshot(caminho_snapshot(csv), fonte)
+    assert total == len(obtido) == len(esperado)
+    assert stats['atualizados'] == base['restaurant_id'].isin(atualizadas['Restaurant ID']).sum()
+    pd.testing.assert_frame_equal(_texto(obtido).reset_index(drop=True), esperado, check_dtype=False)
+
+    # o cubo atualizado no lugar é o mesmo de um cubo montado do zero
+    cubo = ler_cubo(caminho_cubo(csv), identidade_snapshot(caminho_snapshot(csv), fonte))
+    referencia = construir_cubo(obtido)
+    pd.testing.assert_frame_equal(_celulas(cubo), _celulas(referencia), check_dtype=False)
+    votos = lambda c: c.agregar('city', votos=('votes', 'nunique')).pipe(_texto).sort_values('city')
+    pd.testing.assert_frame_equal(votos(cubo).reset_index(drop=True), votos(referencia).reset_index(drop=True))
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules.search import (
+    BONUS_EXATO, CAMPOS_BUSCA, buscar_restaurantes, construir_indice_busca, normalizar, tokenizar,
+)
+
+
+@pytest.fixture(scope='module')
+def indice(restaurantes):
+    return construir_indice_busca(restaurantes)
+
+
+@pytest.fixture(scope='module')
+def termos_por_campo(restaurantes):
+    return {coluna: [tokenizar(v) if pd.notna(v) else [] for v in restaurantes[coluna].astype(object)]
+            for coluna in CAMPOS_BUSCA}
+
+
+def _busca_pandas(restaurantes, termos_por_campo, consulta, limite):
+    ''' Referência linha a linha: cada termo casa por prefixo; placar = maior peso de campo por termo. '''
+    placar = pd.Series(0.0, index=restaurantes.index)
+    casou = pd.Series(True, index=restaurantes.index)
+    for termo in dict.fromkeys(tokenizar(consulta)):
+        melhor = pd.Series(0.0, index=restaurantes.index)
+        for coluna, peso in CAMPOS_BUSCA.items():
+            termos = termos_por_campo[coluna]
+            prefixo = np.array([any(t.startswith(termo) for t in ts) for ts in termos], dtype=bool)
+            exato = np.array([termo in ts for ts in termos], dtype=bool)
+            melhor = np.maximum(melhor, np.where(exato, peso * BONUS_EXATO, np.where(prefixo, peso, 0.0)))
+        casou &= melhor > 0
+        placar += melhor
+    if not tokenizar(consulta):
+        casou[:] = False
+    resultado = restaurantes.assign(placar=placar).loc[casou]
+    ordenado = resultado.sort_values(['placar', 'votes', 'aggregate_rating'], ascending=False, kind='stable')
+    return ordenado.drop(columns='placar').head(limite)
+
+
+@pytest.mark.parametrize('consulta', [
+    'new del', 'pizza', 'sao paulo', 'a', 'r', 'cafe bar', 'Las Piñas', 'CONNAUGHT place', 'xyzw', '', '  -  ',
+])
+@pytest.mark.parametrize('limite', [1, 10, 10_000])
+def test_igual_a_busca_linha_a_linha(restaurantes, termos_por_campo, indice, consulta, limite):
+    obtido = buscar_restaurantes(restaurantes, indice, consulta, limite)
+    esperado = _busca_pandas(restaurantes, termos_por_campo, consulta, limite)
+    pd.testing.assert_frame_equal(obtido, esperado)
+    np.testing.assert_array_equal(indice.buscar(consulta, limite), esperado['restaurant_id'].to_numpy())
+
+
+def test_subconjunto_com_indice_proprio(restaurantes):
+    brasil = restaurantes[restaurantes['country_name'] == 'Brazil']
+    indice = construir_indice_busca(brasil)
+    assert len(indice) == len(brasil)
+    obtido = buscar_restaurantes(brasil, indice, 'rio', 5)
+    assert len(obtido) > 0 and obtido.index.isin(brasil.index).all()
+
+
+def test_normalizar():
+    assert normalizar('Las Piñas City') == 'las pinas city'
+    assert normalizar("  São-Paulo's  ") == 'sao paulo s'
+    assert tokenizar('') == []
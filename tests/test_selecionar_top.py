@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules.charts import selecionar_top
+
+
+@pytest.fixture(scope='module')
+def tabela():
+    rng = np.random.default_rng(0)
+    n = 5_000
+    nota = rng.choice(np.arange(0, 50) / 10, n)   # muitos empates
+    nota[rng.choice(n, 200, replace=False)] = np.nan
+    return pd.DataFrame({'nota': nota,
+                         'votos': rng.integers(0, 20, n),
+                         'id': rng.permutation(n)},
+                        index=rng.permutation(n) + 10_000)
+
+
+@pytest.mark.parametrize('fim', ['head', 'tail'])
+@pytest.mark.parametrize('n', [0, 1, 10, 300, 4_900, 6_000])
+@pytest.mark.parametrize('by, ascending', [
+    (['nota', 'id'], [False, True]),
+    (['nota', 'votos', 'id'], [True, False, True]),
+    (['votos', 'id'], [False, False]),
+])
+def test_igual_a_ordenacao_completa(tabela, by, ascending, n, fim):
+    ordenado = tabela.sort_values(by, ascending=ascending)
+    esperado = ordenado.head(n) if fim == 'head' else ordenado.tail(n)
+    pd.testing.assert_frame_equal(selecionar_top(tabela, by, ascending, n, fim=fim), esperado)
+
+
+def test_sem_nulos_e_coluna_de_texto(tabela):
+    sem_nulos = tabela.dropna()
+    esperado = sem_nulos.sort_values(['nota', 'id'], ascending=[True, True]).head(50)
+    pd.testing.assert_frame_equal(selecionar_top(sem_nulos, ['nota', 'id'], True, 50), esperado)
+
+    texto = tabela.assign(nome=tabela['id'].astype(str))
+    esperado = texto.sort_values(['nome'], ascending=[False]).head(20)
+    pd.testing.assert_frame_equal(selecionar_top(texto, 'nome', False, 20), esperado)
@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules.spatial import IndiceGrade, buscar_proximos, construir_indice, haversine_km
+
+
+@pytest.fixture(scope='module')
+def pontos():
+    rng = np.random.default_rng(0)
+    n = 20_000
+    lat = rng.uniform(-90, 90, n)
+    lon = rng.uniform(-180, 180, n)
+    # bordas de célula, polos e antimeridiano exatos, e um aglomerado perto da linha de data
+    lat[:500] = rng.integers(-180, 181, 500) / 2
+    lon[:500] = rng.integers(-360, 361, 500) / 2
+    lat[500:2500] = rng.normal(-17, 1, 2000).clip(-90, 90)
+    lon[500:2500] = np.where(rng.random(2000) < 0.5, rng.uniform(178, 180, 2000), rng.uniform(-180, -178, 2000))
+    lat[2500:2510] = np.nan
+    return pd.DataFrame({'lat': lat, 'lon': lon}, index=rng.permutation(n) * 3)
+
+
+@pytest.fixture(scope='module')
+def indice(pontos):
+    return IndiceGrade(pontos['lat'], pontos['lon'], pontos.index)
+
+
+def _no_retangulo(pontos, sul, oeste, norte, leste):
+    lat, lon = pontos['lat'], pontos['lon']
+    faixa_lat = (lat >= sul) & (lat <= norte)
+    if oeste <= leste:
+        return pontos.index[faixa_lat & (lon >= oeste) & (lon <= leste)]
+    return pontos.index[faixa_lat & ((lon >= oeste) | (lon <= leste))]
+
+
+@pytest.mark.parametrize('sul, oeste, norte, leste', [
+    (-10, -20, 30, 45),
+    (-0.5, -0.5, 0.5, 0.5),          # bordas exatas de célula
+    (-90, -180, 90, 180),
+    (80, -180, 90, 180),             # polo norte
+    (-25, 170, -10, -170),           # cruza o antimeridiano
+    (-25, 179.5, -10, 180),
+    (40, 30, 20, 60),                # sul > norte: vazio
+])
+def test_bbox_igual_a_mascara(pontos, indice, sul, oeste, norte, leste):
+    obtido = indice.bbox(sul, oeste, norte, leste)
+    np.testing.assert_array_equal(np.sort(obtido), np.sort(_no_retangulo(pontos, sul, oeste, norte, leste)))
+
+
+def test_bbox_normaliza_longitudes_do_mapa_dando_a_volta(indice):
+    np.testing.assert_array_equal(np.sort(indice.bbox(-25, 530, -10, 550)), np.sort(indice.bbox(-25, 170, -10, -170)))
+    np.testing.assert_array_equal(np.sort(indice.bbox(-30, -400, 30, 400)), np.sort(indice.bbox(-30, -180, 30, 180)))
+
+
+def test_bbox_com_limite_e_limites_do_folium(pontos, indice):
+    todos = indice.bbox(-40, -60, 40, 60)
+    amostra = indice.bbox(-40, -60, 40, 60, limite=100)
+    assert len(amostra) == 100 and set(amostra) <= set(todos)
+    bounds = {'_southWest': {'lat': -40, 'lng': -60}, '_northEast': {'lat': 40, 'lng': 60}}
+    np.testing.assert_array_equal(indice.limites(bounds), todos)
+    assert len(IndiceGrade(pontos['lat'], pontos['lon'])) == pontos['lat'].notna().sum()
+
+
+@pytest.mark.parametrize('lat, lon, km', [
+    (0, 0, 500), (-17, 179.9, 300), (-17, -179.9, 80), (89.5, 10, 200),
+    (-45, 100, 3_000), (70, -179, 1_500), (10, 20, 25_000),   # círculos grandes fora do equador
+])
+def test_raio_igual_a_haversine_em_todos(pontos, indice, lat, lon, km):
+    rotulos, distancias = indice.raio(lat, lon, km)
+    todas = pd.Series(haversine_km(lat, lon, pontos['lat'].to_numpy(), pontos['lon'].to_numpy()), index=pontos.index)
+    esperado = todas[todas <= km].sort_values(kind='stable')
+    np.testing.assert_array_equal(np.sort(rotulos), np.sort(esperado.index))
+    np.testing.assert_allclose(distancias, esperado.to_numpy())
+
+
+@pytest.mark.parametrize('lat, lon, k', [(0, 0, 1), (-17, 179.99, 50), (60, -179, 500), (-89, 0, 10)])
+def test_vizinhos_iguais_as_menores_distancias(pontos, indice, lat, lon, k):
+    rotulos, distancias = indice.vizinhos(lat, lon, k)
+    todas = pd.Series(haversine_km(lat, lon, pontos['lat'].to_numpy(), pontos['lon'].to_numpy()), index=pontos.index)
+    esperado = todas.nsmallest(k)
+    np.testing.assert_array_equal(rotulos, esperado.index)
+    np.testing.assert_allclose(distancias, esperado.to_numpy())
+
+
+def test_vizinhos_com_filtro_e_raio_maximo(pontos, indice):
+    pares = lambda rotulos: rotulos % 2 == 0
+    rotulos, _ = indice.vizinhos(-17, 179.5, 30, aceitar=pares)
+    todas = pd.Series(haversine_km(-17, 179.5, pontos['lat'].to_numpy(), pontos['lon'].to_numpy()), index=pontos.index)
+    np.testing.assert_array_equal(rotulos, todas[pares(todas.index)].nsmallest(30).index)
+
+    rotulos, distancias = indice.vizinhos(0, 0, 10_000, raio_max=400)
+    todas = pd.Series(haversine_km(0, 0, pontos['lat'].to_numpy(), pontos['lon'].to_numpy()), index=pontos.index)
+    np.testing.assert_array_equal(rotulos, todas[todas <= 400].sort_values(kind='stable').index)
+    assert (distancias <= 400).all()
+
+
+def test_buscar_proximos_igual_a_filtro_e_ordenacao(restaurantes):
+    indice = construir_indice(restaurantes)
+    subconjunto = restaurantes[restaurantes['country_name'] != 'India']   # índice do dataframe completo
+    obtido = buscar_proximos(subconjunto, indice, 28.6, 77.2, k=15, price_range=[3, 4], nota_minima=4.0)
+
+    base = subconjunto[subconjunto['price_range'].isin([3, 4]) & (subconjunto['aggregate_rating'] >= 4.0)]
+    distancias = haversine_km(28.6, 77.2, base['latitude'].to_numpy(), base['longitude'].to_numpy())
+    esperado = base.assign(distancia_km=distancias).sort_values('distancia_km', kind='stable').head(15)
+    pd.testing.assert_frame_equal(obtido, esperado)
+
+    with pytest.raises(ValueError):
+        buscar_proximos(restaurantes, indice, 0, 0)
+
+
+def test_buscar_proximos_filtra_todas_as_culinarias(restaurantes):
+    indice = construir_indice(restaurantes)
+    obtido = buscar_proximos(restaurantes, indice, 28.6, 77.2, raio_km=30, culinarias=['Italian', 'Bubble Tea'])
+
+    listas = restaurantes['culinarias'].astype(object).str.split(', ')
+    base = restaurantes[listas.map(lambda l: 'Italian' in l or 'Bubble Tea' in l)]
+    distancias = haversine_km(28.6, 77.2, base['latitude'].to_numpy(), base['longitude'].to_numpy())
+    esperado = base.assign(distancia_km=distancias).loc[distancias <= 30].sort_values('distancia_km', kind='stable')
+    pd.testing.assert_frame_equal(obtido, esperado)
+    assert (obtido['cuisines'] != 'Italian').any()   # achados pela culinária secundária